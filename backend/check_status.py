@@ -4,74 +4,70 @@ Quick status check for Auralie simulations
 """
 
 import os
-import json
-from datetime import datetime
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from config import Config
+from simulation_store import SimulationStore
 
 def check_saved_files():
-    """Check what files have been saved"""
+    """Check what simulations have been saved"""
 
     print("\n" + "="*60)
     print("AURALIE SIMULATION STATUS")
     print("="*60 + "\n")
 
-    # Check simulations folder
-    sim_dir = "simulations"
-    output_dir = "output"
+    output_dirs = ["output", "src/output"]
 
-    if not os.path.exists(sim_dir):
-        print(f"⚠️  No '{sim_dir}' folder found")
-        print(f"   Run a simulation first: cd src && python main.py\n")
+    if not os.path.exists(Config.DATABASE_PATH) and not os.path.exists(Config.SIMULATIONS_DIR):
+        print(f"⚠️  No '{Config.DATABASE_PATH}' database found")
+        print(f"   Run a simulation first: python src/main.py\n")
         return
 
-    # Get all simulation files
-    sim_files = [f for f in os.listdir(sim_dir) if f.endswith('.json')]
+    # Metadata only - transcripts stay compressed in the store
+    store = SimulationStore(Config.DATABASE_PATH)
+    store.import_directory(Config.SIMULATIONS_DIR)
+    simulations = store.page(limit=-1, descending=False)
 
-    if not sim_files:
+    if not simulations:
         print(f"📂 No simulations saved yet\n")
         return
 
-    print(f"📊 Found {len(sim_files)} simulation(s)\n")
+    print(f"📊 Found {len(simulations)} simulation(s)\n")
 
     # Analyze each simulation
     completed = 0
     failed = 0
     partial = 0
 
-    for filename in sorted(sim_files):
-        filepath = os.path.join(sim_dir, filename)
-
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-
-        status = data.get('status', 'unknown')
-        days_completed = data.get('completed_days', len(data.get('days', [])))
-        participants = data.get('participants', {})
-        person1 = participants.get('person1', 'Unknown')
-        person2 = participants.get('person2', 'Unknown')
+    for sim in simulations:
+        status = sim['status']
 
         print(f"{'='*60}")
-        print(f"Simulation: {filename}")
+        print(f"Simulation: {sim['simulation_id']}")
         print(f"{'='*60}")
-        print(f"Participants: {person1} ❤️  {person2}")
+        print(f"Participants: {sim['profile1']} ❤️  {sim['profile2']}")
         print(f"Status: {status}")
-        print(f"Days completed: {days_completed}/7")
+        print(f"Days completed: {sim['completed_days']}/{Config.SIMULATION_DAYS}")
 
         if status == 'completed':
             completed += 1
-            compatibility = data.get('compatibility', {})
-            score = compatibility.get('score', 0)
-            rating = compatibility.get('rating', 'Unknown')
+            meta = store.get_meta(sim['simulation_id']) or {}
+            score = sim['compatibility_score'] or 0
+            rating = meta.get('compatibility_rating') or 'Unknown'
             print(f"Compatibility: {rating} ({score:.1f}/100)")
         elif status == 'failed':
             failed += 1
-            error = data.get('error', 'Unknown error')
+            error = sim['error'] or 'Unknown error'
             print(f"Error: {error[:100]}...")
         else:
             partial += 1
 
         # Check if output file exists
-        output_file = os.path.join(output_dir, filename.replace('.json', '.txt'))
-        if os.path.exists(output_file):
+        output_files = [os.path.join(d, f"{sim['simulation_id']}.txt") for d in output_dirs]
+        output_file = next((path for path in output_files if os.path.exists(path)), None)
+        if output_file:
             print(f"Output file: ✅ {output_file}")
         else:
             print(f"Output file: ❌ Not generated")
@@ -85,13 +81,13 @@ def check_saved_files():
     print(f"✅ Completed: {completed}")
     print(f"⚠️  Partial: {partial}")
     print(f"❌ Failed: {failed}")
-    print(f"📊 Total: {len(sim_files)}")
+    print(f"📊 Total: {len(simulations)}")
     print()
 
     # Show file locations
     print("📁 File locations:")
-    print(f"   Simulations: {os.path.abspath(sim_dir)}/")
-    print(f"   Output: {os.path.abspath(output_dir)}/")
+    print(f"   Simulations: {os.path.abspath(Config.DATABASE_PATH)}")
+    print(f"   Output: {', '.join(os.path.abspath(d) + '/' for d in output_dirs)}")
     print()
 
 def check_env_config():
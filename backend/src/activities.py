@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 import random
 
 class ActivityScenario:
@@ -68,13 +68,19 @@ class ActivityScenario:
     }
 
     @classmethod
-    def get_activity_for_day(cls, day: int, fondness_avg: int) -> Dict:
+    def get_activity_for_day(
+        cls,
+        day: int,
+        fondness_avg: int,
+        rng: Optional[random.Random] = None
+    ) -> Dict:
         """
         Get an appropriate activity based on day and relationship progress
 
         Args:
             day: Current day (1-7)
             fondness_avg: Average fondness level between both people (0-100)
+            rng: Random generator to draw from (defaults to the global one)
         """
 
         # Determine intimacy tier based on fondness
@@ -94,7 +100,16 @@ class ActivityScenario:
         if not suitable:
             suitable = available_activities
 
-        return random.choice(suitable)
+        return (rng or random).choice(suitable)
+
+    @classmethod
+    def get_activity_by_name(cls, name: str) -> Optional[Dict]:
+        """Look up an activity by name (case-insensitive), e.g. 'Hiking adventure'"""
+        for activities in cls.ACTIVITIES.values():
+            for activity in activities:
+                if activity["name"].lower() == name.strip().lower():
+                    return activity
+        return None
 
     @classmethod
     def get_texting_context(cls, day: int, time_of_day: str) -> str:
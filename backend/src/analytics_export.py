@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Export per-turn fondness and outcomes of completed simulations as one flat table
+
+Run from the backend directory:
+    python src/analytics_export.py                          data/exports/turns.csv, new simulations only
+    python src/analytics_export.py --format ndjson          data/exports/turns.ndjson
+    python src/analytics_export.py --format parquet         data/exports/turns/part-*.parquet (needs pyarrow)
+    python src/analytics_export.py --full                   Start over from the first simulation
+
+One row per message: who sent it on which day and in which session or
+activity, their fondness and emotion after it, the fondness breakdown
+(LLM decision, value and dealbreaker penalties) and the simulation's final
+scores. A state file next to the output remembers the last simulation
+exported, so each run only reads and appends simulations completed since.
+CSV and NDJSON files are appended to; Parquet gets one new part file per run.
+The API serves the same rows at GET /api/export/turns.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import io
+import json
+import os
+
+from config import Config
+from simulation_store import SimulationStore
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = ("csv", "ndjson", "parquet")
+
+TURN_COLUMNS = [
+    "simulation_id", "parent_simulation_id", "fork_day", "profile1", "profile2",
+    "day", "segment_type", "segment", "turn", "sender", "emotion", "fondness_level",
+    "fondness_change", "llm_decision", "value_penalty", "dealbreaker_penalty",
+    "sender_final_fondness", "compatibility_score", "compatibility_rating"
+]
+
+# Parquet column types (everything else is a string)
+_INT_COLUMNS = {"fork_day", "day", "turn", "fondness_level", "fondness_change", "llm_decision",
+                "value_penalty", "dealbreaker_penalty", "sender_final_fondness"}
+
+
+def turn_rows(result: Dict) -> Iterator[Dict]:
+    """Flatten one result into a row per message"""
+    participants = result["participants"]
+    compatibility = result.get("compatibility") or {}
+    final = result.get("final_assessment") or {}
+    simulation = {
+        "simulation_id": result["simulation_id"],
+        "parent_simulation_id": result.get("parent_simulation_id"),
+        "fork_day": result.get("fork_day"),
+        "profile1": participants["person1"],
+        "profile2": participants["person2"],
+        "compatibility_score": compatibility.get("score"),
+        "compatibility_rating": compatibility.get("rating")
+    }
+
+    for day in result["days"]:
+        segments = [("texting", session["time"], session["exchanges"]) for session in day["texting_sessions"]]
+        segments += [("activity", activity["activity"]["name"], activity["interactions"])
+                     for activity in day.get("activities", [])]
+        for segment_type, segment, messages in segments:
+            for turn, message in enumerate(messages):
+                breakdown = message.get("fondness_breakdown") or {}
+                yield {
+                    **simulation,
+                    "day": day["day"],
+                    "segment_type": segment_type,
+                    "segment": segment,
+                    "turn": turn,
+                    "sender": message["sender"],
+                    "emotion": message["emotion"],
+                    "fondness_level": message["fondness_level"],
+                    "fondness_change": breakdown.get("total"),
+                    "llm_decision": breakdown.get("llm_decision"),
+                    "value_penalty": breakdown.get("value_penalty"),
+                    "dealbreaker_penalty": breakdown.get("dealbreaker_penalty"),
+                    "sender_final_fondness": (final.get(message["sender"]) or {}).get("final_fondness")
+                }
+
+
+def iter_results(store: SimulationStore, after: Optional[int] = None) -> Iterator[Tuple[int, Dict]]:
+    """(export_seq, result) for each completed simulation after export_seq `after`, oldest first"""
+    for export_seq, simulation_id in store.completed_after(after):
+        result = store.load(simulation_id)
+        if result is not None:
+            yield export_seq, result
+
+
+def stream_csv(rows: Iterator[Dict], header: bool = True) -> Iterator[str]:
+    """CSV text in chunks of about 64 KB"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=TURN_COLUMNS)
+    if header:
+        writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= 65536:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(rows: Iterator[Dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def write_parquet(rows: List[Dict], path: str):
+    columns = {column: [row[column] for row in rows] for column in TURN_COLUMNS}
+    schema = pyarrow.schema([
+        (column, pyarrow.int64() if column in _INT_COLUMNS
+         else pyarrow.float64() if column == "compatibility_score" else pyarrow.string())
+        for column in TURN_COLUMNS
+    ])
+    pyarrow.parquet.write_table(pyarrow.table(columns, schema=schema), path)
+
+
+def default_output(output_format: str) -> str:
+    return os.path.join("data", "exports", "turns" if output_format == "parquet" else f"turns.{output_format}")
+
+
+def load_state(state_path: str) -> Dict:
+    if not os.path.exists(state_path):
+        return {"after": None, "simulations": 0, "rows": 0, "parts": 0}
+    with open(state_path, 'r') as f:
+        return json.load(f)
+
+
+def save_state(state_path: str, state: Dict):
+    temp_path = state_path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_path, state_path)
+
+
+def export(store: SimulationStore, output_format: str, output: str, full: bool = False) -> Dict:
+    """Append simulations completed since the last run to `output`; returns this run's counts"""
+    state_path = output.rstrip("/") + ".export-state.json"
+    state = {"after": None, "simulations": 0, "rows": 0, "parts": 0} if full else load_state(state_path)
+    after = state["after"]
+    if isinstance(after, list):
+        # (updated_at, simulation_id) watermark from an older version
+        after = store.export_seq(after[1]) or 0
+    simulations = rows = 0
+
+    if output_format == "parquet":
+        # Parquet can't be appended to: this run's rows become one new part file
+        batch = []
+        for after, result in iter_results(store, after):
+            batch.extend(turn_rows(result))
+            simulations += 1
+        if simulations:
+            os.makedirs(output, exist_ok=True)
+            if full:
+                for filename in os.listdir(output):
+                    if filename.startswith("part-"):
+                        os.remove(os.path.join(output, filename))
+            state["parts"] += 1
+            write_parquet(batch, os.path.join(output, f"part-{state['parts']:05d}.parquet"))
+            rows = len(batch)
+    else:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        if full or not os.path.exists(output):
+            open(output, 'w').close()
+        start_size = os.path.getsize(output)
+        with open(output, 'a', newline="") as f:
+            try:
+                for after, result in iter_results(store, after):
+                    result_rows = list(turn_rows(result))
+                    if output_format == "csv":
+                        f.writelines(stream_csv(iter(result_rows), header=f.tell() == 0))
+                    else:
+                        f.writelines(stream_ndjson(iter(result_rows)))
+                    simulations += 1
+                    rows += len(result_rows)
+            except BaseException:
+                # Leave the file as the last successful run left it, so nothing is exported twice
+                f.truncate(start_size)
+                raise
+
+    if simulations:
+        # Saved only after the data, so an interrupted run is redone rather than skipped
+        state["after"] = after
+        state["simulations"] += simulations
+        state["rows"] += rows
+        save_state(state_path, state)
+    return {"simulations": simulations, "rows": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export per-turn fondness and outcomes for analysis")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--output", default=None, help="Output file (directory for parquet)")
+    parser.add_argument("--full", action="store_true", help="Re-export everything instead of only new simulations")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and pyarrow is None:
+        parser.error("Parquet export needs pyarrow: pip install pyarrow (or use --format csv / ndjson)")
+
+    output = args.output or default_output(args.format)
+    store = SimulationStore(Config.DATABASE_PATH)
+    store.import_directory(Config.SIMULATIONS_DIR)
+
+    counts = export(store, args.format, output, args.full)
+    if counts["simulations"]:
+        print(f"📤 Exported {counts['rows']} turns from {counts['simulations']} simulation(s) to {output}")
+    else:
+        print(f"✅ {output} is up to date; no simulations completed since the last export")
+
+
+if __name__ == "__main__":
+    main()
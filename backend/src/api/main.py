@@ -11,24 +11,118 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Response, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict
-from datetime import datetime
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional, Dict, Set
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from contextlib import asynccontextmanager
 import json
+import base64
+import hashlib
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import uuid
 
+from config import Config
 from profile import UserProfile
+from profile_repository import ProfileRepository, valid_profile_id
 from simulator import DatingSimulation
+from activities import ActivityScenario
+from checkpoints import CheckpointStore
+from simulation_store import SimulationStore, SORT_KEYS as SIMULATION_SORT_KEYS
 from user_chat import UserTwinChat
+from llm_client import LLMClient
+from chat_sessions import ChatSessionManager
+from chat_channels import ChatChannels
+from progress import ProgressBroker
+from job_queue import JobQueue, TERMINAL_STATUSES, PRIORITIES
+from worker import SimulationWorker
+from bounded_cache import BoundedCache
+from http_compression import CompressionMiddleware, TrafficStats
+from render_cache import RenderCache
 from output_formatter import OutputFormatter
+import analytics_export
+
+# Durable job queue (SQLite); the API only enqueues and reads status, workers run the jobs
+job_queue = JobQueue(Config.DATABASE_PATH, Config.JOB_MAX_ATTEMPTS, Config.MAX_INFLIGHT_PER_TENANT)
+
+# Validated profiles, loaded once and refreshed when the profiles directory changes
+profile_repository = ProfileRepository(Config.PROFILES_DIR, Config.PROFILE_RESCAN_SECONDS)
+
+# Saved results (indexed metadata + per-day transcript rows)
+simulation_store = SimulationStore(Config.DATABASE_PATH)
+
+def estimate_result_size(result: Dict) -> int:
+    """
+    Approximate size of a result in bytes for the cache's budget: the text of
+    every message plus a fixed allowance for its other fields, without serializing it
+    """
+    size = 4096  # Header, assessment and suggestions
+    for day in result.get("days", []):
+        for session in day.get("texting_sessions", []):
+            for exchange in session.get("exchanges", []):
+                size += len(exchange.get("message", "")) + len(exchange.get("internal_thought", "")) + 256
+        for activity in day.get("activities", []):
+            for interaction in activity.get("interactions", []):
+                size += len(interaction.get("message", "")) + len(interaction.get("internal_thought", "")) + 160
+    return size
+
+# Finished simulations don't change, so their status and full result can be served from memory
+status_cache = BoundedCache(Config.STATUS_CACHE_ENTRIES, ttl_seconds=Config.CACHE_TTL_SECONDS)
+result_cache = BoundedCache(
+    Config.RESULT_CACHE_ENTRIES,
+    max_bytes=Config.RESULT_CACHE_MB * 1024 * 1024,
+    ttl_seconds=Config.CACHE_TTL_SECONDS,
+    sizeof=estimate_result_size
+)
+
+# End-of-day checkpoints that forks start from
+checkpoint_store = CheckpointStore()
+
+# Wakes long-poll/SSE clients when a simulation's status changes
+progress_broker = ProgressBroker()
+
+# Signals the embedded worker threads to stop on shutdown
+workers_stop = threading.Event()
+embedded_workers: List[SimulationWorker] = []
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the embedded simulation workers alongside the server"""
+    # Results saved as JSON files before the store existed
+    simulation_store.import_directory(Config.SIMULATIONS_DIR)
+
+    workers_stop.clear()
+    for i in range(Config.EMBEDDED_WORKERS):
+        worker = SimulationWorker(job_queue, on_change=progress_broker.publish)
+        embedded_workers.append(worker)
+        threading.Thread(
+            target=worker.run_forever,
+            args=(workers_stop,),
+            name=f"simulation-worker-{i}",
+            daemon=True
+        ).start()
+    threading.Thread(
+        target=chat_sessions.run_sweeper,
+        args=(workers_stop,),
+        name="chat-sweeper",
+        daemon=True
+    ).start()
+    yield
+    workers_stop.set()
+    embedded_workers.clear()
+    await LLMClient.close_shared_async_client()
 
 app = FastAPI(
     title="Auralie API",
     description="AI-powered dating simulator API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for mobile app
@@ -40,37 +134,74 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Thread pool for running simulations in background
-executor = ThreadPoolExecutor(max_workers=3)
+# gzip/Brotli for large responses, with before/after byte counts
+traffic_stats = TrafficStats()
+app.add_middleware(CompressionMiddleware, stats=traffic_stats, minimum_size=Config.COMPRESS_MIN_BYTES)
+
+# Readable transcripts, rendered on first request
+render_cache = RenderCache(Config.RENDER_CACHE_DIR, Config.RENDER_CACHE_MB * 1024 * 1024)
 
-# In-memory storage for simulation status (in production, use a database)
-simulation_status: Dict[str, Dict] = {}
+# Open chats: logged to disk after every message, only recently used ones kept in memory
+chat_sessions = ChatSessionManager(
+    Config.CHAT_SESSIONS_DIR,
+    idle_seconds=Config.CHAT_IDLE_SECONDS,
+    max_resident=Config.CHAT_MAX_RESIDENT,
+    compact_every=Config.CHAT_COMPACT_EVERY,
+    fsync=Config.CHAT_LOG_FSYNC
+)
 
-# In-memory storage for active chats
-active_chats: Dict[str, UserTwinChat] = {}
+# Replies and fondness updates pushed to chat WebSockets, kept briefly for reconnecting clients
+chat_channels = ChatChannels(Config.CHAT_WS_REPLAY_FRAMES, max_channels=Config.CHAT_MAX_RESIDENT)
+chat_reply_tasks: Set[asyncio.Task] = set()  # Replies still being generated for WebSocket messages
 
 # API Models
 class SimulationRequest(BaseModel):
     profile1_id: str
     profile2_id: str
+    seed: Optional[int] = None  # Reuse a previous run's seed to reproduce it
+    user_id: Optional[str] = None  # Fair-share tenant (defaults to the client address)
+    priority: str = "interactive"  # "interactive" or "batch"
+    force_new: bool = False  # Run a separate replica even if an identical simulation is in progress
+
+class ForkRequest(BaseModel):
+    fork_day: int  # Keep days 1..fork_day from the parent, simulate the rest
+    activities: Optional[Dict[int, str]] = None  # Day -> activity name, e.g. {4: "Hiking adventure"}
+    enable_activities: Optional[bool] = None
+    model: Optional[str] = None
+    seed: Optional[int] = None  # Defaults to the parent's seed
+    user_id: Optional[str] = None
+    priority: str = "interactive"
+    force_new: bool = False
 
 class SimulationStatus(BaseModel):
     simulation_id: str
-    status: str  # "pending", "running", "completed", "failed"
+    status: str  # "pending", "running", "completed", "failed", "cancelled"
     profile1_id: str
     profile2_id: str
     profile1: str  # Display name
     profile2: str  # Display name
     compatibility_score: Optional[float] = None
     completed_days: int = 0
+    seed: Optional[int] = None
+    progress: Optional[Dict] = None  # Latest progress event while running
+    version: int = 0  # Bumped on every status/progress change
+    priority: str = "interactive"
+    subscribers: int = 1  # Requests attached to this run (identical requests share it)
+    queue_position: Optional[int] = None  # 1 = next to start (pending only)
+    estimated_start_at: Optional[str] = None
     created_at: str
     completed_at: Optional[str] = None
     error: Optional[str] = None
 
+class Page(BaseModel):
+    items: List[Dict]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page; None on the last page
+
 class SimulationResponse(BaseModel):
     simulation_id: str
     status: str
     message: str
+    deduplicated: bool = False  # True if attached to an identical simulation already in progress
 
 class ChatStartRequest(BaseModel):
     profile_id: str
@@ -88,51 +219,169 @@ class ChatMessageResponse(BaseModel):
     fondness_level: int
 
 # Helper functions
-def get_profile_id_from_name(name: str) -> str:
-    """Convert profile name to ID format"""
-    return name.lower().replace(' ', '_')
-
 def load_profile_by_id(profile_id: str) -> UserProfile:
-    """Load a profile by ID"""
-    profiles_dir = "profiles"
-    filepath = os.path.join(profiles_dir, f"{profile_id}.json")
-
-    if not os.path.exists(filepath):
+    """Get a profile by ID from the profile repository"""
+    profile = profile_repository.get(profile_id)
+    if profile is None:
         raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
-
-    return UserProfile.load(filepath)
-
-def run_simulation_sync(profile1: UserProfile, profile2: UserProfile, simulation_id: str):
-    """Run simulation synchronously (called in background thread)"""
+    return profile
+
+def get_job_status(simulation_id: str) -> Optional[Dict]:
+    """A job's status from the queue; finished jobs are cached"""
+    cached = status_cache.get(simulation_id)
+    if cached is not None:
+        return dict(cached)
+    status = job_queue.get(simulation_id)
+    if status is not None and status["status"] in TERMINAL_STATUSES:
+        status_cache.put(simulation_id, dict(status))
+    return status
+
+def get_simulation_status(simulation_id: str) -> Dict:
+    """Get a queued/running/finished simulation's status or raise 404"""
+    status = get_job_status(simulation_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    return status
+
+def load_simulation_file(simulation_id: str) -> Optional[Dict]:
+    """Load a saved simulation result (forks include their parent's days), if there is one"""
+    result = result_cache.get(simulation_id)
+    if result is None:
+        result = simulation_store.load(simulation_id)
+        if result is not None and result.get("status") == "completed":
+            result_cache.put(simulation_id, result)
+    return result
+
+def forget_simulation(simulation_id: str):
+    """Drop a deleted simulation from every in-memory cache"""
+    status_cache.invalidate(simulation_id)
+    result_cache.invalidate(simulation_id)
+    progress_broker.forget(simulation_id)
+
+def saved_status(saved: Dict) -> SimulationStatus:
+    """Status row for a simulation that is only in the simulation store"""
+    return SimulationStatus(
+        simulation_id=saved["simulation_id"],
+        status=saved["status"],
+        profile1_id=saved["profile1_id"],
+        profile2_id=saved["profile2_id"],
+        profile1=saved["profile1"],
+        profile2=saved["profile2"],
+        compatibility_score=saved["compatibility_score"],
+        completed_days=saved["completed_days"],
+        seed=saved["seed"],
+        created_at=saved["start_time"],
+        completed_at=saved["end_time"],
+        error=saved["error"]
+    )
+
+def encode_cursor(sort: str, order: str, sort_value, item_id: str) -> str:
+    """Opaque cursor pointing just past one row of a sorted listing"""
+    return base64.urlsafe_b64encode(json.dumps([sort, order, sort_value, item_id]).encode()).decode()
+
+def decode_cursor(cursor: str, sort: str, order: str) -> tuple:
+    """(sort_value, id) from a cursor made for the same sort and order, or 400"""
     try:
-        simulation_status[simulation_id]["status"] = "running"
-
-        simulation = DatingSimulation(profile1, profile2)
-        result = simulation.run_simulation()
-
-        # Save formatted output
-        output_dir = "src/output"
-        os.makedirs(output_dir, exist_ok=True)
-        output_filename = f"{output_dir}/{simulation.simulation_id}.json"
-
-        # Save as JSON for API access
-        with open(output_filename, 'w') as f:
-            json.dump(result, f, indent=2)
-
-        # Also save formatted text output
-        text_output = f"{output_dir}/{simulation.simulation_id}.txt"
-        OutputFormatter.save_formatted_output(result, text_output)
-
-        simulation_status[simulation_id]["status"] = "completed"
-        simulation_status[simulation_id]["completed_at"] = datetime.now().isoformat()
-        simulation_status[simulation_id]["compatibility_score"] = result.get("compatibility", {}).get("score", None)
-        simulation_status[simulation_id]["completed_days"] = result.get("completed_days", 0)
-        simulation_status[simulation_id]["result"] = result
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != 4 or values[:2] != [sort, order]:
+        raise HTTPException(status_code=400, detail="Cursor was made for a different sort; start over without it")
+    return values[2], values[3]
+
+def parse_fields(fields: Optional[str], allowed) -> Optional[Set[str]]:
+    """Comma-separated field projection, or None for every field"""
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
+
+def check_sort(sort: str, order: str, allowed):
+    if sort not in allowed:
+        raise HTTPException(status_code=422, detail=f"sort must be one of: {', '.join(allowed)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=422, detail="order must be asc or desc")
+
+def check_date(name: str, value: Optional[str]):
+    if value:
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"{name} must be an ISO date or datetime")
+
+def with_queue_position(status: Dict) -> Dict:
+    """Add queue position and estimated start time to a pending job's status"""
+    if status["status"] == "pending":
+        position = job_queue.queue_position(
+            status["simulation_id"],
+            Config.WORKER_CAPACITY,
+            Config.ESTIMATED_SIMULATION_SECONDS
+        )
+        if position:
+            status.update(position)
+    return status
+
+def validators(simulation_id: str, version: str, modified_at: Optional[str]) -> Dict[str, str]:
+    """ETag (weak, since the body may be sent compressed) and Last-Modified headers"""
+    headers = {"ETag": f'W/"{simulation_id}-{version}"', "Cache-Control": "no-cache"}
+    if modified_at:
+        modified = datetime.fromisoformat(modified_at).astimezone(timezone.utc)
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """Whether the client's If-None-Match / If-Modified-Since still matches"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        current = headers["ETag"].removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") in (current, "*") for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def progress_snapshot(status: Dict) -> Dict:
+    """The small part of a status that changes while a simulation runs"""
+    status = with_queue_position(status)
+    return {
+        "simulation_id": status["simulation_id"],
+        "status": status["status"],
+        "version": status.get("version", 0),
+        "completed_days": status.get("completed_days", 0),
+        "compatibility_score": status.get("compatibility_score"),
+        "progress": status.get("progress"),
+        "queue_position": status.get("queue_position"),
+        "estimated_start_at": status.get("estimated_start_at"),
+        "error": status.get("error")
+    }
 
-    except Exception as e:
-        simulation_status[simulation_id]["status"] = "failed"
-        simulation_status[simulation_id]["error"] = str(e)
-        simulation_status[simulation_id]["completed_at"] = datetime.now().isoformat()
+async def wait_for_change(simulation_id: str, since: int, timeout: float) -> Optional[Dict]:
+    """
+    Wait until a simulation's version is newer than `since` (or the timeout passes)
+    Embedded workers wake us immediately; jobs run by external worker processes
+    are picked up by re-checking the queue every second. Queue reads run in the
+    threadpool: SQLite can block while a worker holds the write lock, and that
+    must not stall every other request on the event loop
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        seen = progress_broker.version(simulation_id)
+        status = await run_in_threadpool(get_job_status, simulation_id)
+        if status is None or status["version"] > since:
+            return status
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return status
+        await progress_broker.wait(simulation_id, seen, min(remaining, 1.0))
 
 # API Endpoints
 @app.get("/")
@@ -140,21 +389,55 @@ def root():
     """Health check endpoint"""
     return {"message": "Auralie API", "version": "1.0.0", "status": "running"}
 
-@app.get("/api/profiles")
-def list_profiles():
-    """Get all available profiles"""
-    try:
-        profiles = UserProfile.load_all("profiles")
-        # Add id field to each profile (derived from name)
-        return [
-            {
-                "id": get_profile_id_from_name(profile.name),
-                **profile.model_dump()
-            }
-            for profile in profiles
-        ]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading profiles: {str(e)}")
+PROFILE_SORT_KEYS = ("id", "name", "age")
+
+@app.get("/api/profiles", response_model=Page)
+def list_profiles(
+    mbti: Optional[str] = None,
+    gender: Optional[str] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    q: Optional[str] = None,  # Case-insensitive match on name
+    sort: str = "id",
+    order: str = "asc",
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None  # e.g. "id,name,age,mbti"
+):
+    """Get one page of profiles"""
+    check_sort(sort, order, PROFILE_SORT_KEYS)
+    projection = parse_fields(fields, ["id", *UserProfile.model_fields])
+    after = decode_cursor(cursor, sort, order) if cursor else None
+
+    rows = []
+    for profile_id, profile in profile_repository.items():
+        if mbti and profile.mbti.value != mbti.upper():
+            continue
+        if gender and profile.gender.value != gender:
+            continue
+        if min_age is not None and profile.age < min_age:
+            continue
+        if max_age is not None and profile.age > max_age:
+            continue
+        if q and q.lower() not in profile.name.lower():
+            continue
+        row = {"id": profile_id, **profile.model_dump()}
+        key = (row[sort], row["id"])
+        if after is not None and (key <= after if order == "asc" else key >= after):
+            continue
+        rows.append((key, row))
+
+    rows.sort(key=lambda entry: entry[0], reverse=order == "desc")
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last_key = page[-1][0]
+        next_cursor = encode_cursor(sort, order, last_key[0], last_key[1])
+
+    return Page(
+        items=[{k: v for k, v in row.items() if projection is None or k in projection} for _, row in page],
+        next_cursor=next_cursor
+    )
 
 @app.get("/api/profiles/{profile_id}", response_model=UserProfile)
 def get_profile(profile_id: str):
@@ -165,40 +448,164 @@ def get_profile(profile_id: str):
 def create_profile(profile: UserProfile):
     """Create a new profile"""
     try:
-        profile.save("profiles")
+        profile_repository.save(profile)
         return profile
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving profile: {str(e)}")
 
+# Per-line errors included in an import report (the total is always reported)
+MAX_IMPORT_ERRORS = 100
+
+def validate_profile_lines(batch: List[tuple], valid: Dict[str, tuple], errors: List[Dict]):
+    """Validate (line number, raw JSON) pairs into `valid` (profile ID -> (line, profile)) or `errors`"""
+    for line_number, raw in batch:
+        try:
+            profile = UserProfile.model_validate_json(raw)
+        except ValidationError as e:
+            errors.append({
+                "line": line_number,
+                "error": "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc']) or 'line'}: {err['msg']}" for err in e.errors()
+                )
+            })
+            continue
+        if not valid_profile_id(profile.profile_id):
+            errors.append({"line": line_number, "error": f"name: can't be used as a profile ID: {profile.name!r}"})
+            continue
+        if profile.profile_id in valid:
+            errors.append({
+                "line": line_number,
+                "error": f"duplicate of line {valid[profile.profile_id][0]} (profile {profile.profile_id})"
+            })
+            continue
+        valid[profile.profile_id] = (line_number, profile)
+
+@app.post("/api/profiles/import")
+async def import_profiles(request: Request, skip_invalid: bool = False, dry_run: bool = False):
+    """
+    Bulk import from NDJSON (one profile per line), streamed and validated in batches
+    All valid profiles are written together, or none are: by default any invalid line
+    rejects the whole import (422 with per-line errors); skip_invalid=true writes the
+    valid ones anyway, and dry_run=true only validates
+    Bodies over PROFILE_IMPORT_MAX_BYTES, or with a line over PROFILE_IMPORT_MAX_LINE_BYTES,
+    are refused with 413 without being buffered
+    """
+    valid: Dict[str, tuple] = {}
+    errors: List[Dict] = []
+    batch: List[tuple] = []
+    line_number = 0
+    pending = b""
+    received = 0
+
+    def line_too_long(number: int) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Line {number} is over {Config.PROFILE_IMPORT_MAX_LINE_BYTES} bytes; one profile per line"
+        )
+
+    async def add_lines(lines: List[bytes]):
+        nonlocal batch, line_number
+        for raw in lines:
+            line_number += 1
+            if len(raw) > Config.PROFILE_IMPORT_MAX_LINE_BYTES:
+                raise line_too_long(line_number)
+            if raw.strip():
+                batch.append((line_number, raw))
+        if line_number > Config.PROFILE_IMPORT_MAX_LINES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Imports are limited to {Config.PROFILE_IMPORT_MAX_LINES} lines; split the file"
+            )
+        if len(batch) >= Config.PROFILE_IMPORT_BATCH:
+            await run_in_threadpool(validate_profile_lines, batch, valid, errors)
+            batch = []
+
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > Config.PROFILE_IMPORT_MAX_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Imports are limited to {Config.PROFILE_IMPORT_MAX_BYTES} bytes; split the file"
+            )
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        await add_lines(lines)
+        # An unfinished line can't grow past the limit waiting for its newline
+        if len(pending) > Config.PROFILE_IMPORT_MAX_LINE_BYTES:
+            raise line_too_long(line_number + 1)
+    await add_lines([pending] if pending.strip() else [])
+    if batch:
+        await run_in_threadpool(validate_profile_lines, batch, valid, errors)
+
+    report = {
+        "lines": line_number,
+        "valid": len(valid),
+        "created": 0,
+        "updated": 0,
+        "error_count": len(errors),
+        "errors": errors[:MAX_IMPORT_ERRORS],
+        "written": False
+    }
+    if errors and not skip_invalid:
+        return JSONResponse(status_code=422, content=report)
+    if dry_run or not valid:
+        return report
+
+    try:
+        profiles = [profile for _, profile in valid.values()]
+        report["created"], report["updated"] = await run_in_threadpool(profile_repository.save_many, profiles)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving profiles (nothing was written): {str(e)}")
+    report["written"] = True
+    return report
+
 @app.post("/api/simulations", response_model=SimulationResponse)
-async def create_simulation(request: SimulationRequest, background_tasks: BackgroundTasks):
-    """Start a new simulation"""
+def create_simulation(request: SimulationRequest, http_request: Request):
+    """Start a new simulation (sync: profile loads and the queue insert block, so it runs in the threadpool)"""
+    if request.priority not in PRIORITIES:
+        raise HTTPException(status_code=422, detail=f"priority must be one of: {', '.join(PRIORITIES)}")
+
     try:
         # Load profiles
         profile1 = load_profile_by_id(request.profile1_id)
         profile2 = load_profile_by_id(request.profile2_id)
 
-        # Create simulation ID
-        simulation_id = f"{request.profile1_id}_{request.profile2_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
-        # Initialize status
-        simulation_status[simulation_id] = {
-            "simulation_id": simulation_id,
-            "status": "pending",
-            "profile1_id": request.profile1_id,
-            "profile2_id": request.profile2_id,
-            "profile1": profile1.name,
-            "profile2": profile2.name,
-            "compatibility_score": None,
-            "completed_days": 0,
-            "created_at": datetime.now().isoformat(),
-            "completed_at": None,
-            "error": None
-        }
+        # Create simulation ID; the suffix keeps requests for the same pair in the same second apart
+        simulation_id = (f"{request.profile1_id}_{request.profile2_id}_"
+                         f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}")
+        seed = request.seed if request.seed is not None else DatingSimulation.new_seed()
+
+        # Identical requests (same profiles, settings and pinned seed) share one run
+        dedup_key = None if request.force_new else DatingSimulation.dedup_key(
+            profile1, profile2, request.profile1_id, request.profile2_id, request.seed
+        )
+
+        # Queue the job; the profiles travel with it so any worker node can run it
+        tenant_id = request.user_id or (http_request.client.host if http_request.client else "anonymous")
+        job = job_queue.enqueue(
+            simulation_id,
+            {
+                "profile1_id": request.profile1_id,
+                "profile2_id": request.profile2_id,
+                "profile1": profile1.model_dump(mode="json"),
+                "profile2": profile2.model_dump(mode="json"),
+                "seed": seed
+            },
+            tenant_id=tenant_id,
+            priority=request.priority,
+            dedup_key=dedup_key
+        )
+        progress_broker.publish(job["simulation_id"])
 
-        # Run simulation in background
-        loop = asyncio.get_event_loop()
-        loop.run_in_executor(executor, run_simulation_sync, profile1, profile2, simulation_id)
+        if job["simulation_id"] != simulation_id:
+            return SimulationResponse(
+                simulation_id=job["simulation_id"],
+                status=job["status"],
+                message="An identical simulation is already in progress; following it instead.",
+                deduplicated=True
+            )
 
         return SimulationResponse(
             simulation_id=simulation_id,
@@ -211,113 +618,361 @@ async def create_simulation(request: SimulationRequest, background_tasks: Backgr
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting simulation: {str(e)}")
 
-@app.get("/api/simulations", response_model=List[SimulationStatus])
-def list_simulations():
-    """Get all simulations"""
-    simulations = []
-
-    # Add in-memory simulations
-    for status in simulation_status.values():
-        simulations.append(SimulationStatus(**status))
-
-    # Add simulations from disk that aren't in memory
-    if os.path.exists("simulations"):
-        for filename in os.listdir("simulations"):
-            if filename.endswith(".json"):
-                sim_id = filename[:-5]  # Remove .json extension
-
-                # Skip if already in memory
-                if sim_id in simulation_status:
-                    continue
-
-                try:
-                    with open(os.path.join("simulations", filename), 'r') as f:
-                        result = json.load(f)
-
-                    profile1_name = result.get("participants", {}).get("person1", "")
-                    profile2_name = result.get("participants", {}).get("person2", "")
-                    compatibility_score = result.get("compatibility", {}).get("score", None)
-                    completed_days = result.get("completed_days", 0)
-
-                    simulations.append(SimulationStatus(
-                        simulation_id=sim_id,
-                        status=result.get("status", "completed"),
-                        profile1_id=profile1_name.lower().replace(" ", "_"),
-                        profile2_id=profile2_name.lower().replace(" ", "_"),
-                        profile1=profile1_name,
-                        profile2=profile2_name,
-                        compatibility_score=compatibility_score,
-                        completed_days=completed_days,
-                        created_at=result.get("start_time", ""),
-                        completed_at=result.get("end_time", ""),
-                        error=result.get("error", None)
-                    ))
-                except Exception as e:
-                    print(f"Error loading simulation {filename}: {e}")
-                    continue
-
-    # Sort by created_at in descending order (most recent first)
-    simulations.sort(key=lambda x: x.created_at, reverse=True)
-
-    return simulations
+@app.post("/api/simulations/{simulation_id}/fork", response_model=SimulationResponse)
+def fork_simulation(simulation_id: str, request: ForkRequest, http_request: Request):
+    """
+    Start a what-if variant of a simulation from the end of one of its days
+    Only the remaining days run; the shared days are read from the parent
+    """
+    if request.priority not in PRIORITIES:
+        raise HTTPException(status_code=422, detail=f"priority must be one of: {', '.join(PRIORITIES)}")
+    if not 1 <= request.fork_day < Config.SIMULATION_DAYS:
+        raise HTTPException(status_code=422, detail=f"fork_day must be between 1 and {Config.SIMULATION_DAYS - 1}")
+    for name in (request.activities or {}).values():
+        if ActivityScenario.get_activity_by_name(name) is None:
+            raise HTTPException(status_code=422, detail=f"Unknown activity: {name}")
+
+    try:
+        checkpoint_store.lineage(simulation_id, request.fork_day)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=f"Cannot fork: {e}")
+
+    # Run the fork with the same profile versions the parent ran with
+    parent_job = job_queue.get(simulation_id, include_payload=True)
+    if parent_job is not None:
+        parent_payload = parent_job["payload"]
+        profile1 = UserProfile(**parent_payload["profile1"])
+        profile2 = UserProfile(**parent_payload["profile2"])
+        profile1_id, profile2_id = parent_payload["profile1_id"], parent_payload["profile2_id"]
+        parent_seed = parent_payload.get("seed")
+    else:
+        parent = simulation_store.get_meta(simulation_id)
+        if parent is None:
+            raise HTTPException(status_code=404, detail="Simulation not found")
+        profile1_id, profile2_id = parent["profile1_id"], parent["profile2_id"]
+        profile1 = load_profile_by_id(profile1_id)
+        profile2 = load_profile_by_id(profile2_id)
+        parent_seed = parent["seed"]
+
+    overrides = {}
+    if request.activities:
+        overrides["activities"] = {str(day): name for day, name in request.activities.items()}
+    if request.enable_activities is not None:
+        overrides["enable_activities"] = request.enable_activities
+    if request.model:
+        overrides["model"] = request.model
+
+    fork = {
+        "parent_simulation_id": simulation_id,
+        "fork_day": request.fork_day,
+        "overrides": overrides
+    }
+    seed = request.seed if request.seed is not None else parent_seed
+    fork_id = f"{simulation_id}_fork{request.fork_day}_{uuid.uuid4().hex[:6]}"
+    dedup_key = None if request.force_new else DatingSimulation.dedup_key(
+        profile1, profile2, profile1_id, profile2_id, seed, variant=fork
+    )
+
+    tenant_id = request.user_id or (http_request.client.host if http_request.client else "anonymous")
+    job = job_queue.enqueue(
+        fork_id,
+        {
+            "profile1_id": profile1_id,
+            "profile2_id": profile2_id,
+            "profile1": profile1.model_dump(mode="json"),
+            "profile2": profile2.model_dump(mode="json"),
+            "seed": seed,
+            "fork": fork
+        },
+        tenant_id=tenant_id,
+        priority=request.priority,
+        dedup_key=dedup_key
+    )
+    progress_broker.publish(job["simulation_id"])
+
+    return SimulationResponse(
+        simulation_id=job["simulation_id"],
+        status=job["status"],
+        message=f"Fork of {simulation_id} after day {request.fork_day} queued.",
+        deduplicated=job["simulation_id"] != fork_id
+    )
+
+@app.get("/api/simulations", response_model=Page)
+def list_simulations(
+    status: Optional[str] = None,  # One status or several, comma-separated
+    profile_id: Optional[str] = None,  # Either participant
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None  # e.g. "simulation_id,profile1,profile2,compatibility_score"
+):
+    """Get one page of simulations: queued, running and finished jobs plus saved CLI runs"""
+    check_sort(sort, order, list(SIMULATION_SORT_KEYS))
+    check_date("created_after", created_after)
+    check_date("created_before", created_before)
+    projection = parse_fields(fields, SimulationStatus.model_fields)
+    after = decode_cursor(cursor, sort, order) if cursor else None
+
+    # One extra row tells us whether there is a next page
+    rows = simulation_store.page(
+        statuses=[value.strip() for value in status.split(",")] if status else None,
+        profile_id=profile_id,
+        min_score=min_score,
+        max_score=max_score,
+        created_after=created_after,
+        created_before=created_before,
+        sort=sort,
+        descending=order == "desc",
+        after=after,
+        limit=limit + 1
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, order, rows[-1]["sort_value"], rows[-1]["simulation_id"])
+
+    return Page(
+        items=[SimulationStatus(**row).model_dump(include=projection) for row in rows],
+        next_cursor=next_cursor
+    )
 
 @app.get("/api/simulations/{simulation_id}")
-def get_simulation(simulation_id: str):
-    """Get simulation status and results"""
-    # Check in-memory first
-    if simulation_id in simulation_status:
-        status = simulation_status[simulation_id]
+def get_simulation(simulation_id: str, request: Request, response: Response):
+    """
+    Get simulation status and results
+    Send the last ETag as If-None-Match to get an empty 304 while nothing has changed
+    """
+    # Check the job queue first
+    status = get_job_status(simulation_id)
+    if status is not None:
+        status = with_queue_position(status)
+        version = str(status["version"])
+        if status["status"] == "pending" and status.get("queue_position"):
+            version += f"-q{status['queue_position']}"  # Position changes without a version bump
+        headers = validators(simulation_id, version, status.get("completed_at"))
+        if is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
 
         # If completed, return full results
-        if status["status"] == "completed" and "result" in status:
-            return {
-                **status,
-                "result": status["result"]
-            }
+        if status["status"] == "completed":
+            result = load_simulation_file(simulation_id)
+            if result is not None:
+                return {**status, "result": result}
 
         # Otherwise return status only
         return status
 
-    # If not in memory, try to load from disk
-    simulation_file = os.path.join("simulations", f"{simulation_id}.json")
-    if os.path.exists(simulation_file):
-        try:
-            with open(simulation_file, 'r') as f:
-                result = json.load(f)
-
-            # Return the loaded simulation
-            return {
-                "simulation_id": simulation_id,
-                "status": result.get("status", "completed"),
-                "profile1_id": result.get("participants", {}).get("person1", "").lower().replace(" ", "_"),
-                "profile2_id": result.get("participants", {}).get("person2", "").lower().replace(" ", "_"),
-                "created_at": result.get("start_time", ""),
-                "completed_at": result.get("end_time", ""),
-                "error": result.get("error", None),
-                "result": result
-            }
-        except Exception as e:
-            print(f"Error loading simulation from disk: {e}")
-            raise HTTPException(status_code=500, detail=f"Error loading simulation: {str(e)}")
+    # Not a queued job (e.g. run from the CLI), try the simulation store
+    saved = simulation_store.get_meta(simulation_id)
+    if saved is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+
+    version = f"{saved['status']}-{saved['completed_days']}-{saved['end_time']}"
+    headers = validators(simulation_id, hashlib.sha1(version.encode()).hexdigest()[:16], saved["end_time"])
+    if is_not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    try:
+        result = load_simulation_file(simulation_id)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"Error loading simulation: {str(e)}")
+    return {**saved_status(saved).model_dump(), "result": result}
+
+@app.get("/api/simulations/{simulation_id}/transcript")
+def get_transcript(simulation_id: str, format: str = "text"):
+    """Stream a readable transcript: format=text, markdown or html"""
+    if format not in OutputFormatter.FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of: {', '.join(OutputFormatter.FORMATS)}")
+
+    try:
+        result = load_simulation_file(simulation_id)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"Error loading simulation: {str(e)}")
+    if result is None:
+        status = get_job_status(simulation_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Simulation not found")
+        raise HTTPException(status_code=409, detail=f"Simulation is {status['status']}; no transcript yet")
+    if result.get("status", "completed") != "completed":
+        raise HTTPException(status_code=409, detail=f"Simulation is {result['status']}; no transcript yet")
+
+    media_type, _ = OutputFormatter.FORMATS[format]
+    return StreamingResponse(render_cache.stream(result, format), media_type=media_type)
+
+def stored_section(simulation_id: str, load):
+    """Run a simulation_store reader, turning a missing simulation into 404"""
+    try:
+        section = load()
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"Error loading simulation: {str(e)}")
+    if section is None:
+        if get_job_status(simulation_id) is not None:
+            return None  # Queued, nothing saved yet
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    return section
+
+@app.get("/api/simulations/{simulation_id}/days")
+def get_simulation_days(simulation_id: str, start: int = Query(1, ge=1), end: Optional[int] = Query(None, ge=1)):
+    """Transcript days start..end (inclusive; end defaults to the last saved day)"""
+    if end is not None and end < start:
+        raise HTTPException(status_code=422, detail="end must not be before start")
+    days = stored_section(simulation_id, lambda: simulation_store.load_days(simulation_id, start, end))
+    return {"simulation_id": simulation_id, "days": days or []}
+
+@app.get("/api/simulations/{simulation_id}/days/{day}")
+def get_simulation_day(simulation_id: str, day: int):
+    """One day of the transcript"""
+    days = stored_section(simulation_id, lambda: simulation_store.load_days(simulation_id, day, day))
+    if not days:
+        raise HTTPException(status_code=404, detail=f"Day {day} not found")
+    return days[0]
+
+@app.get("/api/simulations/{simulation_id}/fondness")
+def get_fondness_trajectory(simulation_id: str):
+    """Each participant's fondness after every message, day by day, without the messages"""
+    trajectory = stored_section(simulation_id, lambda: simulation_store.load_fondness(simulation_id))
+    return {"simulation_id": simulation_id, "days": trajectory or []}
+
+@app.get("/api/simulations/{simulation_id}/assessment")
+def get_simulation_assessment(simulation_id: str):
+    """Outcome only: compatibility, each twin's final assessment and date suggestions"""
+    summary = stored_section(simulation_id, lambda: simulation_store.load_summary(simulation_id)) or {}
+    status = summary.get("status") or get_simulation_status(simulation_id)["status"]
+    return {
+        "simulation_id": simulation_id,
+        "status": status,
+        "participants": summary.get("participants"),
+        "compatibility": summary.get("compatibility"),
+        "final_assessment": summary.get("final_assessment"),
+        "date_suggestions": summary.get("date_suggestions", [])
+    }
 
-    # Not found in memory or on disk
-    raise HTTPException(status_code=404, detail="Simulation not found")
+@app.get("/api/export/turns")
+def export_turns(format: str = "csv", since: Optional[str] = None, limit: int = Query(500, ge=1, le=5000)):
+    """
+    Stream one row per message (fondness, breakdown, emotion, final scores) of completed simulations
+    Pass the X-Export-Cursor header of the previous response as `since` to get only newer simulations;
+    up to `limit` simulations per response, X-Export-Complete says whether there were more
+    """
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=422, detail="format must be csv or ndjson")
+    after = decode_cursor(since, "export_seq", "asc")[0] if since else None
+    if after is not None and not isinstance(after, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Fixed before streaming starts, so the cursor covers exactly the rows sent
+    watermarks = simulation_store.completed_after(after, limit + 1)
+    complete = len(watermarks) <= limit
+    watermarks = watermarks[:limit]
+    headers = {
+        "X-Export-Cursor": encode_cursor("export_seq", "asc", *watermarks[-1]) if watermarks else (since or ""),
+        "X-Export-Simulations": str(len(watermarks)),
+        "X-Export-Complete": "true" if complete else "false"
+    }
+
+    def rows():
+        for _, simulation_id in watermarks:
+            result = simulation_store.load(simulation_id)
+            if result is not None:
+                yield from analytics_export.turn_rows(result)
+
+    if format == "csv":
+        return StreamingResponse(analytics_export.stream_csv(rows()), media_type="text/csv", headers=headers)
+    return StreamingResponse(analytics_export.stream_ndjson(rows()), media_type="application/x-ndjson", headers=headers)
+
+@app.get("/api/simulations/{simulation_id}/progress")
+async def wait_for_progress(simulation_id: str, since: int = 0, timeout: float = 25.0):
+    """
+    Long-poll for progress: returns as soon as the simulation's version is newer
+    than `since`, or after `timeout` seconds with the current (unchanged) state
+    """
+    await run_in_threadpool(get_simulation_status, simulation_id)
+
+    status = await wait_for_change(simulation_id, since, min(max(timeout, 0.0), 60.0))
+    if status is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    return await run_in_threadpool(progress_snapshot, status)
+
+@app.get("/api/simulations/{simulation_id}/events")
+async def stream_progress(simulation_id: str):
+    """Server-sent events: one `progress` event per change until the simulation finishes"""
+    await run_in_threadpool(get_simulation_status, simulation_id)
+
+    async def event_stream():
+        last_version = 0
+        while True:
+            status = await wait_for_change(simulation_id, last_version, 15.0)
+            if status is None:
+                return
+
+            if status["version"] == last_version:
+                yield ": keep-alive\n\n"
+                continue
+
+            last_version = status["version"]
+            snapshot = await run_in_threadpool(progress_snapshot, status)
+            yield f"id: {snapshot['version']}\nevent: progress\ndata: {json.dumps(snapshot)}\n\n"
+
+            if status["status"] in TERMINAL_STATUSES:
+                return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+def request_cancel(simulation_id: str, force: bool = False) -> Optional[str]:
+    """
+    Cancel a queued or running simulation (or detach from it if others are attached)
+    Jobs on an embedded worker stop at once; external workers notice within CANCEL_POLL_SECONDS
+    """
+    status = job_queue.cancel(simulation_id, force=force)
+    if status == "running" and job_queue.is_cancel_requested(simulation_id):
+        for worker in embedded_workers:
+            if worker.cancel(simulation_id):
+                break
+    if status is not None:
+        progress_broker.publish(simulation_id)
+    return status
+
+@app.post("/api/simulations/{simulation_id}/cancel")
+def cancel_simulation(simulation_id: str):
+    """Stop a simulation; it ends with status "cancelled" and no output files"""
+    status = request_cancel(simulation_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    if status in ("completed", "failed"):
+        raise HTTPException(status_code=409, detail=f"Simulation already {status}")
+
+    if status in ("pending", "running") and not job_queue.is_cancel_requested(simulation_id):
+        return {"simulation_id": simulation_id, "status": status, "message": "Detached; other requests still follow this simulation"}
+    return {"simulation_id": simulation_id, "status": status, "message": "Cancellation requested"}
 
 @app.delete("/api/simulations/{simulation_id}")
 def delete_simulation(simulation_id: str):
-    """Delete a simulation"""
-    if simulation_id not in simulation_status:
+    """Delete a simulation, cancelling it first if it is still queued or running"""
+    forks = checkpoint_store.children(simulation_id)
+    if forks:
+        raise HTTPException(status_code=409, detail=f"Delete its forks first: {', '.join(forks)}")
+
+    request_cancel(simulation_id, force=True)
+    deleted_job = job_queue.delete(simulation_id)
+    deleted_result = simulation_store.delete(simulation_id)
+    forget_simulation(simulation_id)
+    if not (deleted_job or deleted_result):
         raise HTTPException(status_code=404, detail="Simulation not found")
 
-    # Delete from memory
-    del simulation_status[simulation_id]
-
-    # Try to delete output files
-    output_dir = "src/output"
-    for ext in [".json", ".txt"]:
-        filepath = f"{output_dir}/{simulation_id}{ext}"
-        if os.path.exists(filepath):
-            os.remove(filepath)
+    SimulationWorker.remove_outputs(simulation_id)
+    checkpoint_store.delete(simulation_id)
 
     return {"message": "Simulation deleted successfully"}
 
@@ -333,8 +988,7 @@ def start_chat(request: ChatStartRequest):
         chat = UserTwinChat(profile, request.user_name)
         chat_id = chat.chat_id
 
-        # Store in memory
-        active_chats[chat_id] = chat
+        chat_sessions.add(chat)
 
         return {
             "chat_id": chat_id,
@@ -349,34 +1003,67 @@ def start_chat(request: ChatStartRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting chat: {str(e)}")
 
-@app.post("/api/chats/{chat_id}/message", response_model=ChatMessageResponse)
-def send_message(chat_id: str, request: ChatMessageRequest):
-    """Send a message to the twin"""
-    if chat_id not in active_chats:
-        raise HTTPException(status_code=404, detail="Chat not found")
+async def reply_to_message(
+    chat_id: str,
+    message: str,
+    context: str = "texting",
+    message_id: Optional[str] = None,
+    stream: bool = False
+) -> Dict:
+    """
+    Answer one message, after any sent to the chat before it, and push the reply to the
+    chat's WebSocket subscribers (token by token if `stream`)
+    """
+    async with chat_sessions.use_async(chat_id) as chat:
+        if chat is None:
+            raise HTTPException(status_code=404, detail="Chat not found")
+        chat_channels.publish(chat_id, {"type": "reply_start", "id": message_id, "user_message": message})
+
+        async def on_text(text: str):
+            chat_channels.publish(chat_id, {"type": "token", "id": message_id, "text": text})
 
-    try:
-        chat = active_chats[chat_id]
-        exchange = chat.send_message(request.message, request.context)
-
-        return ChatMessageResponse(
-            message=exchange["twin_response"]["message"],
-            emotion=exchange["twin_response"]["emotion"],
-            internal_thought=exchange["twin_response"]["internal_thought"],
-            fondness_change=exchange["twin_response"]["fondness_change"],
-            fondness_level=exchange["twin_response"]["fondness_level"]
-        )
+        try:
+            exchange = await chat.send_message_async(message, context, on_text=on_text if stream else None)
+            await asyncio.to_thread(chat_sessions.append, chat)
+        except Exception as e:
+            chat_channels.publish(chat_id, {"type": "error", "id": message_id, "detail": f"Error sending message: {str(e)}"})
+            raise HTTPException(status_code=500, detail=f"Error sending message: {str(e)}")
+
+        # Published before the next message's turn starts, so frames stay in message order
+        reply = exchange["twin_response"]
+        chat_channels.publish(chat_id, {"type": "reply", "id": message_id, **reply})
+        chat_channels.publish(chat_id, {
+            "type": "fondness",
+            "fondness_level": reply["fondness_level"],
+            "fondness_change": reply["fondness_change"],
+            "emotion": reply["emotion"]
+        })
+    return exchange
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error sending message: {str(e)}")
+@app.post("/api/chats/{chat_id}/message", response_model=ChatMessageResponse)
+async def send_message(chat_id: str, request: ChatMessageRequest):
+    """
+    Send a message to the twin
+    Runs on the event loop, so waiting for the LLM doesn't hold a worker thread; messages
+    to the same chat are answered one at a time, in the order they arrived
+    """
+    exchange = await reply_to_message(chat_id, request.message, request.context)
+
+    return ChatMessageResponse(
+        message=exchange["twin_response"]["message"],
+        emotion=exchange["twin_response"]["emotion"],
+        internal_thought=exchange["twin_response"]["internal_thought"],
+        fondness_change=exchange["twin_response"]["fondness_change"],
+        fondness_level=exchange["twin_response"]["fondness_level"]
+    )
 
 @app.get("/api/chats/{chat_id}/history")
 def get_chat_history(chat_id: str):
     """Get the full conversation history"""
-    if chat_id not in active_chats:
+    chat = chat_sessions.get(chat_id)
+    if chat is None:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    chat = active_chats[chat_id]
     return {
         "chat_id": chat_id,
         "profile_name": chat.profile.name,
@@ -388,10 +1075,10 @@ def get_chat_history(chat_id: str):
 @app.get("/api/chats/{chat_id}/fondness")
 def get_fondness_history(chat_id: str):
     """Get the fondness history"""
-    if chat_id not in active_chats:
+    chat = chat_sessions.get(chat_id)
+    if chat is None:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    chat = active_chats[chat_id]
     return {
         "chat_id": chat_id,
         "current_fondness": chat.get_current_fondness(),
@@ -399,17 +1086,16 @@ def get_fondness_history(chat_id: str):
     }
 
 @app.delete("/api/chats/{chat_id}")
-def end_chat(chat_id: str):
-    """End a chat session"""
-    if chat_id not in active_chats:
-        raise HTTPException(status_code=404, detail="Chat not found")
-
-    # Save chat before deleting
-    chat = active_chats[chat_id]
-    filepath = chat.save_chat()
+async def end_chat(chat_id: str):
+    """End a chat session (after any messages already sent to it are answered)"""
+    async with chat_sessions.use_async(chat_id) as chat:
+        if chat is None:
+            raise HTTPException(status_code=404, detail="Chat not found")
 
-    # Delete from memory
-    del active_chats[chat_id]
+        # Save before the log is deleted, so a failed save leaves the chat open
+        filepath = await asyncio.to_thread(chat.save_chat)
+        await asyncio.to_thread(chat_sessions.remove, chat_id)
+        chat_channels.close(chat_id, {"type": "ended", "final_fondness": chat.get_current_fondness()})
 
     return {
         "message": "Chat ended successfully",
@@ -417,28 +1103,142 @@ def end_chat(chat_id: str):
         "final_fondness": chat.get_current_fondness()
     }
 
+@app.websocket("/api/chats/{chat_id}/ws")
+async def chat_socket(websocket: WebSocket, chat_id: str, stream: Optional[str] = None, last_seq: Optional[int] = None):
+    """
+    Live chat over one connection
+    Send {"type": "message", "message": "...", "context": "texting", "id": "<your id>"}.
+    Every message to this chat, from any client, produces numbered frames: reply_start,
+    token (pieces of the reply as it is generated), reply, fondness, or error; "ended"
+    when the chat is closed. After reconnecting, pass the hello frame's `stream` and the
+    last `seq` seen to receive the frames missed meanwhile, except tokens (the reply frame
+    has the whole text); "resumed": false in the new hello means reload the history instead. An unnumbered ping is sent every
+    CHAT_WS_HEARTBEAT_SECONDS; send anything (e.g. {"type": "pong"}) to stay connected.
+    """
+    await websocket.accept()
+    if chat_id not in chat_sessions:
+        await websocket.close(code=4404, reason="Chat not found")
+        return
+
+    subscription, hello, replay = chat_channels.subscribe(chat_id, stream, last_seq)
+    heartbeat = Config.CHAT_WS_HEARTBEAT_SECONDS
+    last_heard = time.monotonic()
+
+    async def answer(message: str, context: str, message_id):
+        try:
+            await reply_to_message(chat_id, message, context, message_id, stream=True)
+        except HTTPException:
+            pass  # Already sent as an error frame, or the chat has ended
+
+    async def receive():
+        nonlocal last_heard
+        while True:
+            try:
+                frame = await websocket.receive_json()
+            except ValueError:
+                subscription.push({"type": "error", "detail": "Frames must be JSON"})
+                continue
+            last_heard = time.monotonic()
+            if not isinstance(frame, dict) or frame.get("type") != "message":
+                continue
+            message = frame.get("message")
+            if not isinstance(message, str) or not message.strip():
+                subscription.push({"type": "error", "id": frame.get("id"), "detail": "message must be a non-empty string"})
+                continue
+            task = asyncio.create_task(answer(message, frame.get("context") or "texting", frame.get("id")))
+            chat_reply_tasks.add(task)
+            task.add_done_callback(chat_reply_tasks.discard)
+
+    async def send():
+        await websocket.send_json(hello)
+        for frame in replay:
+            await websocket.send_json(frame)
+        last_type = None
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                if time.monotonic() - last_heard > 2 * heartbeat:
+                    await websocket.close(code=1001, reason="No heartbeat")
+                    return
+                await websocket.send_json({"type": "ping"})
+                continue
+            if frame is None:
+                if last_type == "ended":
+                    await websocket.close(code=1000, reason="Chat ended")
+                else:
+                    await websocket.close(code=1013, reason="Too far behind; reconnect to resume")
+                return
+            await websocket.send_json(frame)
+            last_type = frame["type"]
+
+    # Replies keep running (and are kept for resume) if the client drops mid-stream
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                print(f"⚠️  Chat socket error ({chat_id}): {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        chat_channels.unsubscribe(chat_id, subscription)
+
 @app.get("/api/chats")
 def list_chats():
     """Get all active chats"""
-    return [
-        {
-            "chat_id": chat_id,
-            "profile_name": chat.profile.name,
-            "message_count": len(chat.conversation),
-            "current_fondness": chat.get_current_fondness()
-        }
-        for chat_id, chat in active_chats.items()
-    ]
+    return chat_sessions.list()
+
+def process_rss_bytes() -> Optional[int]:
+    """Current resident memory of this process (Linux), or the peak elsewhere"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+def memory_usage() -> Dict:
+    """What this API process holds in memory, for sizing instances"""
+    return {
+        "rss_bytes": process_rss_bytes(),
+        "status_cache": status_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "progress_keys": progress_broker.size(),
+        "chats": chat_sessions.stats(),
+        "chat_channels": chat_channels.stats()
+    }
 
 # For development/debugging
+@app.get("/api/debug/memory")
+def debug_memory():
+    """Memory held by caches and sessions in this process"""
+    return memory_usage()
+
+@app.get("/api/debug/traffic")
+def debug_traffic():
+    """Response bytes before and after compression, and what 304s saved"""
+    return traffic_stats.stats()
+
 @app.get("/api/debug/status")
 def debug_status():
     """Get server status and configuration"""
     import os
+    job_counts = job_queue.count_by_status()
     return {
-        "profiles_count": len(UserProfile.load_all("profiles")),
-        "simulations_count": len(simulation_status),
-        "active_simulations": sum(1 for s in simulation_status.values() if s["status"] == "running"),
+        "profiles_count": profile_repository.count(),
+        "profile_cache": profile_repository.stats(),
+        "render_cache": render_cache.stats(),
+        "memory": memory_usage(),
+        "simulations_count": sum(job_counts.values()),
+        "active_simulations": job_counts.get("running", 0),
+        "queued_simulations": job_counts.get("pending", 0),
         "working_directory": os.getcwd(),
         "env_vars_set": {
             "OPENROUTER_API_KEY": "SET" if os.getenv("OPENROUTER_API_KEY") else "NOT SET",
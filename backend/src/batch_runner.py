@@ -0,0 +1,290 @@
+"""
+Concurrent batch runner for the CLI batch mode
+Runs a batch's simulations on a small thread pool under one shared
+tokens-per-minute budget, retries rate-limited simulations with backoff, and
+keeps a manifest on disk so an interrupted batch resumes where it stopped.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+import os
+import threading
+import time
+
+from openai import RateLimitError
+
+from config import Config
+from profile import UserProfile
+from simulator import DatingSimulation
+from cancellation import CancellationToken, SimulationCancelled
+from token_budget import TokenBudget
+from output_formatter import OutputFormatter
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return isinstance(error, RateLimitError) or "rate_limit" in message or "429" in message
+
+
+class BatchManifest:
+    """A batch's plan and per-simulation outcome, saved after every change"""
+
+    def __init__(self, path: str, data: Dict):
+        self.path = path
+        self.data = data
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path_for(batch_id: str) -> str:
+        return os.path.join(Config.BATCHES_DIR, f"{batch_id}.json")
+
+    @classmethod
+    def create(cls, batch_id: str, seed: int, pairs: List, seeds: List[int]) -> 'BatchManifest':
+        manifest = cls(cls.path_for(batch_id), {
+            "batch_id": batch_id,
+            "seed": seed,
+            "created_at": datetime.now().isoformat(),
+            "items": [
+                {
+                    "index": i,
+                    "profile1": profile1.name,
+                    "profile2": profile2.name,
+                    "seed": simulation_seed,
+                    "status": "pending",
+                    "attempts": 0,
+                    "simulation_id": None,
+                    "compatibility_score": None,
+                    "tokens": 0,
+                    "error": None
+                }
+                for i, ((profile1, profile2), simulation_seed) in enumerate(zip(pairs, seeds))
+            ]
+        })
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, batch_id: str) -> 'BatchManifest':
+        path = cls.path_for(batch_id)
+        if not os.path.exists(path):
+            raise ValueError(f"No batch manifest at {path}")
+        with open(path, 'r') as f:
+            return cls(path, json.load(f))
+
+    @property
+    def batch_id(self) -> str:
+        return self.data["batch_id"]
+
+    @property
+    def items(self) -> List[Dict]:
+        return self.data["items"]
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def update(self, item: Dict, **fields):
+        with self._lock:
+            item.update(fields)
+        self.save()
+
+    def unfinished(self) -> List[Dict]:
+        """Items still to run (anything interrupted mid-run counts as pending again)"""
+        return [item for item in self.items if item["status"] in ("pending", "running")]
+
+
+class BatchStats:
+    """Live throughput numbers for a running batch"""
+
+    def __init__(self, total: int, already_done: int, budget: Optional[TokenBudget]):
+        self.total = total
+        self.budget = budget
+        self.started = time.time()
+        self.completed = already_done
+        self.completed_this_run = 0
+        self.failed = 0
+        self.retries = 0
+        self.running = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def line(self) -> str:
+        elapsed = max(1.0, time.time() - self.started)
+        finished = self.completed_this_run + self.failed
+        failure_rate = self.failed / finished * 100 if finished else 0.0
+        if self.budget:
+            tokens_per_minute = f"{self.budget.tokens_last_minute():,}/{self.budget.tokens_per_minute:,} tokens/min"
+        else:
+            tokens_per_minute = f"{self.tokens / elapsed * 60:,.0f} tokens/min"
+        return (
+            f"📈 {self.completed}/{self.total} done · {self.running} running · "
+            f"{self.completed_this_run / elapsed * 3600:.1f} sims/hour · {tokens_per_minute} · "
+            f"{self.failed} failed ({failure_rate:.0f}%) · {self.retries} retries"
+        )
+
+
+class BatchRunner:
+    """Runs the unfinished items of a manifest concurrently"""
+
+    def __init__(
+        self,
+        manifest: BatchManifest,
+        profiles: List[UserProfile],
+        concurrency: int = 3,
+        tokens_per_minute: int = 0,
+        max_attempts: int = 3
+    ):
+        self.manifest = manifest
+        self.profiles = {profile.name: profile for profile in profiles}
+        self.concurrency = max(1, concurrency)
+        self.budget = TokenBudget(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_attempts = max_attempts
+
+        self.stopping = threading.Event()
+        self.cancel_tokens: Dict[int, CancellationToken] = {}  # Running items, for Ctrl+C
+        done = sum(1 for item in manifest.items if item["status"] == "completed")
+        self.stats = BatchStats(len(manifest.items), done, self.budget)
+
+    def run(self) -> List[Dict]:
+        """Run until every item finished or the user interrupts; returns the completed items"""
+        pending = self.manifest.unfinished()
+        budget = f"{self.budget.tokens_per_minute:,} tokens/min" if self.budget else "no token budget"
+        print(f"\n🚀 Batch {self.manifest.batch_id}: {len(pending)} to run, "
+              f"concurrency {self.concurrency}, {budget}")
+
+        reporter = threading.Thread(target=self._report_loop, daemon=True)
+        reporter.start()
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch")
+        futures = {executor.submit(self._run_item, item) for item in pending}
+        try:
+            while futures:
+                finished, futures = wait(futures, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping batch - cancelling running simulations...")
+            self.stopping.set()
+            for token in list(self.cancel_tokens.values()):
+                token.cancel("Batch interrupted")
+            executor.shutdown(wait=True, cancel_futures=True)
+            print(f"💾 Progress saved. Resume with: python src/main.py batch --resume {self.manifest.batch_id}")
+        finally:
+            self.stopping.set()
+            executor.shutdown(wait=True)
+
+        print(self.stats.line())
+        return [item for item in self.manifest.items if item["status"] == "completed"]
+
+    def _report_loop(self):
+        while not self.stopping.wait(Config.BATCH_STATS_SECONDS):
+            print(self.stats.line())
+
+    def _run_item(self, item: Dict):
+        profile1 = self.profiles.get(item["profile1"])
+        profile2 = self.profiles.get(item["profile2"])
+        if profile1 is None or profile2 is None:
+            self.manifest.update(item, status="failed", error="Profile no longer exists")
+            self.stats.record(failed=1)
+            return
+
+        while not self.stopping.is_set():
+            token = CancellationToken()
+            self.cancel_tokens[item["index"]] = token
+            self.manifest.update(item, status="running", attempts=item["attempts"] + 1)
+            self.stats.record(running=1)
+
+            simulation = None
+            try:
+                simulation = self._build_simulation(item, profile1, profile2, token)
+                self.manifest.update(item, simulation_id=simulation.simulation_id)
+                result = simulation.run_simulation()
+
+                if result.get("parent_simulation_id"):
+                    result = DatingSimulation.load_result(simulation.simulation_id) or result
+                os.makedirs("output", exist_ok=True)
+                OutputFormatter.save_formatted_output(result, f"output/{simulation.simulation_id}.txt")
+
+                self.manifest.update(
+                    item,
+                    status="completed",
+                    compatibility_score=result["compatibility"]["score"],
+                    tokens=item["tokens"] + simulation.llm.total_tokens,
+                    error=None
+                )
+                self.stats.record(completed=1, completed_this_run=1, tokens=simulation.llm.total_tokens)
+                print(f"✅ [{item['index'] + 1}/{len(self.manifest.items)}] {profile1.name} & {profile2.name}: "
+                      f"{result['compatibility']['rating']} ({result['compatibility']['score']:.0f})")
+                return
+
+            except SimulationCancelled:
+                # Keep the finished days so the resumed batch continues from them
+                if simulation is not None and simulation.result:
+                    simulation.save_simulation(simulation.result, force=True)
+                spent = simulation.llm.total_tokens if simulation else 0
+                self.manifest.update(item, status="pending", tokens=item["tokens"] + spent)
+                return
+
+            except Exception as e:
+                spent = simulation.llm.total_tokens if simulation else 0
+                self.stats.record(tokens=spent)
+
+                if is_rate_limit_error(e) and item["attempts"] < self.max_attempts:
+                    backoff = Config.BATCH_RATE_LIMIT_BACKOFF * 2 ** (item["attempts"] - 1)
+                    print(f"⏳ Rate limited on {profile1.name} & {profile2.name}; "
+                          f"pausing new requests for {backoff}s (attempt {item['attempts']}/{self.max_attempts})")
+                    if self.budget:
+                        self.budget.pause(backoff)
+                    else:
+                        self.stopping.wait(backoff)
+                    self.manifest.update(item, status="pending", tokens=item["tokens"] + spent, error=str(e))
+                    self.stats.record(retries=1)
+                    continue
+
+                print(f"❌ {profile1.name} & {profile2.name} failed: {e}")
+                self.manifest.update(item, status="failed", tokens=item["tokens"] + spent, error=str(e))
+                self.stats.record(failed=1)
+                return
+
+            finally:
+                self.cancel_tokens.pop(item["index"], None)
+                self.stats.record(running=-1)
+                if item["status"] != "running":
+                    print(self.stats.line())
+
+    def _build_simulation(
+        self,
+        item: Dict,
+        profile1: UserProfile,
+        profile2: UserProfile,
+        token: CancellationToken
+    ) -> DatingSimulation:
+        """New simulation, or a continuation of the days an earlier attempt already finished"""
+        options = dict(cancel_token=token, token_budget=self.budget)
+
+        previous_id = item.get("simulation_id")
+        previous = DatingSimulation.load_result(previous_id) if previous_id else None
+        resume_day = len(previous["days"]) if previous and previous.get("status") != "completed" else 0
+
+        if 1 <= resume_day < Config.SIMULATION_DAYS:
+            try:
+                simulation = DatingSimulation.fork(
+                    previous_id, resume_day, profile1, profile2, seed=item["seed"], **options
+                )
+                print(f"↪️  Resuming {profile1.name} & {profile2.name} after day {resume_day}")
+                return simulation
+            except ValueError as e:
+                print(f"⚠️  Can't resume {previous_id} ({e}); starting over")
+
+        return DatingSimulation(profile1, profile2, seed=item["seed"], **options)
@@ -0,0 +1,90 @@
+"""
+Bounded in-memory cache
+LRU cache with a cap on entries and on approximate size in bytes, plus a
+time-to-live, so a long-running API process keeps recently used items hot
+without growing with every simulation ever run. Evicted items are simply
+re-read from SQLite on their next use.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import threading
+import time
+
+
+class BoundedCache:
+    """Thread-safe LRU cache bounded by entry count, total size and age"""
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int = 0,
+        ttl_seconds: float = 0,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # 0 = no size limit
+        self.ttl_seconds = ttl_seconds  # 0 = never expires
+        self.sizeof = sizeof or (lambda value: 0)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()  # key -> (value, size, stored_at)
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl_seconds and time.monotonic() - entry[2] > self.ttl_seconds:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any):
+        size = self.sizeof(value)
+        if self.max_bytes and size > self.max_bytes:
+            return  # Larger than the whole cache; not worth evicting everything for
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
@@ -0,0 +1,33 @@
+"""
+Cooperative cancellation for long-running simulations
+A token is shared by the simulation, its LLM client and whoever may cancel it;
+work checks it between steps, and the LLM client aborts a request in flight
+"""
+
+import threading
+
+
+class SimulationCancelled(Exception):
+    """Raised inside a simulation once its token has been cancelled"""
+
+
+class CancellationToken:
+    """Thread-safe cancel flag"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = ""
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Cancelled"):
+        """Cancel (idempotent; the first reason wins)"""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise SimulationCancelled(self.reason)
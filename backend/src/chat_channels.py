@@ -0,0 +1,151 @@
+"""
+Server push for open chats
+A chat gets a channel of numbered frames once a WebSocket subscribes to it:
+reply tokens, finished replies, fondness updates. Connected WebSockets
+receive each frame as it is published, and the most recent `replay_frames`
+are kept, so a client that reconnects with the last sequence number it saw
+gets what it missed. Token frames are sent live but not kept: the `reply`
+frame that follows carries the whole text, so a reply of any length costs
+two frames of replay (reply_start and reply).
+A channel's `stream` id changes whenever its numbering starts over (the chat
+was reopened after eviction, or the server restarted); resuming from another
+stream is refused and the client reloads the history instead.
+Used from the event loop only.
+"""
+
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import uuid
+
+# A subscriber this far behind is disconnected (it can reconnect and resume)
+_MAX_QUEUED_FRAMES = 1000
+
+# Frames sent to connected clients but not kept for replay
+_LIVE_ONLY_FRAMES = {"token"}
+
+
+class Subscription:
+    """One connected client: frames to send, or None once it must disconnect"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(_MAX_QUEUED_FRAMES)
+
+    def push(self, frame: Optional[Dict]) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop what's queued and tell the sender to disconnect
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+
+class _Channel:
+    def __init__(self, replay_frames: int):
+        self.stream = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.dropped_seq = 0  # Newest kept frame that has since fallen out of `frames`
+        self.frames: Deque[Dict] = deque(maxlen=replay_frames)
+        self.subscriptions: Set[Subscription] = set()
+
+
+class ChatChannels:
+    """Frame logs and subscribers per chat; channels without subscribers are dropped LRU"""
+
+    def __init__(self, replay_frames: int = 500, max_channels: int = 1000):
+        self.replay_frames = replay_frames
+        self.max_channels = max_channels
+        self._channels: "OrderedDict[str, _Channel]" = OrderedDict()  # Least recently used first
+        self.frames_published = 0
+        self.resumes = 0
+        self.resyncs = 0
+
+    def _channel(self, chat_id: str) -> _Channel:
+        """The chat's channel, created on first subscribe"""
+        channel = self._channels.get(chat_id)
+        if channel is None:
+            self._evict()
+            channel = self._channels[chat_id] = _Channel(self.replay_frames)
+        self._channels.move_to_end(chat_id)
+        return channel
+
+    def _evict(self):
+        """Make room for one more channel by dropping unsubscribed ones, least recently used first"""
+        excess = len(self._channels) + 1 - self.max_channels
+        for chat_id in [chat_id for chat_id, channel in self._channels.items() if not channel.subscriptions][:max(excess, 0)]:
+            del self._channels[chat_id]
+
+    def publish(self, chat_id: str, frame: Dict) -> Optional[Dict]:
+        """
+        Number a frame, keep it for replay and send it to every subscriber
+        Chats no socket has subscribed to (REST-only) have no channel; returns None for them
+        """
+        channel = self._channels.get(chat_id)
+        if channel is None:
+            return None
+        self._channels.move_to_end(chat_id)
+        channel.seq += 1
+        frame = {"seq": channel.seq, **frame}
+        if frame["type"] not in _LIVE_ONLY_FRAMES:
+            if len(channel.frames) == channel.frames.maxlen:
+                channel.dropped_seq = channel.frames[0]["seq"] if channel.frames else frame["seq"]
+            channel.frames.append(frame)
+        self.frames_published += 1
+        for subscription in list(channel.subscriptions):
+            if not subscription.push(frame):
+                channel.subscriptions.discard(subscription)
+        return frame
+
+    def subscribe(
+        self,
+        chat_id: str,
+        stream: Optional[str] = None,
+        last_seq: Optional[int] = None
+    ) -> Tuple[Subscription, Dict, List[Dict]]:
+        """
+        Start receiving a chat's frames
+        Returns (subscription, hello frame, frames to replay first). The hello frame has
+        "resumed": false when the frames after last_seq are no longer all available.
+        """
+        channel = self._channel(chat_id)
+        subscription = Subscription()
+        channel.subscriptions.add(subscription)
+
+        replay = []
+        resumed = False
+        if stream is not None and last_seq is not None:
+            if stream == channel.stream and channel.dropped_seq <= last_seq <= channel.seq:
+                replay = [frame for frame in channel.frames if frame["seq"] > last_seq]
+                resumed = True
+                self.resumes += 1
+            else:
+                self.resyncs += 1
+
+        hello = {"type": "hello", "stream": channel.stream, "seq": channel.seq, "resumed": resumed}
+        return subscription, hello, replay
+
+    def unsubscribe(self, chat_id: str, subscription: Subscription):
+        channel = self._channels.get(chat_id)
+        if channel is not None:
+            channel.subscriptions.discard(subscription)
+
+    def close(self, chat_id: str, frame: Optional[Dict] = None):
+        """Send a last frame (e.g. the chat ended), disconnect everyone and drop the channel"""
+        if frame is not None:
+            self.publish(chat_id, frame)
+        channel = self._channels.pop(chat_id, None)
+        if channel is not None:
+            for subscription in channel.subscriptions:
+                subscription.push(None)
+
+    def stats(self) -> Dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(channel.subscriptions) for channel in self._channels.values()),
+            "frames_published": self.frames_published,
+            "resumes": self.resumes,
+            "resyncs": self.resyncs
+        }
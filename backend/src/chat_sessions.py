@@ -0,0 +1,374 @@
+"""
+Chat session manager
+Every open chat has an append-only log, <directory>/<chat_id>.jsonl: a
+snapshot of the whole chat (conversation, fondness, emotion and history
+entries, memory) on the first line, then one line per exchange holding the
+message and what changed in the twin. Each message appends one short line
+instead of rewriting the chat, and every `compact_every` exchanges the log is
+rewritten as a single snapshot so replaying it stays cheap.
+
+Because the log is always current, memory can be freed at any time: a chat
+idle for `idle_seconds`, or the least recently used one once more than
+`max_resident` are loaded, is simply dropped and rebuilt from its log on the
+next request. On startup every log is indexed, so chats survive a restart or
+a crash; a half-written last line is discarded.
+"""
+
+from contextlib import asynccontextmanager, contextmanager
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+
+from user_chat import UserTwinChat
+import transcript_codec
+
+
+def replay(lines: List[bytes]) -> Tuple[Dict, int, bool]:
+    """
+    Rebuild a chat's to_state() dict from its log lines
+    Returns (state, lines appended since the snapshot, whether the last line was torn)
+    """
+    state = transcript_codec.loads(lines[0])["state"]
+    appended = 0
+    torn = False
+    for i, line in enumerate(lines[1:], start=1):
+        try:
+            record = transcript_codec.loads(line)
+        except ValueError:
+            if i == len(lines) - 1:
+                torn = True  # Crashed mid-write; the exchange never completed
+                break
+            raise
+
+        state["conversation"].extend(record["exchanges"])
+        twin, delta = state["twin"], record["twin"]
+        twin["history"].extend(delta["history"])
+        twin["emotions"].extend(delta["emotions"])
+        twin["fondness_level"] = delta["fondness_level"]
+        twin["current_emotion"] = delta["current_emotion"]
+        twin["memory"] = delta["memory"]
+        if delta["prompt_tokens"]:
+            state["prompt_tokens_by_day"][str(record["day"])] = delta["prompt_tokens"]
+        appended += 1
+    return state, appended, torn
+
+
+class ChatSessionManager:
+    """Resident chats in LRU order plus an index of the ones only on disk"""
+
+    def __init__(
+        self,
+        directory: str = "chats/sessions",
+        idle_seconds: float = 900,
+        max_resident: int = 200,
+        compact_every: int = 50,
+        fsync: bool = False
+    ):
+        self.directory = directory
+        self.idle_seconds = idle_seconds  # 0 = only unload when over max_resident
+        self.max_resident = max_resident
+        self.compact_every = compact_every
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._resident: "OrderedDict[str, UserTwinChat]" = OrderedDict()  # Least recently used first
+        self._last_used: Dict[str, float] = {}
+        self._in_use: Dict[str, int] = {}
+        self._turns: Dict[str, List] = {}  # chat_id -> [asyncio.Lock, holders + waiters] (use_async)
+        self._logged: Dict[str, Tuple[int, int, int]] = {}  # chat_id -> (exchanges, history, emotions) in the log
+        self._appended: Dict[str, int] = {}  # chat_id -> log lines since the last snapshot
+        self._unloaded: Dict[str, Dict] = {}  # chat_id -> summary for list()
+        self._log_locks: Dict[str, threading.Lock] = {}  # chat_id -> held while writing its log
+
+        self.unloads = 0
+        self.rehydrations = 0
+        self.compactions = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._recover()
+
+    def _path(self, chat_id: str) -> str:
+        return os.path.join(self.directory, f"{chat_id}.jsonl")
+
+    def _read_log(self, chat_id: str) -> Tuple[Dict, int, bool]:
+        with open(self._path(chat_id), 'rb') as f:
+            return replay(f.read().splitlines())
+
+    def _recover(self):
+        """Index the chats left open by a previous run, without building any twins"""
+        started = time.perf_counter()
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".jsonl"):
+                continue
+            chat_id = filename[:-6]
+            try:
+                state, appended, torn = self._read_log(chat_id)
+            except Exception as e:
+                print(f"⚠️  Skipping chat log {filename}: {e}")
+                continue
+            if torn:
+                self._write_snapshot(chat_id, state)
+                appended = 0
+            self._appended[chat_id] = appended
+            self._unloaded[chat_id] = self._summary(state)
+
+        if self._unloaded:
+            print(f"💬 Recovered {len(self._unloaded)} open chat(s) from {self.directory} "
+                  f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    @staticmethod
+    def _summary(state: Dict) -> Dict:
+        return {
+            "profile_name": state["profile"]["name"],
+            "message_count": len(state["conversation"]),
+            "current_fondness": state["twin"]["fondness_level"]
+        }
+
+    def _write_snapshot(self, chat_id: str, state: Dict):
+        """Replace the chat's log with a single snapshot line"""
+        path = self._path(chat_id)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(transcript_codec.dumps({"state": state}) + b"\n")
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        self._appended[chat_id] = 0
+
+    def _log_lock(self, chat_id: str) -> threading.Lock:
+        """The chat's log lock; take it before self._lock, never while holding it"""
+        with self._lock:
+            return self._log_locks.setdefault(chat_id, threading.Lock())
+
+    def _mark_logged(self, chat: UserTwinChat):
+        self._logged[chat.chat_id] = (
+            len(chat.conversation),
+            len(chat.twin.conversation_history),
+            len(chat.twin.emotional_state.history)
+        )
+
+    def add(self, chat: UserTwinChat):
+        """Register a new chat and write its first snapshot (never over another chat's log)"""
+        with self._lock:
+            if chat.chat_id in self._resident or chat.chat_id in self._unloaded or os.path.exists(self._path(chat.chat_id)):
+                raise ValueError(f"Chat {chat.chat_id} already exists")
+            self._write_snapshot(chat.chat_id, chat.to_state())
+            self._mark_logged(chat)
+            self._resident[chat.chat_id] = chat
+            self._last_used[chat.chat_id] = time.monotonic()
+            unloaded = self._enforce_limit()
+        self._compact_unloaded(unloaded)
+
+    def append(self, chat: UserTwinChat):
+        """Log the exchanges sent since the last call (normally one), compacting when due"""
+        with self._log_lock(chat.chat_id), self._lock:
+            exchanges, history, emotions = self._logged[chat.chat_id]
+            if exchanges == len(chat.conversation):
+                return
+
+            if self._appended[chat.chat_id] + 1 >= self.compact_every:
+                self._write_snapshot(chat.chat_id, chat.to_state())
+                self._mark_logged(chat)
+                self.compactions += 1
+                return
+
+            day = (len(chat.conversation) - 1) // 10 + 1  # Same estimate send_message uses
+            record = {
+                "exchanges": chat.conversation[exchanges:],
+                "day": day,
+                "twin": chat.twin.checkpoint_delta(day, history, emotions)
+            }
+
+            with open(self._path(chat.chat_id), 'ab') as f:
+                f.write(transcript_codec.dumps(record) + b"\n")
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._appended[chat.chat_id] += 1
+            self._mark_logged(chat)
+
+    def __contains__(self, chat_id: str) -> bool:
+        with self._lock:
+            return chat_id in self._resident or chat_id in self._unloaded
+
+    def get(self, chat_id: str) -> Optional[UserTwinChat]:
+        """The chat, rebuilding it from its log if it isn't in memory"""
+        with self._lock:
+            chat = self._resident.get(chat_id)
+            if chat is None:
+                if chat_id not in self._unloaded:
+                    return None
+                chat = self._rehydrate(chat_id)
+            self._resident.move_to_end(chat_id)
+            self._last_used[chat_id] = time.monotonic()
+            unloaded = self._enforce_limit()
+        self._compact_unloaded(unloaded)
+        return chat
+
+    @contextmanager
+    def use(self, chat_id: str) -> Iterator[Optional[UserTwinChat]]:
+        """get() that keeps the chat resident until the block exits (e.g. during an LLM call)"""
+        self._pin(chat_id)
+        try:
+            yield self.get(chat_id)
+        finally:
+            self._unpin(chat_id)
+
+    @asynccontextmanager
+    async def use_async(self, chat_id: str) -> AsyncIterator[Optional[UserTwinChat]]:
+        """
+        use() for async handlers, holding the chat's turn for the whole block
+        Requests for one chat run one at a time in arrival order (asyncio.Lock is
+        FIFO), so a message never sees the twin halfway through the previous
+        reply; different chats don't wait for each other
+        """
+        with self._lock:
+            turn = self._turns.setdefault(chat_id, [asyncio.Lock(), 0])
+            turn[1] += 1
+        try:
+            async with turn[0]:
+                self._pin(chat_id)
+                try:
+                    # Rehydrating reads the log and rebuilds the twin; keep it off the event loop
+                    yield await asyncio.to_thread(self.get, chat_id)
+                finally:
+                    self._unpin(chat_id)
+        finally:
+            with self._lock:
+                turn[1] -= 1
+                if not turn[1]:
+                    del self._turns[chat_id]
+
+    def _pin(self, chat_id: str):
+        with self._lock:
+            self._in_use[chat_id] = self._in_use.get(chat_id, 0) + 1
+
+    def _unpin(self, chat_id: str):
+        with self._lock:
+            self._in_use[chat_id] -= 1
+            if not self._in_use[chat_id]:
+                del self._in_use[chat_id]
+            if chat_id in self._last_used:
+                self._last_used[chat_id] = time.monotonic()
+
+    def remove(self, chat_id: str) -> Optional[UserTwinChat]:
+        """Take a chat out of the manager (rebuilding it if needed) and delete its log"""
+        chat = self.get(chat_id)
+        if chat is None:
+            return None
+        with self._log_lock(chat_id), self._lock:
+            self._resident.pop(chat_id, None)
+            self._last_used.pop(chat_id, None)
+            self._logged.pop(chat_id, None)
+            self._appended.pop(chat_id, None)
+            self._log_locks.pop(chat_id, None)
+            if os.path.exists(self._path(chat_id)):
+                os.remove(self._path(chat_id))
+        chat.close()
+        return chat
+
+    def list(self) -> List[Dict]:
+        """Summaries of every open chat, resident or not, without loading any"""
+        with self._lock:
+            chats = [
+                {
+                    "chat_id": chat_id,
+                    "profile_name": chat.profile.name,
+                    "message_count": len(chat.conversation),
+                    "current_fondness": chat.get_current_fondness(),
+                    "resident": True
+                }
+                for chat_id, chat in self._resident.items()
+            ]
+            chats += [{"chat_id": chat_id, **summary, "resident": False} for chat_id, summary in self._unloaded.items()]
+            return chats
+
+    def evict_idle(self) -> int:
+        """Unload every chat idle for longer than idle_seconds; returns how many"""
+        if not self.idle_seconds:
+            return 0
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [chat_id for chat_id in self._resident
+                    if self._last_used[chat_id] < cutoff and chat_id not in self._in_use]
+            unloaded = [self._unload(chat_id) for chat_id in idle]
+        self._compact_unloaded(unloaded)
+        return len(idle)
+
+    def run_sweeper(self, stop: threading.Event, interval: float = 30):
+        """Background loop for the API: unload idle chats until `stop` is set"""
+        while not stop.wait(interval):
+            try:
+                evicted = self.evict_idle()
+                if evicted:
+                    print(f"💤 Unloaded {evicted} idle chat(s); their logs are in {self.directory}")
+            except Exception as e:
+                print(f"⚠️  Chat sweeper error: {e}")
+
+    def _enforce_limit(self) -> List[Tuple[str, Dict, Dict]]:
+        """Unload least recently used chats over max_resident (caller holds the lock)"""
+        unloaded = []
+        excess = len(self._resident) - self.max_resident
+        for chat_id in list(self._resident):
+            if excess <= 0:
+                break
+            if chat_id in self._in_use:
+                continue
+            unloaded.append(self._unload(chat_id))
+            excess -= 1
+        return unloaded
+
+    def _unload(self, chat_id: str) -> Tuple[str, Dict, Dict]:
+        """
+        Drop a chat from memory; its log already holds everything
+        Returns (chat_id, state, summary) for _compact_unloaded, which the
+        caller runs once it has released the lock
+        """
+        chat = self._resident.pop(chat_id)
+        del self._last_used[chat_id]
+        del self._logged[chat_id]
+
+        state = chat.to_state()
+        chat.close()
+        summary = self._summary(state)
+        self._unloaded[chat_id] = summary
+        self.unloads += 1
+        return chat_id, state, summary
+
+    def _compact_unloaded(self, unloaded: List[Tuple[str, Dict, Dict]]):
+        """Rewrite unloaded chats' logs as one snapshot, so the next rehydration reads one line"""
+        for chat_id, state, summary in unloaded:
+            with self._log_lock(chat_id):
+                with self._lock:
+                    # Rehydrated since (and maybe appended to): its log is newer than this state
+                    if self._unloaded.get(chat_id) is not summary or not self._appended.get(chat_id):
+                        continue
+                self._write_snapshot(chat_id, state)
+                with self._lock:
+                    self.compactions += 1
+
+    def _rehydrate(self, chat_id: str) -> UserTwinChat:
+        state, appended, _ = self._read_log(chat_id)
+        chat = UserTwinChat.from_state(state)
+        del self._unloaded[chat_id]
+        self._resident[chat_id] = chat
+        self._appended[chat_id] = appended
+        self._mark_logged(chat)
+        self.rehydrations += 1
+        return chat
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "resident": len(self._resident),
+                "unloaded": len(self._unloaded),
+                "busy": len(self._turns),  # Chats with a request in progress or queued (async path)
+                "max_resident": self.max_resident,
+                "idle_seconds": self.idle_seconds,
+                "unloads": self.unloads,
+                "rehydrations": self.rehydrations,
+                "compactions": self.compactions
+            }
@@ -0,0 +1,96 @@
+"""
+Day checkpoints for branching simulations
+After each day the simulator stores what changed that day (new history and
+emotion entries) plus the small end-of-day state (fondness, memory, RNG).
+A fork keeps a pointer to its parent and only stores days after the fork,
+so a tree of what-if variants costs only its divergent suffixes.
+
+Layout: simulations/checkpoints/<simulation_id>/meta.json and day_<n>.json
+"""
+
+from typing import Dict, List, Optional
+import json
+import os
+import shutil
+
+
+class CheckpointStore:
+    """Append-only per-day checkpoints on disk"""
+
+    def __init__(self, directory: str = "simulations/checkpoints"):
+        self.directory = directory
+
+    def _path(self, simulation_id: str, name: str) -> str:
+        return os.path.join(self.directory, simulation_id, name)
+
+    def _write(self, path: str, data: Dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read(self, path: str) -> Optional[Dict]:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def start(
+        self,
+        simulation_id: str,
+        parent_simulation_id: Optional[str] = None,
+        fork_day: int = 0,
+        overrides: Optional[Dict] = None
+    ):
+        """Record where a simulation's checkpoints come from (before its first day)"""
+        self._write(self._path(simulation_id, "meta.json"), {
+            "simulation_id": simulation_id,
+            "parent_simulation_id": parent_simulation_id,
+            "fork_day": fork_day,
+            "overrides": overrides or {}
+        })
+
+    def meta(self, simulation_id: str) -> Optional[Dict]:
+        return self._read(self._path(simulation_id, "meta.json"))
+
+    def save_day(self, simulation_id: str, day: int, checkpoint: Dict):
+        self._write(self._path(simulation_id, f"day_{day}.json"), checkpoint)
+
+    def lineage(self, simulation_id: str, day: int) -> List[Dict]:
+        """
+        Checkpoints for days 1..day in order, following forks back to their root
+        Raises ValueError if any of those days was never checkpointed
+        """
+        meta = self.meta(simulation_id)
+        if meta is None:
+            raise ValueError(f"No checkpoints for simulation {simulation_id}")
+
+        fork_day = meta.get("fork_day", 0)
+        if meta.get("parent_simulation_id") and fork_day > 0:
+            inherited = self.lineage(meta["parent_simulation_id"], min(day, fork_day))
+        else:
+            inherited = []
+
+        own = []
+        for own_day in range(fork_day + 1, day + 1):
+            checkpoint = self._read(self._path(simulation_id, f"day_{own_day}.json"))
+            if checkpoint is None:
+                raise ValueError(f"Simulation {simulation_id} has no checkpoint for day {own_day}")
+            own.append(checkpoint)
+
+        return inherited + own
+
+    def children(self, simulation_id: str) -> List[str]:
+        """IDs of simulations forked directly from this one"""
+        if not os.path.isdir(self.directory):
+            return []
+        children = []
+        for child_id in os.listdir(self.directory):
+            meta = self.meta(child_id)
+            if meta and meta.get("parent_simulation_id") == simulation_id:
+                children.append(child_id)
+        return children
+
+    def delete(self, simulation_id: str):
+        shutil.rmtree(os.path.join(self.directory, simulation_id), ignore_errors=True)
@@ -3,7 +3,7 @@ Compatibility-testing conversation topics
 These scenarios naturally reveal compatibility issues between twins
 """
 
-from typing import List
+from typing import List, Optional
 import random
 
 class CompatibilityTestScenarios:
@@ -55,24 +55,25 @@ class CompatibilityTestScenarios:
     ]
 
     @classmethod
-    def get_test_for_day(cls, day: int) -> str:
+    def get_test_for_day(cls, day: int, rng: Optional[random.Random] = None) -> str:
         """
         Get an appropriate compatibility test question for a given day
         Early days: lighter lifestyle questions
         Later days: deeper values and future planning
         """
+        rng = rng or random
         if day <= 2:
             # Day 1-2: Lifestyle compatibility
-            return random.choice(cls.LIFESTYLE_TESTS)
+            return rng.choice(cls.LIFESTYLE_TESTS)
         elif day <= 4:
             # Day 3-4: Communication and values
-            return random.choice(cls.COMMUNICATION_TESTS + cls.VALUES_TESTS)
+            return rng.choice(cls.COMMUNICATION_TESTS + cls.VALUES_TESTS)
         else:
             # Day 5+: Future planning and dealbreakers
-            return random.choice(cls.FUTURE_PLANNING_TESTS + cls.DEALBREAKER_TESTS)
+            return rng.choice(cls.FUTURE_PLANNING_TESTS + cls.DEALBREAKER_TESTS)
 
     @classmethod
-    def get_context_for_test(cls, question: str) -> str:
+    def get_context_for_test(cls, question: str, rng: Optional[random.Random] = None) -> str:
         """Generate a context string for why this question is being asked"""
         contexts = [
             f"The conversation naturally turns to deeper topics. You find yourself asking: \"{question}\"",
@@ -80,17 +81,24 @@ class CompatibilityTestScenarios:
             f"To understand them better, you bring up: \"{question}\"",
             f"The topic comes up naturally: \"{question}\"",
         ]
-        return random.choice(contexts)
+        return (rng or random).choice(contexts)
 
     @classmethod
-    def inject_compatibility_test(cls, twin_response: str, day: int) -> str:
+    def inject_compatibility_test(
+        cls,
+        twin_response: str,
+        day: int,
+        rng: Optional[random.Random] = None
+    ) -> str:
         """
         Optionally inject a compatibility test question into a twin's message
         Returns the enhanced message with a test question added
         """
+        rng = rng or random
+
         # 30% chance to add a compatibility test
-        if random.random() < 0.3:
-            test_question = cls.get_test_for_day(day)
+        if rng.random() < 0.3:
+            test_question = cls.get_test_for_day(day, rng)
             # Add the question naturally to their message
             return f"{twin_response} By the way, I'm curious - {test_question.lower()}"
         return twin_response
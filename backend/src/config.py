@@ -36,10 +36,105 @@ class Config:
     # Starting fondness level (default: 50, range: 0-100)
     STARTING_FONDNESS = int(os.getenv("STARTING_FONDNESS", "40"))
 
+    # Conversation memory
+    # Each twin sees a short window of recent turns plus one cached summary per past day.
+    # Past the summary limit, the oldest days are folded into a single "earlier" summary
+    # so the prompt stays the same size however long the simulation runs.
+    ENABLE_DAY_SUMMARIES = os.getenv("ENABLE_DAY_SUMMARIES", "true").lower() == "true"
+    MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "5"))
+    MEMORY_MAX_DAY_SUMMARIES = int(os.getenv("MEMORY_MAX_DAY_SUMMARIES", "3"))
+    # User chats also pull the most relevant older messages from a local keyword index
+    CHAT_RETRIEVAL_TOP_K = int(os.getenv("CHAT_RETRIEVAL_TOP_K", "3"))
+    # Open chats are logged to CHAT_SESSIONS_DIR one message at a time and compacted every
+    # CHAT_COMPACT_EVERY messages. Chats idle for CHAT_IDLE_SECONDS (0 = never), or least recently
+    # used first beyond CHAT_MAX_RESIDENT, leave memory and are reloaded from their log on next use
+    CHAT_IDLE_SECONDS = float(os.getenv("CHAT_IDLE_SECONDS", "900"))
+    CHAT_MAX_RESIDENT = int(os.getenv("CHAT_MAX_RESIDENT", "200"))
+    CHAT_COMPACT_EVERY = int(os.getenv("CHAT_COMPACT_EVERY", "50"))
+    # fsync every chat log write: survives power loss, not just a crashed server, at some latency
+    CHAT_LOG_FSYNC = os.getenv("CHAT_LOG_FSYNC", "false").lower() == "true"
+    # Chat WebSockets: ping interval (a client silent for two intervals is disconnected), and how
+    # many recent frames per chat are kept so a reconnecting client can resume where it left off
+    CHAT_WS_HEARTBEAT_SECONDS = float(os.getenv("CHAT_WS_HEARTBEAT_SECONDS", "20"))
+    CHAT_WS_REPLAY_FRAMES = int(os.getenv("CHAT_WS_REPLAY_FRAMES", "500"))
+
     # Paths
     PROFILES_DIR = "profiles"
+    # The API keeps profiles in memory; edits made directly to files are picked up within this many seconds
+    PROFILE_RESCAN_SECONDS = float(os.getenv("PROFILE_RESCAN_SECONDS", "5"))
+    # POST /api/profiles/import: lines validated per batch, and the most lines, bytes per line
+    # and bytes in total one import may hold
+    PROFILE_IMPORT_BATCH = int(os.getenv("PROFILE_IMPORT_BATCH", "500"))
+    PROFILE_IMPORT_MAX_LINES = int(os.getenv("PROFILE_IMPORT_MAX_LINES", "100000"))
+    PROFILE_IMPORT_MAX_LINE_BYTES = int(os.getenv("PROFILE_IMPORT_MAX_LINE_BYTES", str(64 * 1024)))
+    PROFILE_IMPORT_MAX_BYTES = int(os.getenv("PROFILE_IMPORT_MAX_BYTES", str(64 * 1024 * 1024)))
     SIMULATIONS_DIR = "simulations"
+    CHAT_SESSIONS_DIR = os.getenv("CHAT_SESSIONS_DIR", "chats/sessions")
     OUTPUT_DIR = "output"
+    DATABASE_PATH = os.getenv("AURALIE_DB_PATH", "data/auralie.db")
+    # Stored transcripts and JSON outputs: "none" (plain JSON), "gzip" or "zstd" (needs zstandard).
+    # Existing data in any format stays readable; `python src/migrate_transcripts.py` converts it
+    TRANSCRIPT_COMPRESSION = os.getenv("TRANSCRIPT_COMPRESSION", "none").lower()
+    # Also write each API result to src/output/<id>.json, for tools that read those files.
+    # The API itself serves results from the simulation store
+    SAVE_OUTPUT_FILES = os.getenv("SAVE_OUTPUT_FILES", "false").lower() == "true"
+
+    # CLI batch mode (python src/main.py batch N)
+    # Simulations run BATCH_CONCURRENCY at a time under one shared tokens-per-minute budget (0 = unlimited);
+    # rate-limited simulations are retried up to BATCH_MAX_ATTEMPTS times with exponential backoff
+    BATCHES_DIR = "batches"
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "3"))
+    BATCH_TOKENS_PER_MINUTE = int(os.getenv("BATCH_TOKENS_PER_MINUTE", "50000"))
+    BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+    BATCH_RATE_LIMIT_BACKOFF = int(os.getenv("BATCH_RATE_LIMIT_BACKOFF", "15"))
+    BATCH_STATS_SECONDS = float(os.getenv("BATCH_STATS_SECONDS", "30"))
+
+    # Simulation job queue
+    # The API process runs EMBEDDED_WORKERS worker threads; set it to 0 and start
+    # `python src/worker.py --processes N` to scale out. Dedicated workers must share the API's
+    # filesystem (DATABASE_PATH and simulations/checkpoints), e.g. same machine or an attached volume
+    EMBEDDED_WORKERS = int(os.getenv("EMBEDDED_WORKERS", "3"))
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+    WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "2"))
+    # How often a worker checks whether its running job was cancelled from another process
+    CANCEL_POLL_SECONDS = float(os.getenv("CANCEL_POLL_SECONDS", "1"))
+
+    # Scheduling: interactive before batch, fair share between users,
+    # and at most MAX_INFLIGHT_PER_TENANT running simulations per user
+    MAX_INFLIGHT_PER_TENANT = int(os.getenv("MAX_INFLIGHT_PER_TENANT", "2"))
+    # Used for queue-wait estimates: worker slots available and the duration
+    # assumed until some simulations have completed
+    WORKER_CAPACITY = int(os.getenv("WORKER_CAPACITY", str(max(1, EMBEDDED_WORKERS))))
+    ESTIMATED_SIMULATION_SECONDS = int(os.getenv("ESTIMATED_SIMULATION_SECONDS", "180"))
+
+    # API read caches for finished simulations (LRU; anything evicted is re-read from SQLite)
+    STATUS_CACHE_ENTRIES = int(os.getenv("STATUS_CACHE_ENTRIES", "5000"))
+    RESULT_CACHE_ENTRIES = int(os.getenv("RESULT_CACHE_ENTRIES", "100"))
+    RESULT_CACHE_MB = int(os.getenv("RESULT_CACHE_MB", "64"))
+    CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "600"))
+    # Text/Markdown/HTML transcripts are rendered on request and kept here, keyed by content hash
+    RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", "src/output/renders")
+    RENDER_CACHE_MB = int(os.getenv("RENDER_CACHE_MB", "256"))
+    # API responses at least this big are sent gzip- or Brotli-compressed (Brotli needs `brotli`)
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+    @classmethod
+    def simulation_settings(cls) -> dict:
+        """Settings that change what a simulation produces (used to spot identical requests)"""
+        return {
+            "provider": cls.LLM_PROVIDER,
+            "model": cls.OPENROUTER_MODEL,
+            "days": cls.SIMULATION_DAYS,
+            "activities": cls.ENABLE_ACTIVITIES,
+            "force_fondness_evaluation": cls.FORCE_FONDNESS_EVALUATION,
+            "auto_incompatibility_penalty": cls.AUTO_INCOMPATIBILITY_PENALTY,
+            "enforce_emotional_tone": cls.ENFORCE_EMOTIONAL_TONE,
+            "starting_fondness": cls.STARTING_FONDNESS,
+            "day_summaries": cls.ENABLE_DAY_SUMMARIES,
+            "memory_recent_turns": cls.MEMORY_RECENT_TURNS,
+            "memory_max_day_summaries": cls.MEMORY_MAX_DAY_SUMMARIES,
+        }
 
     @classmethod
     def validate(cls):
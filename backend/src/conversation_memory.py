@@ -0,0 +1,65 @@
+"""
+Hierarchical conversation memory for digital twins
+Keeps one summary per past day plus a rolling summary of everything older
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+
+class ConversationMemory:
+    """Bounded long-term memory made of per-day summaries"""
+
+    def __init__(self, max_day_summaries: int = 3):
+        self.max_day_summaries = max_day_summaries
+        self.day_summaries: Dict[int, str] = {}
+        self.earlier_summary: str = ""  # Oldest days, folded into one paragraph
+        self.earlier_days: List[int] = []
+
+    def has_day(self, day: int) -> bool:
+        """Check whether a day was already summarized (directly or folded)"""
+        return day in self.day_summaries or day in self.earlier_days
+
+    def add_day_summary(self, day: int, summary: str):
+        """Cache the summary for a finished day"""
+        self.day_summaries[day] = summary.strip()
+
+    def needs_folding(self) -> bool:
+        """True once there are more day summaries than the prompt budget allows"""
+        return len(self.day_summaries) > self.max_day_summaries
+
+    def pop_oldest_day(self) -> Optional[Tuple[int, str]]:
+        """Remove and return (day, summary) for the oldest day summary"""
+        if not self.day_summaries:
+            return None
+        day = min(self.day_summaries)
+        return day, self.day_summaries.pop(day)
+
+    def set_earlier_summary(self, summary: str, days: List[int]):
+        """Replace the rolling summary after folding more days into it"""
+        self.earlier_summary = summary.strip()
+        self.earlier_days = sorted(set(self.earlier_days) | set(days))
+
+    def to_dict(self) -> Dict:
+        return {
+            # JSON object keys are strings; from_dict turns them back into days
+            "day_summaries": {str(day): summary for day, summary in self.day_summaries.items()},
+            "earlier_summary": self.earlier_summary,
+            "earlier_days": list(self.earlier_days)
+        }
+
+    def load_dict(self, data: Dict):
+        """Replace the memory's contents with a to_dict() snapshot"""
+        self.day_summaries = {int(day): summary for day, summary in data.get("day_summaries", {}).items()}
+        self.earlier_summary = data.get("earlier_summary", "")
+        self.earlier_days = list(data.get("earlier_days", []))
+
+    def format(self) -> str:
+        """Format the memory for a prompt (empty string when nothing is remembered yet)"""
+        lines = []
+        if self.earlier_summary:
+            first, last = self.earlier_days[0], self.earlier_days[-1]
+            span = f"Day {first}" if first == last else f"Days {first}-{last}"
+            lines.append(f"{span}: {self.earlier_summary}")
+        for day in sorted(self.day_summaries):
+            lines.append(f"Day {day}: {self.day_summaries[day]}")
+        return "\n".join(lines)
@@ -0,0 +1,184 @@
+"""
+Response compression and traffic metrics for the API
+ASGI middleware that compresses responses with Brotli (when the `brotli`
+package is installed and the client accepts it) or gzip, and counts the bytes
+the handlers produced against the bytes actually sent, plus the bytes that
+304 Not Modified responses avoided. Streaming responses are compressed chunk
+by chunk and flushed, so they keep streaming; server-sent events are left
+alone.
+"""
+
+from typing import Dict, Optional
+import threading
+import zlib
+
+from bounded_cache import BoundedCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_UNCOMPRESSED_TYPES = ("text/event-stream", "image/", "application/zip", "application/gzip")
+
+
+class TrafficStats:
+    """Running totals of response bytes before and after compression"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.compressed_responses = 0
+        self.not_modified = 0
+        self.body_bytes = 0  # What handlers produced
+        self.sent_bytes = 0  # What went over the wire
+        self.not_modified_saved_bytes = 0  # Bodies a 304 didn't have to resend
+        # ETag -> body size of the last full response carrying it
+        self._sizes = BoundedCache(10000)
+
+    def record(self, body_bytes: int, sent_bytes: int, compressed: bool, etag: Optional[str]):
+        with self._lock:
+            self.responses += 1
+            self.compressed_responses += compressed
+            self.body_bytes += body_bytes
+            self.sent_bytes += sent_bytes
+        if etag:
+            self._sizes.put(etag, body_bytes)
+
+    def record_not_modified(self, etag: Optional[str]):
+        size = self._sizes.get(etag) if etag else None
+        with self._lock:
+            self.responses += 1
+            self.not_modified += 1
+            self.not_modified_saved_bytes += size or 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            saved = self.body_bytes - self.sent_bytes
+            return {
+                "responses": self.responses,
+                "compressed_responses": self.compressed_responses,
+                "not_modified_responses": self.not_modified,
+                "body_bytes": self.body_bytes,
+                "sent_bytes": self.sent_bytes,
+                "compression_saved_bytes": saved,
+                "compression_ratio": round(self.body_bytes / self.sent_bytes, 2) if self.sent_bytes else None,
+                "not_modified_saved_bytes": self.not_modified_saved_bytes
+            }
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred encoding the client accepts: br, then gzip"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = params.strip()
+        try:
+            if quality.startswith("q=") and float(quality[2:]) == 0:
+                continue  # Explicitly refused
+        except ValueError:
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """gzip or Brotli behind one interface"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Compress responses of at least `minimum_size` bytes (or streamed ones)"""
+
+    def __init__(self, app, stats: TrafficStats, minimum_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.stats = stats
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = choose_encoding(accept_encoding)
+
+        start = None
+        compressor: Optional[_Compressor] = None
+        etag: Optional[str] = None
+        body_bytes = sent_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, etag, body_bytes, sent_bytes
+            if message["type"] == "http.response.start":
+                start = message  # Held until the first body chunk shows how big the response is
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            body_bytes += len(body)
+
+            if start is not None:
+                start_message, start = start, None
+                headers = [(name.lower(), value) for name, value in start_message["headers"]]
+                header_map = dict(headers)
+                etag = header_map.get(b"etag", b"").decode("latin-1") or None
+                content_type = header_map.get(b"content-type", b"").decode("latin-1")
+
+                if start_message["status"] == 304:
+                    self.stats.record_not_modified(etag)
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                if (encoding and start_message["status"] not in (204, 206)
+                        and b"content-encoding" not in header_map
+                        and not content_type.startswith(_UNCOMPRESSED_TYPES)
+                        and (more_body or len(body) >= self.minimum_size)):
+                    compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                    body = compressor.compress(body, final=not more_body)
+
+                    vary = header_map.get(b"vary")
+                    headers = [(name, value) for name, value in headers if name not in (b"content-length", b"vary")]
+                    headers.append((b"content-encoding", encoding.encode()))
+                    headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+                    if not more_body:
+                        headers.append((b"content-length", str(len(body)).encode()))
+                    start_message = {**start_message, "headers": headers}
+
+                await send(start_message)
+            elif compressor is not None:
+                body = compressor.compress(body, final=not more_body)
+
+            sent_bytes += len(body)
+            await send({**message, "body": body})
+            if not more_body:
+                self.stats.record(body_bytes, sent_bytes, compressor is not None, etag)
+
+        await self.app(scope, receive, send_wrapper)
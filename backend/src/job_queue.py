@@ -0,0 +1,535 @@
+"""
+Durable simulation job queue
+SQLite-backed so pending/running jobs survive restarts and any process that can
+open the database file (API, local worker processes, other nodes on a shared
+volume) can pull work from it. Workers hold a lease that they renew with
+heartbeats; a job whose lease expires is handed to the next worker.
+
+Scheduling: interactive jobs go before batch jobs; within a priority class the
+tenant with the fewest jobs in flight (then the one served least recently) goes
+next, and no tenant may have more than `max_inflight_per_tenant` jobs running.
+
+Cancellation: pending jobs are cancelled on the spot; running jobs get a
+cancel_requested flag that their worker polls and acts on.
+
+Deduplication: a job enqueued with a dedup_key that matches a pending/running
+job is not added; the caller is attached to the existing job instead, and that
+job is only cancelled once every attached caller has cancelled it.
+"""
+
+from typing import Dict, List, Optional
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import json
+import math
+import os
+import sqlite3
+import time
+
+# Columns returned to callers, in the same shape as the API's SimulationStatus
+STATUS_COLUMNS = [
+    "simulation_id", "status", "profile1_id", "profile2_id", "profile1", "profile2",
+    "compatibility_score", "completed_days", "seed", "progress", "version",
+    "created_at", "started_at", "completed_at", "error", "worker_id", "attempts",
+    "tenant_id", "priority", "subscribers"
+]
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Priority classes, lower runs first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class JobQueue:
+    """Simulation jobs with lease/heartbeat semantics"""
+
+    def __init__(self, db_path: str, max_attempts: int = 2, max_inflight_per_tenant: int = 2):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.max_inflight_per_tenant = max_inflight_per_tenant
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_schema()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _create_schema(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS simulation_jobs (
+                    simulation_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    profile1_id TEXT NOT NULL,
+                    profile2_id TEXT NOT NULL,
+                    profile1 TEXT NOT NULL,
+                    profile2 TEXT NOT NULL,
+                    seed INTEGER,
+                    compatibility_score REAL,
+                    completed_days INTEGER NOT NULL DEFAULT 0,
+                    progress TEXT,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    completed_at TEXT,
+                    error TEXT,
+                    worker_id TEXT,
+                    lease_expires_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+            # Columns added after the first release of the table
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(simulation_jobs)")}
+            for column, definition in [
+                ("tenant_id", "TEXT NOT NULL DEFAULT 'anonymous'"),
+                ("priority", "INTEGER NOT NULL DEFAULT 0"),
+                ("cancel_requested", "INTEGER NOT NULL DEFAULT 0"),
+                ("dedup_key", "TEXT"),
+                ("subscribers", "INTEGER NOT NULL DEFAULT 1"),
+            ]:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE simulation_jobs ADD COLUMN {column} {definition}")
+
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON simulation_jobs (status, created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_tenant_status ON simulation_jobs (tenant_id, status)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_dedup_status ON simulation_jobs (dedup_key, status)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON simulation_jobs (created_at)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_score ON simulation_jobs (compatibility_score)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_profile1 ON simulation_jobs (profile1_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_profile2 ON simulation_jobs (profile2_id)")
+
+    def enqueue(
+        self,
+        simulation_id: str,
+        payload: Dict,
+        tenant_id: str = "anonymous",
+        priority: str = "interactive",
+        dedup_key: Optional[str] = None
+    ) -> Dict:
+        """
+        Add a pending job
+        payload must contain profile1/profile2 (profile dicts), profile1_id, profile2_id and seed
+        With a dedup_key, an equivalent pending/running job is returned instead of
+        adding a new one; compare simulation_id to tell the two cases apart
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority} (expected one of {', '.join(PRIORITIES)})")
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = None
+                if dedup_key:
+                    existing = conn.execute(
+                        """
+                        SELECT simulation_id FROM simulation_jobs
+                        WHERE dedup_key = ? AND status IN ('pending', 'running') AND cancel_requested = 0
+                        ORDER BY created_at LIMIT 1
+                        """,
+                        (dedup_key,)
+                    ).fetchone()
+
+                if existing:
+                    simulation_id = existing["simulation_id"]
+                    # An interactive caller shouldn't wait behind batch work it joined
+                    conn.execute(
+                        """
+                        UPDATE simulation_jobs
+                        SET subscribers = subscribers + 1, priority = MIN(priority, ?),
+                            version = version + 1
+                        WHERE simulation_id = ?
+                        """,
+                        (PRIORITIES[priority], simulation_id)
+                    )
+                else:
+                    conn.execute(
+                        """
+                        INSERT INTO simulation_jobs (
+                            simulation_id, status, payload, profile1_id, profile2_id,
+                            profile1, profile2, seed, created_at, version, tenant_id,
+                            priority, dedup_key
+                        ) VALUES (?, 'pending', ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
+                        """,
+                        (
+                            simulation_id,
+                            json.dumps(payload),
+                            payload["profile1_id"],
+                            payload["profile2_id"],
+                            payload["profile1"]["name"],
+                            payload["profile2"]["name"],
+                            payload.get("seed"),
+                            datetime.now().isoformat(),
+                            tenant_id,
+                            PRIORITIES[priority],
+                            dedup_key
+                        )
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(simulation_id)
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        """
+        Claim the next runnable job for this worker (see module docstring for the order)
+        Jobs whose lease expired (worker died) are retried until max_attempts
+        Returns the job including its payload, or None if there is nothing to do
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Give up on jobs that keep losing their worker
+                conn.execute(
+                    """
+                    UPDATE simulation_jobs
+                    SET status = 'failed', error = 'Worker lease expired too many times',
+                        completed_at = ?, worker_id = NULL, version = version + 1
+                    WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?
+                    """,
+                    (datetime.now().isoformat(), now, self.max_attempts)
+                )
+
+                # Cancelled while their worker was gone; don't hand them out again
+                conn.execute(
+                    """
+                    UPDATE simulation_jobs
+                    SET status = 'cancelled', completed_at = ?, worker_id = NULL,
+                        lease_expires_at = NULL, version = version + 1
+                    WHERE status = 'running' AND lease_expires_at < ? AND cancel_requested = 1
+                    """,
+                    (datetime.now().isoformat(), now)
+                )
+
+                row = conn.execute(
+                    """
+                    WITH inflight AS (
+                        SELECT tenant_id, COUNT(*) AS running
+                        FROM simulation_jobs
+                        WHERE status = 'running' AND lease_expires_at >= :now
+                        GROUP BY tenant_id
+                    ),
+                    served AS (
+                        SELECT tenant_id, MAX(started_at) AS last_started
+                        FROM simulation_jobs
+                        WHERE started_at IS NOT NULL
+                        GROUP BY tenant_id
+                    )
+                    SELECT j.simulation_id
+                    FROM simulation_jobs j
+                    LEFT JOIN inflight i ON i.tenant_id = j.tenant_id
+                    LEFT JOIN served s ON s.tenant_id = j.tenant_id
+                    WHERE (j.status = 'pending'
+                           OR (j.status = 'running' AND j.lease_expires_at < :now))
+                      AND COALESCE(i.running, 0) < :max_inflight
+                    ORDER BY j.priority,
+                             COALESCE(i.running, 0),
+                             COALESCE(s.last_started, ''),
+                             j.created_at
+                    LIMIT 1
+                    """,
+                    {"now": now, "max_inflight": self.max_inflight_per_tenant}
+                ).fetchone()
+
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                conn.execute(
+                    """
+                    UPDATE simulation_jobs
+                    SET status = 'running', worker_id = ?, lease_expires_at = ?,
+                        started_at = COALESCE(started_at, ?), attempts = attempts + 1,
+                        version = version + 1
+                    WHERE simulation_id = ?
+                    """,
+                    (worker_id, now + lease_seconds, datetime.now().isoformat(), row["simulation_id"])
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return self.get(row["simulation_id"], include_payload=True)
+
+    def heartbeat(self, simulation_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease; False means the job is no longer ours"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE simulation_jobs SET lease_expires_at = ?
+                WHERE simulation_id = ? AND worker_id = ? AND status = 'running'
+                """,
+                (time.time() + lease_seconds, simulation_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def update_progress(self, simulation_id: str, worker_id: str, progress: Dict) -> bool:
+        """Store the latest progress event for a running job"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE simulation_jobs
+                SET progress = ?, completed_days = ?, version = version + 1
+                WHERE simulation_id = ? AND worker_id = ? AND status = 'running'
+                """,
+                (json.dumps(progress), progress.get("completed_days", 0), simulation_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(
+        self,
+        simulation_id: str,
+        worker_id: str,
+        compatibility_score: Optional[float],
+        completed_days: int
+    ) -> bool:
+        """Mark a job completed (only by the worker holding it)"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE simulation_jobs
+                SET status = 'completed', compatibility_score = ?, completed_days = ?,
+                    completed_at = ?, worker_id = NULL, lease_expires_at = NULL,
+                    version = version + 1
+                WHERE simulation_id = ? AND worker_id = ?
+                """,
+                (compatibility_score, completed_days, datetime.now().isoformat(), simulation_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, simulation_id: str, worker_id: str, error: str) -> bool:
+        """Mark a job failed (only by the worker holding it)"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE simulation_jobs
+                SET status = 'failed', error = ?, completed_at = ?, worker_id = NULL,
+                    lease_expires_at = NULL, version = version + 1
+                WHERE simulation_id = ? AND worker_id = ?
+                """,
+                (error, datetime.now().isoformat(), simulation_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def cancel(self, simulation_id: str, force: bool = False) -> Optional[str]:
+        """
+        Cancel a job: pending jobs become 'cancelled' right away, running ones are
+        flagged for their worker to stop
+        A job with several attached callers only loses one of them, unless `force`
+        Returns the job's status afterwards, or None if there is no such job
+        """
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT status, subscribers FROM simulation_jobs WHERE simulation_id = ?",
+                    (simulation_id,)
+                ).fetchone()
+
+                if row is None or row["status"] in TERMINAL_STATUSES:
+                    pass
+                elif row["subscribers"] > 1 and not force:
+                    conn.execute(
+                        """
+                        UPDATE simulation_jobs SET subscribers = subscribers - 1, version = version + 1
+                        WHERE simulation_id = ?
+                        """,
+                        (simulation_id,)
+                    )
+                else:
+                    conn.execute(
+                        """
+                        UPDATE simulation_jobs
+                        SET status = 'cancelled', completed_at = ?, version = version + 1
+                        WHERE simulation_id = ? AND status = 'pending'
+                        """,
+                        (now, simulation_id)
+                    )
+                    conn.execute(
+                        """
+                        UPDATE simulation_jobs
+                        SET cancel_requested = 1, version = version + 1
+                        WHERE simulation_id = ? AND status = 'running' AND cancel_requested = 0
+                        """,
+                        (simulation_id,)
+                    )
+                    row = conn.execute(
+                        "SELECT status, subscribers FROM simulation_jobs WHERE simulation_id = ?",
+                        (simulation_id,)
+                    ).fetchone()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row["status"] if row else None
+
+    def is_cancel_requested(self, simulation_id: str) -> bool:
+        """True if the job was cancelled or deleted while running"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT cancel_requested FROM simulation_jobs WHERE simulation_id = ?",
+                (simulation_id,)
+            ).fetchone()
+        return row is None or bool(row["cancel_requested"])
+
+    def mark_cancelled(self, simulation_id: str, worker_id: str) -> bool:
+        """Record that the worker holding a job has stopped it"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE simulation_jobs
+                SET status = 'cancelled', completed_at = ?, worker_id = NULL,
+                    lease_expires_at = NULL, version = version + 1
+                WHERE simulation_id = ? AND worker_id = ?
+                """,
+                (datetime.now().isoformat(), simulation_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def get(self, simulation_id: str, include_payload: bool = False) -> Optional[Dict]:
+        """Get one job's status (and payload if asked)"""
+        columns = STATUS_COLUMNS + (["payload"] if include_payload else [])
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(columns)} FROM simulation_jobs WHERE simulation_id = ?",
+                (simulation_id,)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def queue_position(self, simulation_id: str, capacity: int, default_duration: float) -> Optional[Dict]:
+        """
+        Estimate where a pending job stands
+        Approximates the scheduler: jobs of a higher priority class go first, and
+        within the same class other tenants get one turn for each of ours
+        Returns {"queue_position", "estimated_start_at"} or None if the job isn't pending
+        """
+        with self._connect() as conn:
+            job = conn.execute(
+                "SELECT status, tenant_id, priority, created_at FROM simulation_jobs WHERE simulation_id = ?",
+                (simulation_id,)
+            ).fetchone()
+            if job is None or job["status"] != "pending":
+                return None
+
+            # Our own earlier jobs in the same or a higher class
+            own_ahead = conn.execute(
+                """
+                SELECT COUNT(*) FROM simulation_jobs
+                WHERE status = 'pending' AND tenant_id = ?
+                  AND (priority < ? OR (priority = ? AND created_at < ?))
+                """,
+                (job["tenant_id"], job["priority"], job["priority"], job["created_at"])
+            ).fetchone()[0]
+
+            others_ahead = 0
+            rows = conn.execute(
+                """
+                SELECT tenant_id,
+                       SUM(CASE WHEN priority < ? THEN 1 ELSE 0 END) AS higher,
+                       SUM(CASE WHEN priority = ? THEN 1 ELSE 0 END) AS same
+                FROM simulation_jobs
+                WHERE status = 'pending' AND tenant_id != ?
+                GROUP BY tenant_id
+                """,
+                (job["priority"], job["priority"], job["tenant_id"])
+            ).fetchall()
+            for row in rows:
+                others_ahead += row["higher"] + min(row["same"], own_ahead + 1)
+
+            running = conn.execute(
+                "SELECT COUNT(*) FROM simulation_jobs WHERE status = 'running'"
+            ).fetchone()[0]
+
+            # Recent real durations, falling back to the configured default
+            durations = [
+                row[0] for row in conn.execute(
+                    """
+                    SELECT (julianday(completed_at) - julianday(started_at)) * 86400
+                    FROM simulation_jobs
+                    WHERE status = 'completed' AND started_at IS NOT NULL
+                    ORDER BY completed_at DESC LIMIT 20
+                    """
+                ).fetchall()
+                if row[0] is not None
+            ]
+
+        average_duration = sum(durations) / len(durations) if durations else default_duration
+        capacity = max(1, capacity)
+        position = own_ahead + others_ahead
+
+        # Jobs that must start (or finish) before a slot is free for us
+        slots_ahead = max(0, position + running - capacity + 1)
+        wait_seconds = math.ceil(slots_ahead / capacity) * average_duration
+
+        return {
+            "queue_position": position + 1,
+            "estimated_start_at": (datetime.now() + timedelta(seconds=wait_seconds)).isoformat()
+        }
+
+    def get_version(self, simulation_id: str) -> Optional[int]:
+        """Cheap change check for long-polling"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version FROM simulation_jobs WHERE simulation_id = ?",
+                (simulation_id,)
+            ).fetchone()
+        return row["version"] if row else None
+
+    def list_jobs(self) -> List[Dict]:
+        """All jobs, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(STATUS_COLUMNS)} FROM simulation_jobs ORDER BY created_at DESC"
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS count FROM simulation_jobs GROUP BY status"
+            ).fetchall()
+        return {row["status"]: row["count"] for row in rows}
+
+    def delete(self, simulation_id: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM simulation_jobs WHERE simulation_id = ?",
+                (simulation_id,)
+            )
+            return cursor.rowcount == 1
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        if "priority" in job:
+            job["priority"] = next(
+                (name for name, value in PRIORITIES.items() if value == job["priority"]),
+                "interactive"
+            )
+        if job.get("progress"):
+            job["progress"] = json.loads(job["progress"])
+        if "payload" in job:
+            job["payload"] = json.loads(job["payload"])
+        return job
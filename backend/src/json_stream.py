@@ -0,0 +1,68 @@
+"""
+Incremental reading of LLM JSON replies
+The twin answers with a JSON object whose "message" field is what the user
+sees. When the reply is streamed, StringFieldStream decodes that one field
+as its characters arrive, so the message can be shown before the rest of
+the object (emotion, internal thought, fondness change) has been generated.
+"""
+
+import json
+import re
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class StringFieldStream:
+    """Decoded text of one string field, fed the raw JSON a chunk at a time"""
+
+    def __init__(self, field: str):
+        self._key = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._position = None  # Just past the value's opening quote, once found
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Add raw JSON text; returns the field's characters completed by it (may be empty)"""
+        if self.done:
+            return ""
+        self._buffer += chunk
+        if self._position is None:
+            match = self._key.search(self._buffer)
+            if match is None:
+                return ""
+            self._position = match.end()
+
+        buffer, i = self._buffer, self._position
+        decoded = []
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self.done = True
+                break
+            if char != '\\':
+                decoded.append(char)
+                i += 1
+                continue
+
+            # Escapes are decoded only once complete; otherwise wait for the next chunk
+            if i + 1 >= len(buffer):
+                break
+            if buffer[i + 1] != 'u':
+                decoded.append(_ESCAPES.get(buffer[i + 1], buffer[i + 1]))
+                i += 2
+                continue
+            if i + 6 > len(buffer):
+                break
+            length = 6
+            if buffer[i + 2:i + 6].lower() >= "d800" and buffer[i + 2:i + 6].lower() <= "dbff":
+                length = 12  # High surrogate: decode together with the low one that follows
+                if i + length > len(buffer):
+                    break
+            try:
+                decoded.append(json.loads(f'"{buffer[i:i + length]}"'))
+            except ValueError:
+                decoded.append(buffer[i:i + length])  # Malformed escape: show it as written
+            i += length
+
+        self._position = i
+        return "".join(decoded)
@@ -1,24 +1,63 @@
-from typing import Optional
-from openai import OpenAI
+from typing import AsyncIterator, Optional, Dict
+from openai import OpenAI, AsyncOpenAI
+import asyncio
 from config import Config
+from cancellation import CancellationToken, SimulationCancelled
+from token_budget import TokenBudget
+
+# How often an in-flight request checks its cancellation token
+CANCEL_CHECK_SECONDS = 0.25
 
 class LLMClient:
-    """Unified interface for LLM providers"""
+    """
+    Unified interface for LLM providers
+    With a cancel_token, requests run on the async client so a cancelled
+    request can be dropped mid-flight (the provider stops generating)
+    """
+
+    # Shared by every instance's agenerate() calls (see shared_async_client)
+    _shared_async_client: Optional[AsyncOpenAI] = None
 
-    def __init__(self):
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        model: Optional[str] = None,
+        token_budget: Optional[TokenBudget] = None
+    ):
         Config.validate()
         self.provider = Config.LLM_PROVIDER
+        self.seed = seed  # Sampling seed passed to providers that support it
+        self.cancel_token = cancel_token
+        self.token_budget = token_budget  # Shared tokens-per-minute limit (batch runs)
+
+        # Token usage reported by the provider
+        self.last_usage: Optional[Dict[str, int]] = None
+        self.total_prompt_tokens = 0
+        self.total_completion_tokens = 0
 
         if self.provider == "openrouter":
+            self.model = model or Config.OPENROUTER_MODEL
+            self.app_name = Config.OPENROUTER_APP_NAME
+        else:
+            raise ValueError(f"Unknown LLM provider: {self.provider}")
+        # Created by the first generate(); chats that only use agenerate() never need one
+        self._client = None
+
+        # One loop per client keeps the async connection pool usable across calls
+        self._loop = asyncio.new_event_loop() if self.cancel_token else None
+
+    @property
+    def client(self):
+        """This instance's own client (async with a cancel_token), created on first use"""
+        if self._client is None:
             # OpenRouter uses OpenAI SDK with custom base URL
-            self.client = OpenAI(
+            client_class = AsyncOpenAI if self.cancel_token else OpenAI
+            self._client = client_class(
                 base_url="https://openrouter.ai/api/v1",
                 api_key=Config.OPENROUTER_API_KEY,
             )
-            self.model = Config.OPENROUTER_MODEL
-            self.app_name = Config.OPENROUTER_APP_NAME
-        else:
-            raise ValueError(f"Unknown LLM provider: {self.provider}")
+        return self._client
 
     def generate(
         self,
@@ -28,22 +67,175 @@ class LLMClient:
         max_tokens: int = 1000
     ) -> str:
         """Generate text using the configured LLM"""
+        request = self._request(system_prompt, user_message, temperature, max_tokens)
 
-        if self.provider == "openrouter":
-            response = self.client.chat.completions.create(
-                model=self.model,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                extra_headers={
-                    "HTTP-Referer": f"https://github.com/auralie/{self.app_name}",
-                    "X-Title": self.app_name,
-                }
+        # Rough size of the call (~4 characters per token) until the provider reports usage
+        estimated = (len(system_prompt) + len(user_message)) // 4 + max_tokens
+        if self.token_budget:
+            reservation = self.token_budget.acquire(estimated, self.cancel_token)
+
+        try:
+            if self.cancel_token:
+                self.cancel_token.raise_if_cancelled()
+                response = self._loop.run_until_complete(self._create_cancellable(request))
+            else:
+                response = self.client.chat.completions.create(**request)
+        except Exception:
+            if self.token_budget:
+                self.token_budget.settle(reservation, 0)
+            raise
+
+        self._record_usage(response)
+        if self.token_budget:
+            actual = sum(self.last_usage.values()) if self.last_usage else estimated
+            self.token_budget.settle(reservation, actual)
+        return response.choices[0].message.content
+
+    async def agenerate(
+        self,
+        system_prompt: str,
+        user_message: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> str:
+        """
+        generate() for code already running on an event loop (the API's chat path)
+        Uses one async client per process, so concurrent calls share its connection
+        pool instead of each holding a thread while waiting on the provider
+        """
+        request = self._request(system_prompt, user_message, temperature, max_tokens)
+
+        estimated = (len(system_prompt) + len(user_message)) // 4 + max_tokens
+        if self.token_budget:
+            reservation = await asyncio.to_thread(self.token_budget.acquire, estimated, self.cancel_token)
+
+        try:
+            response = await self.shared_async_client().chat.completions.create(**request)
+        except Exception:
+            if self.token_budget:
+                self.token_budget.settle(reservation, 0)
+            raise
+
+        self._record_usage(response)
+        if self.token_budget:
+            actual = sum(self.last_usage.values()) if self.last_usage else estimated
+            self.token_budget.settle(reservation, actual)
+        return response.choices[0].message.content
+
+    async def astream(
+        self,
+        system_prompt: str,
+        user_message: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """agenerate() that yields the completion piece by piece as the provider sends it"""
+        request = self._request(system_prompt, user_message, temperature, max_tokens)
+
+        estimated = (len(system_prompt) + len(user_message)) // 4 + max_tokens
+        if self.token_budget:
+            reservation = await asyncio.to_thread(self.token_budget.acquire, estimated, self.cancel_token)
+
+        self.last_usage = None
+        try:
+            stream = await self.shared_async_client().chat.completions.create(
+                **request,
+                stream=True,
+                stream_options={"include_usage": True}  # Usage arrives in a final chunk without choices
             )
-            return response.choices[0].message.content
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    self._record_usage(chunk)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except BaseException:
+            # Includes the caller abandoning the stream
+            if self.token_budget:
+                self.token_budget.settle(reservation, 0)
+            raise
 
-        else:
-            raise ValueError(f"Unknown provider: {self.provider}")
+        if self.token_budget:
+            actual = sum(self.last_usage.values()) if self.last_usage else estimated
+            self.token_budget.settle(reservation, actual)
+
+    @classmethod
+    def shared_async_client(cls) -> AsyncOpenAI:
+        """The process-wide async client behind agenerate(), created on first use"""
+        if cls._shared_async_client is None:
+            if Config.LLM_PROVIDER != "openrouter":
+                raise ValueError(f"Unknown provider: {Config.LLM_PROVIDER}")
+            cls._shared_async_client = AsyncOpenAI(
+                base_url="https://openrouter.ai/api/v1",
+                api_key=Config.OPENROUTER_API_KEY,
+            )
+        return cls._shared_async_client
+
+    @classmethod
+    async def close_shared_async_client(cls):
+        """Close the shared async client's connections (API shutdown)"""
+        if cls._shared_async_client is not None:
+            await cls._shared_async_client.close()
+            cls._shared_async_client = None
+
+    def _request(self, system_prompt: str, user_message: str, temperature: float, max_tokens: int) -> Dict:
+        """Chat completion arguments for one prompt"""
+        extra_args = {}
+        if self.seed is not None:
+            extra_args["seed"] = self.seed
+
+        return dict(
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            extra_headers={
+                "HTTP-Referer": f"https://github.com/auralie/{self.app_name}",
+                "X-Title": self.app_name,
+            },
+            **extra_args
+        )
+
+    async def _create_cancellable(self, request: Dict):
+        """Run one completion, dropping the connection if the token is cancelled meanwhile"""
+        call = asyncio.ensure_future(self.client.chat.completions.create(**request))
+        while not call.done():
+            if self.cancel_token.cancelled:
+                call.cancel()
+                try:
+                    await call
+                except asyncio.CancelledError:
+                    pass
+                raise SimulationCancelled(self.cancel_token.reason)
+            await asyncio.wait({call}, timeout=CANCEL_CHECK_SECONDS)
+        return call.result()
+
+    def close(self):
+        """Release the async client and its event loop (no-op for the sync client)"""
+        if self._loop and not self._loop.is_closed():
+            if self._client is not None:
+                self._loop.run_until_complete(self._client.close())
+            self._loop.close()
+
+    def _record_usage(self, response):
+        """Keep the provider's token counts for the last call and running totals"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            self.last_usage = None
+            return
+
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self.last_usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens
+        }
+        self.total_prompt_tokens += prompt_tokens
+        self.total_completion_tokens += completion_tokens
+
+    @property
+    def total_tokens(self) -> int:
+        """Total tokens spent by this client so far"""
+        return self.total_prompt_tokens + self.total_completion_tokens
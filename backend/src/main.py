@@ -7,18 +7,26 @@ Main entry point for running simulations
 import sys
 import os
 import random
-from typing import List, Tuple
+from datetime import datetime
+from typing import List, Tuple, Optional
 
 from profile import UserProfile
 from simulator import DatingSimulation
+from config import Config
+from batch_runner import BatchManifest, BatchRunner
 from output_formatter import OutputFormatter
 from sample_profiles import create_sample_profiles, save_all_sample_profiles
 
-def create_random_pairs(profiles: List[UserProfile], num_pairs: int = 5) -> List[Tuple[UserProfile, UserProfile]]:
+def create_random_pairs(
+    profiles: List[UserProfile],
+    num_pairs: int = 5,
+    rng: Optional[random.Random] = None
+) -> List[Tuple[UserProfile, UserProfile]]:
     """Create random pairs from profiles"""
     pairs = []
-    available = profiles.copy()
-    random.shuffle(available)
+    # Sort first so the shuffle only depends on the seed, not on directory order
+    available = sorted(profiles, key=lambda p: p.name)
+    (rng or random).shuffle(available)
 
     for i in range(0, min(num_pairs * 2, len(available)), 2):
         if i + 1 < len(available):
@@ -26,12 +34,12 @@ def create_random_pairs(profiles: List[UserProfile], num_pairs: int = 5) -> List
 
     return pairs
 
-def run_single_simulation(profile1: UserProfile, profile2: UserProfile):
+def run_single_simulation(profile1: UserProfile, profile2: UserProfile, seed: Optional[int] = None):
     """Run a single simulation between two profiles"""
 
     print(f"\nStarting simulation between {profile1.name} and {profile2.name}...")
 
-    simulation = DatingSimulation(profile1, profile2)
+    simulation = DatingSimulation(profile1, profile2, seed=seed)
 
     try:
         result = simulation.run_simulation()
@@ -51,9 +59,14 @@ def run_single_simulation(profile1: UserProfile, profile2: UserProfile):
         print(f"\n⚠️  Simulation encountered error, but partial data may be saved")
         raise
 
-def run_batch_simulations(num_simulations: int = 1):
-    """Run multiple simulations with random pairings"""
-    import time
+def run_batch_simulations(
+    num_simulations: int = 1,
+    seed: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    resume: Optional[str] = None
+):
+    """Run multiple simulations with random pairings, several at a time"""
 
     print("\n" + "=" * 70)
     print("AURALIE BATCH SIMULATION MODE")
@@ -67,56 +80,54 @@ def run_batch_simulations(num_simulations: int = 1):
         profiles = save_all_sample_profiles()
         print(f"\n✅ Created {len(profiles)} sample profiles\n")
 
-    # Create random pairs
-    pairs = create_random_pairs(profiles, num_simulations)
+    if resume:
+        manifest = BatchManifest.load(resume)
+        print(f"\nResuming batch {resume} (batch seed: {manifest.data['seed']})...")
+    else:
+        # One batch seed drives the pairing and every simulation's own seed
+        if seed is None:
+            seed = DatingSimulation.new_seed()
+        rng = random.Random(seed)
+
+        # Create random pairs
+        pairs = create_random_pairs(profiles, num_simulations, rng)
+        simulation_seeds = [rng.randrange(2**31) for _ in pairs]
+
+        batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{seed}"
+        manifest = BatchManifest.create(batch_id, seed, pairs, simulation_seeds)
+        print(f"\nRunning {len(pairs)} simulations (batch seed: {seed})...")
 
-    print(f"\nRunning {len(pairs)} simulations...")
     print(f"⚠️  Note: Each simulation uses ~3,000-5,000 tokens")
-    print(f"⚠️  Groq free tier: 100,000 tokens/day limit\n")
-
-    results = []
-    for i, (profile1, profile2) in enumerate(pairs, 1):
-        print(f"\n{'='*70}")
-        print(f"SIMULATION {i}/{len(pairs)}")
-        print(f"{'='*70}")
-
-        try:
-            result = run_single_simulation(profile1, profile2)
-            results.append(result)
-
-            # Add delay between simulations to avoid rate limits
-            if i < len(pairs):
-                print(f"\n⏳ Waiting 10 seconds before next simulation...")
-                time.sleep(10)
-
-        except Exception as e:
-            error_msg = str(e)
-            print(f"\n❌ Simulation failed: {error_msg}")
-
-            # Check if it's a rate limit error
-            if "rate_limit" in error_msg.lower() or "429" in error_msg:
-                print("\n⚠️  RATE LIMIT ERROR")
-                print("Solutions:")
-                print("  1. Wait for the time mentioned in the error")
-                print("  2. Use faster model: GROQ_MODEL=llama-3.1-8b-instant")
-                print("  3. Run fewer simulations at once")
-                print("  4. Check usage: https://console.groq.com/usage")
-                break  # Stop running more simulations
-            continue
+    print(f"📋 Manifest: {manifest.path}\n")
+
+    runner = BatchRunner(
+        manifest,
+        profiles,
+        concurrency=concurrency or Config.BATCH_CONCURRENCY,
+        tokens_per_minute=Config.BATCH_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute,
+        max_attempts=Config.BATCH_MAX_ATTEMPTS
+    )
+    results = runner.run()
 
     # Print batch summary
     print("\n" + "=" * 70)
-    print("BATCH SIMULATION COMPLETE")
+    print("BATCH SIMULATION COMPLETE" if not manifest.unfinished() else "BATCH SIMULATION PAUSED")
     print("=" * 70)
-    print(f"\nCompleted {len(results)} simulations")
+    print(f"\nCompleted {len(results)}/{len(manifest.items)} simulations")
+
+    failed = [item for item in manifest.items if item["status"] == "failed"]
+    if failed:
+        print(f"Failed: {len(failed)}")
+        for item in failed:
+            print(f"  ❌ {item['profile1']} & {item['profile2']}: {item['error']}")
 
     if results:
-        compatible_count = sum(1 for r in results if r["compatibility"]["score"] >= 60)
+        compatible_count = sum(1 for r in results if r["compatibility_score"] >= 60)
         print(f"Compatible matches: {compatible_count}/{len(results)}")
 
     return results
 
-def interactive_mode():
+def interactive_mode(seed: Optional[int] = None):
     """Interactive mode for selecting specific profiles"""
 
     print("\n" + "=" * 70)
@@ -140,7 +151,7 @@ def interactive_mode():
         idx2 = int(input("Second person (number): ")) - 1
 
         if 0 <= idx1 < len(profiles) and 0 <= idx2 < len(profiles) and idx1 != idx2:
-            run_single_simulation(profiles[idx1], profiles[idx2])
+            run_single_simulation(profiles[idx1], profiles[idx2], seed)
         else:
             print("Invalid selection!")
     except (ValueError, IndexError):
@@ -159,12 +170,18 @@ def main():
     ╚═══════════════════════════════════════════════════════════╝
     """)
 
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
+    args = sys.argv[1:]
+    seed = pop_option(args, "--seed", int)
+    concurrency = pop_option(args, "--concurrency", int)
+    tokens_per_minute = pop_option(args, "--tpm", int)
+    resume = pop_option(args, "--resume", str)
+
+    if args:
+        command = args[0]
 
         if command == "batch":
-            num_sims = int(sys.argv[2]) if len(sys.argv) > 2 else 5
-            run_batch_simulations(num_sims)
+            num_sims = int(args[1]) if len(args) > 1 else 5
+            run_batch_simulations(num_sims, seed, concurrency, tokens_per_minute, resume)
 
         elif command == "create-profiles":
             print("\nCreating sample profiles...")
@@ -172,7 +189,7 @@ def main():
             print(f"\n✅ Created {len(profiles)} profiles in the 'profiles' directory")
 
         elif command == "interactive":
-            interactive_mode()
+            interactive_mode(seed)
 
         else:
             print(f"Unknown command: {command}")
@@ -180,7 +197,16 @@ def main():
 
     else:
         print("\nNo command specified. Running default batch simulation...\n")
-        run_batch_simulations(1)
+        run_batch_simulations(1, seed)
+
+def pop_option(args: List[str], name: str, cast=str):
+    """Remove `name value` from args and return the converted value (None if absent)"""
+    if name not in args:
+        return None
+    idx = args.index(name)
+    value = cast(args[idx + 1])
+    del args[idx:idx + 2]
+    return value
 
 def print_usage():
     """Print usage information"""
@@ -191,8 +217,17 @@ Usage:
     python main.py interactive              Choose specific profiles to simulate
     python main.py create-profiles          Create sample profiles only
 
+Options:
+    --seed N                                Seed pairing, activities and LLM sampling (reproducible runs)
+    --concurrency N                         Simulations to run at once in batch mode (default: 3)
+    --tpm N                                 Tokens-per-minute budget shared by the batch (0 = unlimited)
+    --resume BATCH_ID                       Continue an interrupted batch from its manifest
+
 Examples:
     python main.py batch 10                 Run 10 random simulations
+    python main.py batch 10 --seed 42       Re-run the exact same batch as before
+    python main.py batch 50 --concurrency 5 --tpm 80000
+    python main.py batch --resume batch_20250101_120000_42
     python main.py interactive              Select profiles manually
     """)
 
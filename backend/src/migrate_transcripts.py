@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Convert stored transcripts to another encoding and report what it saved
+
+Run from the backend directory:
+    python src/migrate_transcripts.py                     Use TRANSCRIPT_COMPRESSION
+    python src/migrate_transcripts.py --compression zstd  Convert everything to zstd
+    python src/migrate_transcripts.py --benchmark         Compare formats, change nothing
+
+Converts the simulation store's transcript rows (importing any legacy
+simulations/*.json first) and the API's JSON outputs in src/output/.
+"""
+
+from typing import Dict, List
+import argparse
+import json
+import os
+import time
+
+from config import Config
+from simulation_store import SimulationStore
+import transcript_codec
+
+OUTPUT_DIR = "src/output"
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def print_report(label: str, stats: Dict):
+    before, after = stats["bytes_before"], stats["bytes_after"]
+    ratio = before / after if after else 0.0
+    print(f"   {label}: {stats['rows']} converted, {format_bytes(before)} -> {format_bytes(after)} "
+          f"({ratio:.1f}x), decode {stats['decode_seconds'] * 1000:.0f} ms, "
+          f"encode {stats['encode_seconds'] * 1000:.0f} ms")
+
+
+def convert_outputs(compression: str) -> Dict:
+    """Rewrite src/output/<id>.json[.gz|.zst] in the target format"""
+    stats = {"rows": 0, "bytes_before": 0, "bytes_after": 0, "decode_seconds": 0.0, "encode_seconds": 0.0}
+    if not os.path.isdir(OUTPUT_DIR):
+        return stats
+
+    target_suffix = ".json" + transcript_codec.SUFFIXES[compression]
+    for filename in sorted(os.listdir(OUTPUT_DIR)):
+        base = next((filename[:-len(f".json{suffix}")] for suffix in transcript_codec.SUFFIXES.values()
+                     if suffix and filename.endswith(f".json{suffix}")), None)
+        if base is None and filename.endswith(".json"):
+            base = filename[:-5]
+        if base is None or filename == base + target_suffix:
+            continue
+
+        path = os.path.join(OUTPUT_DIR, filename)
+        with open(path, 'rb') as f:
+            raw = f.read()
+        started = time.perf_counter()
+        result = transcript_codec.decode(raw)
+        decoded = time.perf_counter()
+        written = transcript_codec.write_file(os.path.join(OUTPUT_DIR, f"{base}.json"), result, compression)
+        stats["decode_seconds"] += decoded - started
+        stats["encode_seconds"] += time.perf_counter() - decoded
+
+        stats["rows"] += 1
+        stats["bytes_before"] += len(raw)
+        stats["bytes_after"] += os.path.getsize(written)
+        if written != path:
+            os.remove(path)
+    return stats
+
+
+def benchmark(days: List[Dict]):
+    """Size and encode/decode time of each format on real transcript days"""
+    if not days:
+        print("No stored transcripts to benchmark")
+        return
+
+    formats = [("json indent=2 (old files)", None)] + [
+        (f"compact + {name}", name) for name in transcript_codec.COMPRESSIONS
+    ]
+    encoder = "orjson" if transcript_codec.orjson else "json"
+    print(f"\n📏 {len(days)} transcript days, compact encoder: {encoder}\n")
+    print(f"   {'format':<28}{'size':>12}{'encode':>12}{'decode':>12}")
+
+    for label, compression in formats:
+        if compression == "zstd" and transcript_codec.zstandard is None:
+            print(f"   {label:<28}{'(zstandard not installed)':>36}")
+            continue
+
+        started = time.perf_counter()
+        if compression is None:
+            encoded = [json.dumps(day, indent=2) for day in days]
+        else:
+            encoded = [transcript_codec.encode(day, compression) for day in days]
+        encoded_at = time.perf_counter()
+        for data in encoded:
+            if compression is None:
+                json.loads(data)
+            else:
+                transcript_codec.decode(data)
+        decoded_at = time.perf_counter()
+
+        size = sum(len(data.encode()) if isinstance(data, str) else len(data) for data in encoded)
+        print(f"   {label:<28}{format_bytes(size):>12}"
+              f"{(encoded_at - started) * 1000:>10.1f}ms{(decoded_at - encoded_at) * 1000:>10.1f}ms")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert stored transcripts to another encoding")
+    parser.add_argument("--compression", choices=transcript_codec.COMPRESSIONS, default=None,
+                        help="Target compression (default: TRANSCRIPT_COMPRESSION)")
+    parser.add_argument("--benchmark", action="store_true", help="Compare formats on stored data and exit")
+    args = parser.parse_args()
+
+    store = SimulationStore(Config.DATABASE_PATH)
+    store.import_directory(Config.SIMULATIONS_DIR)
+
+    if args.benchmark:
+        benchmark(store.sample_days())
+        return
+
+    compression = transcript_codec.resolve_compression(args.compression)
+    print(f"\n🗜️  Converting transcripts to compact JSON + {compression}")
+
+    db_size = os.path.getsize(Config.DATABASE_PATH)
+    print_report("Simulation store", store.recompress(compression))
+    store.vacuum()
+    print(f"   Database file: {format_bytes(db_size)} -> {format_bytes(os.path.getsize(Config.DATABASE_PATH))}")
+
+    print_report(f"{OUTPUT_DIR}/ JSON outputs", convert_outputs(compression))
+
+    if compression != Config.TRANSCRIPT_COMPRESSION:
+        print(f"\n💡 Set TRANSCRIPT_COMPRESSION={compression} so new transcripts are written the same way")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,94 +1,167 @@
-from typing import Dict
-import json
+from typing import Dict, Iterator, Tuple
+import html
 
 class OutputFormatter:
     """Format simulation results in a readable format"""
 
-    @staticmethod
-    def format_simulation_output(simulation_result: Dict) -> str:
-        """Format the complete simulation in the requested output format"""
-
-        output_lines = []
-
-        # Header
-        output_lines.append("=" * 70)
-        output_lines.append("AURALIE - VIRTUAL DATING SIMULATION RESULTS")
-        output_lines.append("=" * 70)
-        output_lines.append("")
-
-        person1_name = simulation_result["participants"]["person1"]
-        person2_name = simulation_result["participants"]["person2"]
+    # format -> (content type, file extension)
+    FORMATS = {
+        "text": ("text/plain; charset=utf-8", ".txt"),
+        "markdown": ("text/markdown; charset=utf-8", ".md"),
+        "html": ("text/html; charset=utf-8", ".html")
+    }
 
-        output_lines.append(f"Participants: {person1_name} & {person2_name}")
-        output_lines.append("")
+    @staticmethod
+    def iter_blocks(simulation_result: Dict) -> Iterator[Tuple]:
+        """
+        Walk the result once, yielding format-neutral blocks such as
+        ("message", sender, message, thought, emotion); every format renders these
+        """
+        participants = simulation_result["participants"]
+        yield ("title",)
+        yield ("participants", participants["person1"], participants["person2"])
 
-        # Format each day
         for day_data in simulation_result["days"]:
-            day_num = day_data["day"]
-            output_lines.append("-" * 70)
-            output_lines.append(f"DAY {day_num}")
-            output_lines.append("-" * 70)
-            output_lines.append("")
+            yield ("day", day_data["day"])
 
-            # Texting sessions
             for session in day_data["texting_sessions"]:
-                time = session["time"]
-                output_lines.append(f"📱 {time.upper()} - Texting each other")
-                output_lines.append("")
-
+                yield ("session", session["time"])
                 for exchange in session["exchanges"]:
-                    sender = exchange["sender"]
-                    message = exchange["message"]
-                    emotion = exchange["emotion"]
-                    thought = exchange["internal_thought"]
-
-                    output_lines.append(f"[{sender}]: {message}")
-                    output_lines.append(f"    💭 {thought} — feeling {emotion}")
-                    output_lines.append("")
+                    yield ("message", exchange["sender"], exchange["message"],
+                           exchange["internal_thought"], exchange["emotion"])
 
-            # Activities
             for activity_data in day_data.get("activities", []):
                 activity = activity_data["activity"]
-                output_lines.append(f"🎯 {activity['name'].upper()}")
-                output_lines.append(f"   {activity['description']}")
-                output_lines.append("")
-
+                yield ("activity", activity["name"], activity["description"])
                 for interaction in activity_data["interactions"]:
-                    sender = interaction["sender"]
-                    message = interaction["message"]
-                    emotion = interaction["emotion"]
-                    thought = interaction["internal_thought"]
+                    yield ("message", interaction["sender"], interaction["message"],
+                           interaction["internal_thought"], interaction["emotion"])
 
-                    output_lines.append(f"[{sender}]: {message}")
-                    output_lines.append(f"    💭 {thought} — feeling {emotion}")
-                    output_lines.append("")
+            yield ("day_end",)
 
-            output_lines.append("")
+        compatibility = simulation_result["compatibility"]
+        yield ("outcome", compatibility["rating"], compatibility["score"])
+        for person, assessment in simulation_result["final_assessment"].items():
+            yield ("assessment", person, assessment["statement"], assessment["final_fondness"])
 
-        # Final assessment
-        output_lines.append("=" * 70)
-        output_lines.append("VIRTUAL DATING OUTCOME")
-        output_lines.append("=" * 70)
-        output_lines.append("")
+    @staticmethod
+    def iter_text_lines(simulation_result: Dict) -> Iterator[str]:
+        for block in OutputFormatter.iter_blocks(simulation_result):
+            kind = block[0]
+            if kind == "title":
+                yield from ["=" * 70, "AURALIE - VIRTUAL DATING SIMULATION RESULTS", "=" * 70, ""]
+            elif kind == "participants":
+                yield from [f"Participants: {block[1]} & {block[2]}", ""]
+            elif kind == "day":
+                yield from ["-" * 70, f"DAY {block[1]}", "-" * 70, ""]
+            elif kind == "session":
+                yield from [f"📱 {block[1].upper()} - Texting each other", ""]
+            elif kind == "message":
+                _, sender, message, thought, emotion = block
+                yield from [f"[{sender}]: {message}", f"    💭 {thought} — feeling {emotion}", ""]
+            elif kind == "activity":
+                yield from [f"🎯 {block[1].upper()}", f"   {block[2]}", ""]
+            elif kind == "day_end":
+                yield ""
+            elif kind == "outcome":
+                yield from ["=" * 70, "VIRTUAL DATING OUTCOME", "=" * 70, "",
+                            f"Overall Compatibility: {block[1]} ({block[2]:.1f}/100)", ""]
+            elif kind == "assessment":
+                _, person, statement, fondness = block
+                yield from [f"[{person}]: {statement}", f"    Final fondness level: {fondness}/100", ""]
 
-        compatibility = simulation_result["compatibility"]
-        output_lines.append(f"Overall Compatibility: {compatibility['rating']} ({compatibility['score']:.1f}/100)")
-        output_lines.append("")
+    @staticmethod
+    def iter_markdown_lines(simulation_result: Dict) -> Iterator[str]:
+        for block in OutputFormatter.iter_blocks(simulation_result):
+            kind = block[0]
+            if kind == "title":
+                yield from ["# Auralie - Virtual Dating Simulation Results", ""]
+            elif kind == "participants":
+                yield from [f"**Participants:** {block[1]} & {block[2]}", ""]
+            elif kind == "day":
+                yield from [f"## Day {block[1]}", ""]
+            elif kind == "session":
+                yield from [f"### 📱 {block[1].capitalize()} - Texting each other", ""]
+            elif kind == "message":
+                _, sender, message, thought, emotion = block
+                yield from [f"**{sender}:** {message}", "", f"> 💭 {thought} — feeling *{emotion}*", ""]
+            elif kind == "activity":
+                yield from [f"### 🎯 {block[1]}", "", f"*{block[2]}*", ""]
+            elif kind == "outcome":
+                yield from ["## Virtual Dating Outcome", "",
+                            f"**Overall Compatibility:** {block[1]} ({block[2]:.1f}/100)", ""]
+            elif kind == "assessment":
+                _, person, statement, fondness = block
+                yield from [f"**{person}:** {statement}", "", f"> Final fondness level: {fondness}/100", ""]
 
-        for person, assessment in simulation_result["final_assessment"].items():
-            output_lines.append(f"[{person}]: {assessment['statement']}")
-            output_lines.append(f"    Final fondness level: {assessment['final_fondness']}/100")
-            output_lines.append("")
+    @staticmethod
+    def iter_html_lines(simulation_result: Dict) -> Iterator[str]:
+        e = html.escape
+        for block in OutputFormatter.iter_blocks(simulation_result):
+            kind = block[0]
+            if kind == "title":
+                yield from [
+                    "<!DOCTYPE html>",
+                    "<html>",
+                    '<head><meta charset="utf-8"><title>Auralie - Virtual Dating Simulation Results</title>',
+                    "<style>body{font-family:sans-serif;max-width:48em;margin:auto}"
+                    ".thought{color:#666;font-style:italic;margin:0 0 1em 1.5em}</style></head>",
+                    "<body>",
+                    "<h1>Auralie - Virtual Dating Simulation Results</h1>"
+                ]
+            elif kind == "participants":
+                yield f"<p><strong>Participants:</strong> {e(block[1])} &amp; {e(block[2])}</p>"
+            elif kind == "day":
+                yield f"<h2>Day {block[1]}</h2>"
+            elif kind == "session":
+                yield f"<h3>📱 {e(block[1].capitalize())} - Texting each other</h3>"
+            elif kind == "message":
+                _, sender, message, thought, emotion = block
+                yield f"<p><strong>{e(sender)}:</strong> {e(message)}</p>"
+                yield f'<p class="thought">💭 {e(thought)} — feeling {e(emotion)}</p>'
+            elif kind == "activity":
+                yield f"<h3>🎯 {e(block[1])}</h3>"
+                yield f"<p><em>{e(block[2])}</em></p>"
+            elif kind == "outcome":
+                yield "<h2>Virtual Dating Outcome</h2>"
+                yield f"<p><strong>Overall Compatibility:</strong> {e(block[1])} ({block[2]:.1f}/100)</p>"
+            elif kind == "assessment":
+                _, person, statement, fondness = block
+                yield f"<p><strong>{e(person)}:</strong> {e(statement)}</p>"
+                yield f'<p class="thought">Final fondness level: {fondness}/100</p>'
+        yield "</body>"
+        yield "</html>"
 
-        return "\n".join(output_lines)
+    @staticmethod
+    def render(simulation_result: Dict, output_format: str = "text", chunk_chars: int = 16384) -> Iterator[str]:
+        """
+        Stream a rendering as text chunks of roughly `chunk_chars`, so a long
+        transcript can go to a file or HTTP response without being built in memory
+        """
+        if output_format not in OutputFormatter.FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}; use one of {', '.join(OutputFormatter.FORMATS)}")
+        lines = getattr(OutputFormatter, f"iter_{output_format}_lines")(simulation_result)
+
+        buffer, size = [], 0
+        for line in lines:
+            buffer.append(line)
+            size += len(line) + 1
+            if size >= chunk_chars:
+                yield "\n".join(buffer) + "\n"
+                buffer, size = [], 0
+        if buffer:
+            yield "\n".join(buffer) + "\n"
 
     @staticmethod
-    def save_formatted_output(simulation_result: Dict, filepath: str):
-        """Save formatted output to a text file"""
-        formatted = OutputFormatter.format_simulation_output(simulation_result)
+    def format_simulation_output(simulation_result: Dict) -> str:
+        """Format the complete simulation in the requested output format"""
+        return "\n".join(OutputFormatter.iter_text_lines(simulation_result))
 
+    @staticmethod
+    def save_formatted_output(simulation_result: Dict, filepath: str, output_format: str = "text"):
+        """Stream a rendering to a file"""
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(formatted)
+            f.writelines(OutputFormatter.render(simulation_result, output_format))
 
         print(f"📄 Formatted output saved to: {filepath}")
 
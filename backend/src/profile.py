@@ -234,10 +234,15 @@ Text naturally - like you would in real life:
 - If you actually vibe with them, show it
 - Be yourself - a real {self.mbti.value} person, not a chatbot"""
 
+    @property
+    def profile_id(self) -> str:
+        """ID (and file name) derived from the name, e.g. 'Maya Patel' -> 'maya_patel'"""
+        return self.name.lower().replace(' ', '_')
+
     def save(self, directory: str = "profiles") -> str:
         """Save profile to JSON file"""
         os.makedirs(directory, exist_ok=True)
-        filepath = os.path.join(directory, f"{self.name.lower().replace(' ', '_')}.json")
+        filepath = os.path.join(directory, f"{self.profile_id}.json")
         with open(filepath, 'w') as f:
             json.dump(self.model_dump(), f, indent=2)
         return filepath
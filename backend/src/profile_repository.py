@@ -0,0 +1,204 @@
+"""
+In-memory profile repository
+Loads and validates every profile in the profiles directory once, then serves
+the same UserProfile objects from memory. The directory's mtime is checked on
+each access (one stat call), which catches added, removed and renamed files;
+in-place edits are picked up by a full re-stat every `rescan_seconds`. Only
+files whose mtime changed are parsed again.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+
+from profile import UserProfile
+
+# File names are "<profile_id>.json" (plus a leading "." and ".tmp" while staged)
+_MAX_PROFILE_ID_BYTES = 200
+
+
+def valid_profile_id(profile_id: str) -> bool:
+    """True if the ID (derived from the name) is a plain file name inside the profiles directory"""
+    return (
+        bool(profile_id)
+        and not profile_id.startswith(".")
+        and not any(char in profile_id for char in "/\\\0")
+        and len(profile_id.encode()) <= _MAX_PROFILE_ID_BYTES
+    )
+
+
+class ProfileRepository:
+    """Process-wide cache of validated profiles, keyed by profile ID (file name)"""
+
+    def __init__(self, directory: str = "profiles", rescan_seconds: float = 5.0):
+        self.directory = directory
+        self.rescan_seconds = rescan_seconds
+
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, UserProfile] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._directory_mtime: Optional[int] = None
+        self._last_scan = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def _load_file(self, profile_id: str, mtime: int) -> bool:
+        """
+        (Re)load one file into the cache; a bad or half-written file keeps the old
+        version and isn't retried until its mtime changes again
+        """
+        try:
+            profile = UserProfile.load(self._path(profile_id))
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"⚠️  Skipping profile {profile_id}: {e}")
+            self._mtimes[profile_id] = mtime
+            return False
+        self._profiles[profile_id] = profile
+        self._mtimes[profile_id] = mtime
+        self.reloads += 1
+        return True
+
+    def _refresh(self):
+        """Bring the cache in line with the directory (caller holds the lock)"""
+        try:
+            directory_mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            self._profiles.clear()
+            self._mtimes.clear()
+            self._directory_mtime = None
+            return
+
+        now = time.monotonic()
+        if directory_mtime == self._directory_mtime and now - self._last_scan < self.rescan_seconds:
+            return
+
+        seen = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                profile_id = entry.name[:-5]
+                seen.add(profile_id)
+                mtime = entry.stat().st_mtime_ns
+                if self._mtimes.get(profile_id) != mtime:
+                    self._load_file(profile_id, mtime)
+
+        for profile_id in set(self._mtimes) - seen:
+            self._profiles.pop(profile_id, None)
+            del self._mtimes[profile_id]
+
+        self._directory_mtime = directory_mtime
+        self._last_scan = now
+
+    def get(self, profile_id: str) -> Optional[UserProfile]:
+        with self._lock:
+            self._refresh()
+            profile = self._profiles.get(profile_id)
+            if profile is not None:
+                self.hits += 1
+                return profile
+
+            # Written since the last scan (e.g. by another process)?
+            self.misses += 1
+            path = self._path(profile_id)
+            if not os.path.exists(path):
+                return None
+            mtime = os.stat(path).st_mtime_ns
+            if self._mtimes.get(profile_id) != mtime and self._load_file(profile_id, mtime):
+                return self._profiles[profile_id]
+            return None
+
+    def items(self) -> List[Tuple[str, UserProfile]]:
+        """(profile_id, profile) pairs ordered by ID"""
+        with self._lock:
+            self._refresh()
+            self.hits += 1
+            return sorted(self._profiles.items())
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._profiles)
+
+    def save(self, profile: UserProfile) -> str:
+        """Write a profile to disk and into the cache (ValueError if its name can't be a file name)"""
+        if not valid_profile_id(profile.profile_id):
+            raise ValueError(f"Name can't be used as a profile ID: {profile.name!r}")
+        with self._lock:
+            filepath = profile.save(self.directory)
+            profile_id = profile.profile_id
+            self._profiles[profile_id] = profile
+            self._mtimes[profile_id] = os.stat(filepath).st_mtime_ns
+            return filepath
+
+    def save_many(self, profiles: List[UserProfile]) -> Tuple[int, int]:
+        """
+        Write a batch of profiles all-or-nothing and update the cache in place
+        Every file is written to a temp file first; only when all of them succeeded
+        are they renamed into place, and if a rename fails the files already
+        replaced are restored. Returns (created, updated).
+        Raises ValueError, writing nothing, if any name can't be a file name.
+        """
+        for profile in profiles:
+            if not valid_profile_id(profile.profile_id):
+                raise ValueError(f"Name can't be used as a profile ID: {profile.name!r}")
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            staged = []
+            try:
+                for profile in profiles:
+                    path = self._path(profile.profile_id)
+                    temp_path = os.path.join(self.directory, f".{profile.profile_id}.json.tmp")
+                    with open(temp_path, 'w') as f:
+                        json.dump(profile.model_dump(), f, indent=2)
+                    staged.append((profile, path, temp_path))
+            except Exception:
+                for _, _, temp_path in staged:
+                    os.remove(temp_path)
+                raise
+
+            replaced = []  # (path, previous contents or None)
+            try:
+                for _, path, temp_path in staged:
+                    previous = None
+                    if os.path.exists(path):
+                        with open(path, 'rb') as f:
+                            previous = f.read()
+                    os.replace(temp_path, path)
+                    replaced.append((path, previous))
+            except Exception:
+                for path, previous in reversed(replaced):
+                    if previous is None:
+                        os.remove(path)
+                    else:
+                        with open(path, 'wb') as f:
+                            f.write(previous)
+                for _, _, temp_path in staged:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                raise
+
+            created = sum(1 for _, previous in replaced if previous is None)
+            for profile, path, _ in staged:
+                self._profiles[profile.profile_id] = profile
+                self._mtimes[profile.profile_id] = os.stat(path).st_mtime_ns
+            self._directory_mtime = os.stat(self.directory).st_mtime_ns
+            return created, len(staged) - created
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "profiles": len(self._profiles),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads
+            }
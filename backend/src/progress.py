@@ -0,0 +1,91 @@
+"""
+Change notifications for long-running jobs
+Worker threads publish; async API handlers wait for the next version
+"""
+
+from itertools import islice
+from typing import Dict, List, Tuple
+import asyncio
+import threading
+
+
+class ProgressBroker:
+    """
+    Per-key versions with async waiters, safe to publish from any thread
+    Versions come from one counter shared by every key, so a key that was
+    evicted or forgotten never comes back with a version a waiter has already seen
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._versions: Dict[str, int] = {}  # Least recently published first
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
+    def version(self, key: str) -> int:
+        """Current version of a key (0 if never published, or dropped since)"""
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def publish(self, key: str) -> int:
+        """Bump the version of a key and wake everyone waiting on it"""
+        with self._lock:
+            self._counter += 1
+            version = self._counter
+            self._versions.pop(key, None)
+            self._versions[key] = version
+            waiters = self._waiters.pop(key, [])
+            self._evict()
+
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, version)
+        return version
+
+    def _evict(self):
+        """
+        Drop the least recently published keys past max_keys (caller holds the lock)
+        A dropped key reads as version 0 until it is published again
+        """
+        excess = len(self._versions) - self.max_keys
+        if excess > 0:
+            idle = (key for key in self._versions if key not in self._waiters)
+            for key in list(islice(idle, excess)):
+                del self._versions[key]
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._versions)
+
+    def forget(self, key: str):
+        """Drop a key (its waiters time out normally)"""
+        with self._lock:
+            self._versions.pop(key, None)
+
+    async def wait(self, key: str, since: int, timeout: float) -> int:
+        """
+        Wait until the key's version is newer than `since`
+        Returns the new version, or the unchanged one after `timeout` seconds
+        """
+        with self._lock:
+            version = self._versions.get(key, 0)
+            if version > since:
+                return version
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._waiters.setdefault(key, []).append((loop, future))
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                waiters = self._waiters.get(key, [])
+                self._waiters[key] = [w for w in waiters if w[1] is not future]
+                if not self._waiters[key]:
+                    del self._waiters[key]
+                return self._versions.get(key, 0)
+
+
+def _resolve(future: asyncio.Future, version: int):
+    if not future.done():
+        future.set_result(version)
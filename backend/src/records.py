@@ -0,0 +1,198 @@
+"""
+Compact record types for simulation and chat state
+Slotted dataclasses with interned names/emotions; converted to the
+JSON-shaped dicts only when results leave the process (files, API responses)
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import sys
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+    """Intern short, highly repeated strings (sender names, emotions, contexts)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True)
+class FondnessBreakdown:
+    """How a fondness change was computed"""
+    total: int
+    llm_decision: int
+    value_penalty: int
+    dealbreaker_penalty: int
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional['FondnessBreakdown']:
+        if not data:
+            return None
+        return cls(
+            total=data.get("total", 0),
+            llm_decision=data.get("llm_decision", 0),
+            value_penalty=data.get("value_penalty", 0),
+            dealbreaker_penalty=data.get("dealbreaker_penalty", 0)
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "total": self.total,
+            "llm_decision": self.llm_decision,
+            "value_penalty": self.value_penalty,
+            "dealbreaker_penalty": self.dealbreaker_penalty
+        }
+
+
+@dataclass(slots=True)
+class InteractionRecord:
+    """One message sent during an activity"""
+    sender: str
+    message: str
+    emotion: str
+    internal_thought: str
+    fondness_level: int
+
+    def __post_init__(self):
+        self.sender = intern(self.sender)
+        self.emotion = intern(self.emotion)
+
+    def to_dict(self) -> Dict:
+        return {
+            "sender": self.sender,
+            "message": self.message,
+            "emotion": self.emotion,
+            "internal_thought": self.internal_thought,
+            "fondness_level": self.fondness_level
+        }
+
+
+@dataclass(slots=True)
+class ExchangeRecord(InteractionRecord):
+    """One text message, with the breakdown of the fondness change it caused"""
+    fondness_breakdown: Optional[FondnessBreakdown] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "sender": self.sender,
+            "message": self.message,
+            "emotion": self.emotion,
+            "internal_thought": self.internal_thought,
+            "fondness_level": self.fondness_level,
+            "fondness_breakdown": self.fondness_breakdown.to_dict() if self.fondness_breakdown else None
+        }
+
+
+@dataclass(slots=True)
+class SessionRecord:
+    """A morning or evening texting session"""
+    time: str
+    exchanges: List[ExchangeRecord] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "time": self.time,
+            "exchanges": [exchange.to_dict() for exchange in self.exchanges]
+        }
+
+
+@dataclass(slots=True)
+class ActivityRecord:
+    """A date activity; `activity` is shared with ActivityScenario.ACTIVITIES, not copied"""
+    activity: Dict
+    interactions: List[InteractionRecord] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "activity": dict(self.activity),
+            "interactions": [interaction.to_dict() for interaction in self.interactions]
+        }
+
+
+@dataclass(slots=True)
+class DayRecord:
+    """Everything that happened on one simulated day"""
+    day: int
+    texting_sessions: List[SessionRecord] = field(default_factory=list)
+    activities: List[ActivityRecord] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "day": self.day,
+            "texting_sessions": [session.to_dict() for session in self.texting_sessions],
+            "activities": [activity.to_dict() for activity in self.activities]
+        }
+
+
+@dataclass(slots=True)
+class HistoryEntry:
+    """One turn in a twin's own conversation history"""
+    day: int
+    context: str
+    partner_message: Optional[str]
+    my_response: str
+    emotion: str
+    internal_thought: str
+    fondness_level: int
+
+    def __post_init__(self):
+        self.context = intern(self.context)
+        self.emotion = intern(self.emotion)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HistoryEntry':
+        return cls(
+            day=data["day"],
+            context=data["context"],
+            partner_message=data.get("partner_message"),
+            my_response=data["my_response"],
+            emotion=data["emotion"],
+            internal_thought=data["internal_thought"],
+            fondness_level=data["fondness_level"]
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "day": self.day,
+            "context": self.context,
+            "partner_message": self.partner_message,
+            "my_response": self.my_response,
+            "emotion": self.emotion,
+            "internal_thought": self.internal_thought,
+            "fondness_level": self.fondness_level
+        }
+
+
+@dataclass(slots=True)
+class EmotionEntry:
+    """One step in an EmotionalState's history"""
+    emotion: str
+    fondness_level: int
+    fondness_change: int
+    context: str
+
+    def __post_init__(self):
+        self.emotion = intern(self.emotion)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EmotionEntry':
+        return cls(
+            emotion=data["emotion"],
+            fondness_level=data["fondness_level"],
+            fondness_change=data["fondness_change"],
+            context=data.get("context", "")
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "emotion": self.emotion,
+            "fondness_level": self.fondness_level,
+            "fondness_change": self.fondness_change,
+            "context": self.context
+        }
+
+
+def result_to_dict(result: Dict) -> Dict:
+    """Serialize a simulation result whose days may still be DayRecords"""
+    days = result.get("days")
+    if not days or not isinstance(days[0], DayRecord):
+        return result
+    return {**result, "days": [day.to_dict() for day in days]}
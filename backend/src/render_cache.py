@@ -0,0 +1,110 @@
+"""
+Rendered transcript cache
+Text, Markdown and HTML renderings are produced on demand and kept on disk
+under the SHA-256 of the result they were rendered from, so a rendering is
+reused for as long as its simulation is unchanged and can never go stale.
+A miss streams the rendering to the caller while writing it to the cache;
+the oldest files are removed once the cache passes `max_bytes`.
+"""
+
+from typing import Dict, Iterator
+import hashlib
+import os
+import threading
+import uuid
+
+from output_formatter import OutputFormatter
+import transcript_codec
+
+# Bump when a renderer's output changes, so older cached renderings are not served
+RENDER_VERSION = 1
+
+_CHUNK_BYTES = 65536
+
+
+class RenderCache:
+    """Content-addressed files of rendered transcripts"""
+
+    def __init__(self, directory: str = "output/renders", max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def content_hash(simulation_result: Dict, output_format: str) -> str:
+        digest = hashlib.sha256(transcript_codec.dumps(simulation_result))
+        digest.update(f"|{output_format}|{RENDER_VERSION}".encode())
+        return digest.hexdigest()
+
+    def path(self, simulation_result: Dict, output_format: str) -> str:
+        _, extension = OutputFormatter.FORMATS[output_format]
+        return os.path.join(self.directory, self.content_hash(simulation_result, output_format) + extension)
+
+    def stream(self, simulation_result: Dict, output_format: str = "text") -> Iterator[bytes]:
+        """The rendering as UTF-8 chunks, from the cache or rendered (and cached) on the fly"""
+        path = self.path(simulation_result, output_format)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            f = None
+
+        if f is not None:
+            with self._lock:
+                self.hits += 1
+            os.utime(path)  # Recently used files are evicted last
+            with f:
+                while chunk := f.read(_CHUNK_BYTES):
+                    yield chunk
+            return
+
+        with self._lock:
+            self.misses += 1
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'wb') as out:
+                for text in OutputFormatter.render(simulation_result, output_format):
+                    chunk = text.encode()
+                    out.write(chunk)
+                    yield chunk
+            os.replace(temp_path, path)
+        finally:
+            # Client went away mid-stream or rendering failed: nothing half-written is kept
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._prune()
+
+    def _prune(self):
+        """Remove least recently used renderings until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "max_bytes": self.max_bytes
+            }
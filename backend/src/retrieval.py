@@ -0,0 +1,75 @@
+"""
+Local keyword retrieval over past conversation turns
+A small incremental BM25 index - no external services or dependencies
+"""
+
+from typing import Dict, List, Set, Tuple
+from collections import Counter
+import math
+import re
+
+STOP_WORDS = {
+    "a", "an", "the", "and", "or", "but", "if", "so", "to", "of", "in", "on", "at",
+    "for", "with", "about", "is", "am", "are", "was", "were", "be", "been", "it",
+    "its", "i", "me", "my", "you", "your", "we", "our", "they", "them", "he", "she",
+    "this", "that", "do", "did", "does", "have", "has", "had", "just", "what",
+    "how", "really", "too", "very", "not", "no", "yes", "oh", "haha", "lol"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stop words"""
+    return [
+        token for token in re.findall(r"[a-z0-9']+", text.lower())
+        if token not in STOP_WORDS and len(token) > 1
+    ]
+
+
+class BM25Index:
+    """Incremental BM25 index; documents are identified by integer ids"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}  # term -> {doc_id: term frequency}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: int, text: str):
+        """Index a document (re-adding an id is ignored)"""
+        if doc_id in self.doc_lengths:
+            return
+
+        terms = Counter(tokenize(text))
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+
+    def search(self, query: str, top_k: int = 3, exclude: Set[int] = frozenset()) -> List[Tuple[int, float]]:
+        """Return up to top_k (doc_id, score) pairs, best first"""
+        num_docs = len(self.doc_lengths)
+        if num_docs == 0:
+            return []
+
+        avg_length = self.total_length / num_docs or 1.0
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+
+            idf = math.log(1 + (num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if doc_id in exclude:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
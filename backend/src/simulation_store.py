@@ -0,0 +1,581 @@
+"""
+Simulation result store
+Each saved simulation is one metadata row (participants, status, score, days,
+timestamps) in an indexed SQLite table, and its transcript is one row per day
+(JSON, optionally compressed - see transcript_codec). Listing and filtering
+only touch the metadata table; a full result is reassembled from its rows when
+one simulation is asked for.
+
+The store shares its database with the job queue, so page() can list queued,
+running and saved simulations together in one indexed query.
+
+Forks only store their own days; load() stitches the parent's days up to the
+fork point in front of them.
+
+Next to each day's transcript, the store keeps that day's fondness series, so
+load_days(), load_fondness() and load_summary() can serve one day, a range,
+the trajectory or the outcome without reassembling the whole result.
+"""
+
+from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import os
+import sqlite3
+import time
+
+from records import DayRecord
+from job_queue import PRIORITIES
+import transcript_codec
+
+# Columns returned by get_meta()
+META_COLUMNS = [
+    "simulation_id", "status", "profile1_id", "profile2_id", "profile1", "profile2",
+    "compatibility_score", "compatibility_rating", "completed_days", "seed",
+    "parent_simulation_id", "fork_day", "start_time", "end_time", "error"
+]
+
+# Columns returned by page(), in the job queue's status shape
+PAGE_COLUMNS = [
+    "simulation_id", "status", "profile1_id", "profile2_id", "profile1", "profile2",
+    "compatibility_score", "completed_days", "seed", "progress", "version", "priority",
+    "subscribers", "created_at", "completed_at", "error"
+]
+
+# How each source table provides PAGE_COLUMNS that aren't plain columns of its own
+_JOB_COLUMNS = {"created_at": "created_at"}
+_SAVED_COLUMNS = {
+    "created_at": "start_time",
+    "completed_at": "end_time",
+    "progress": "NULL",
+    "version": "0",
+    "priority": "0",
+    "subscribers": "1"
+}
+
+# Sort keys for page(); unscored (unfinished) simulations sort as the lowest score
+SORT_KEYS = {
+    "created_at": "{created_at}",
+    "compatibility_score": "COALESCE(compatibility_score, -1)",
+    "completed_days": "completed_days"
+}
+
+# Upper bound for "every day" in day range queries
+_LAST_DAY = 2 ** 31
+
+# Top-level result keys that live in their own columns or rows
+_STRUCTURED_KEYS = {
+    "simulation_id", "participants", "seed", "start_time", "end_time", "status",
+    "completed_days", "error", "compatibility", "parent_simulation_id", "fork_day", "days"
+}
+
+
+def day_fondness(day: Dict) -> Dict[str, List[int]]:
+    """Each participant's fondness after every message they sent that day, in order"""
+    series: Dict[str, List[int]] = {}
+    messages = [exchange for session in day.get("texting_sessions", []) for exchange in session["exchanges"]]
+    messages += [interaction for activity in day.get("activities", []) for interaction in activity["interactions"]]
+    for message in messages:
+        series.setdefault(message["sender"], []).append(message["fondness_level"])
+    return series
+
+
+def _size(data) -> int:
+    return len(data.encode()) if isinstance(data, str) else len(data)
+
+
+def profile_id_for(name: str) -> str:
+    """Profile IDs are derived from names, e.g. 'Maya Patel' -> 'maya_patel'"""
+    return name.lower().replace(" ", "_")
+
+
+class SimulationStore:
+    """Saved simulation results in SQLite"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_schema()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _create_schema(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS simulations (
+                    simulation_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    profile1_id TEXT NOT NULL,
+                    profile2_id TEXT NOT NULL,
+                    profile1 TEXT NOT NULL,
+                    profile2 TEXT NOT NULL,
+                    compatibility_score REAL,
+                    compatibility_rating TEXT,
+                    completed_days INTEGER NOT NULL DEFAULT 0,
+                    seed INTEGER,
+                    parent_simulation_id TEXT,
+                    fork_day INTEGER NOT NULL DEFAULT 0,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    error TEXT,
+                    extra TEXT NOT NULL DEFAULT '{}',
+                    updated_at TEXT NOT NULL,
+                    export_seq INTEGER
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS simulation_days (
+                    simulation_id TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (simulation_id, day)
+                ) WITHOUT ROWID
+            """)
+
+            # Columns added after the first release of the table
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(simulation_days)")}
+            if "fondness" not in existing:
+                conn.execute("ALTER TABLE simulation_days ADD COLUMN fondness TEXT")  # Filled in lazily
+            conn.execute("BEGIN IMMEDIATE")  # Another process may be adding the column too
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(simulations)")}
+            if "export_seq" not in existing:
+                conn.execute("ALTER TABLE simulations ADD COLUMN export_seq INTEGER")
+                # Number existing rows in the order the timestamp watermark used to read them
+                ids = conn.execute("SELECT simulation_id FROM simulations ORDER BY updated_at, simulation_id").fetchall()
+                conn.executemany(
+                    "UPDATE simulations SET export_seq = ? WHERE simulation_id = ?",
+                    [(seq, row["simulation_id"]) for seq, row in enumerate(ids, start=1)]
+                )
+            conn.execute("COMMIT")
+
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_simulations_start ON simulations (start_time)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_simulations_status_start ON simulations (status, start_time)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_simulations_profile1 ON simulations (profile1_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_simulations_profile2 ON simulations (profile2_id)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_simulations_score ON simulations (compatibility_score)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_simulations_parent ON simulations (parent_simulation_id)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_simulations_export_seq ON simulations (export_seq)")
+
+    def save(self, result: Dict):
+        """
+        Insert or update a result
+        Days are append-only, so only days newer than the last stored one are written.
+        Every save takes the next export_seq inside its write transaction, so the
+        numbers follow commit order (see completed_after)
+        """
+        simulation_id = result["simulation_id"]
+        participants = result.get("participants", {})
+        compatibility = result.get("compatibility") or {}
+        days = result.get("days") or []
+        extra = {key: value for key, value in result.items() if key not in _STRUCTURED_KEYS}
+
+        if days:
+            last = days[-1]
+            last_day = last.day if isinstance(last, DayRecord) else last["day"]
+        else:
+            last_day = result.get("fork_day", 0)
+
+        row = {
+            "simulation_id": simulation_id,
+            "status": result.get("status", "completed"),
+            "profile1_id": profile_id_for(participants.get("person1", "")),
+            "profile2_id": profile_id_for(participants.get("person2", "")),
+            "profile1": participants.get("person1", ""),
+            "profile2": participants.get("person2", ""),
+            "compatibility_score": compatibility.get("score"),
+            "compatibility_rating": compatibility.get("rating"),
+            "completed_days": result.get("completed_days", last_day),
+            "seed": result.get("seed"),
+            "parent_simulation_id": result.get("parent_simulation_id"),
+            "fork_day": result.get("fork_day", 0),
+            "start_time": result.get("start_time") or datetime.now().isoformat(),
+            "end_time": result.get("end_time"),
+            "error": result.get("error"),
+            "extra": json.dumps(extra),
+            "updated_at": datetime.now().isoformat()
+        }
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored = conn.execute(
+                    "SELECT MAX(day) AS day FROM simulation_days WHERE simulation_id = ?",
+                    (simulation_id,)
+                ).fetchone()["day"] or 0
+
+                new_days = []
+                for day in days:
+                    day = day.to_dict() if isinstance(day, DayRecord) else day
+                    if day["day"] > stored:
+                        new_days.append((
+                            simulation_id, day["day"], transcript_codec.encode(day), json.dumps(day_fondness(day))
+                        ))
+
+                conn.executemany(
+                    "INSERT OR REPLACE INTO simulation_days (simulation_id, day, data, fondness) VALUES (?, ?, ?, ?)",
+                    new_days
+                )
+                row["export_seq"] = conn.execute(
+                    "SELECT COALESCE(MAX(export_seq), 0) + 1 FROM simulations"
+                ).fetchone()[0]
+                conn.execute(
+                    f"INSERT OR REPLACE INTO simulations ({', '.join(row)}) "
+                    f"VALUES ({', '.join('?' for _ in row)})",
+                    tuple(row.values())
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def get_meta(self, simulation_id: str) -> Optional[Dict]:
+        """One simulation's metadata row, without its transcript"""
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(META_COLUMNS)} FROM simulations WHERE simulation_id = ?",
+                (simulation_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def _header(self, row: sqlite3.Row) -> Dict:
+        """Everything in a result except its days"""
+        result = {
+            "simulation_id": row["simulation_id"],
+            "participants": {"person1": row["profile1"], "person2": row["profile2"]},
+            "seed": row["seed"],
+            "start_time": row["start_time"],
+            "status": row["status"],
+            "completed_days": row["completed_days"]
+        }
+        for column in ("end_time", "error"):
+            if row[column] is not None:
+                result[column] = row[column]
+        if row["compatibility_rating"] is not None:
+            result["compatibility"] = {
+                "rating": row["compatibility_rating"],
+                "score": row["compatibility_score"]
+            }
+        result.update(json.loads(row["extra"]))
+        if row["parent_simulation_id"]:
+            result["parent_simulation_id"] = row["parent_simulation_id"]
+            result["fork_day"] = row["fork_day"]
+        return result
+
+    def _day_rows(self, conn, simulation_id: str, first: int, last: int, column: str) -> Optional[List[sqlite3.Row]]:
+        """
+        (day, <column>) rows for days first..last, taking a fork's days up to
+        fork_day from its parent; None if the simulation doesn't exist
+        """
+        row = conn.execute(
+            "SELECT parent_simulation_id, fork_day FROM simulations WHERE simulation_id = ?",
+            (simulation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        rows = []
+        parent_id, fork_day = row["parent_simulation_id"], row["fork_day"]
+        if parent_id and first <= fork_day:
+            rows = self._day_rows(conn, parent_id, first, min(last, fork_day), column)
+            if rows is None:
+                raise ValueError(f"Parent simulation {parent_id} of {simulation_id} is missing")
+            first = fork_day + 1
+
+        return rows + conn.execute(
+            f"SELECT simulation_id, day, {column} FROM simulation_days "
+            "WHERE simulation_id = ? AND day BETWEEN ? AND ? ORDER BY day",
+            (simulation_id, first, last)
+        ).fetchall()
+
+    def load(self, simulation_id: str) -> Optional[Dict]:
+        """
+        Reassemble a full result in the shape run_simulation() returns
+        Raises ValueError if a fork's parent is missing
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM simulations WHERE simulation_id = ?",
+                (simulation_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            result = self._header(row)
+            result["days"] = [
+                transcript_codec.decode(day["data"])
+                for day in self._day_rows(conn, simulation_id, 1, _LAST_DAY, "data")
+            ]
+        return result
+
+    def load_summary(self, simulation_id: str) -> Optional[Dict]:
+        """A result without its days: outcome, final assessment, date suggestions, stats"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM simulations WHERE simulation_id = ?",
+                (simulation_id,)
+            ).fetchone()
+        return self._header(row) if row else None
+
+    def load_days(self, simulation_id: str, first: int = 1, last: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Transcript days first..last (inclusive), read straight from their rows
+        None if the simulation doesn't exist; raises ValueError if a fork's parent is missing
+        """
+        with self._connect() as conn:
+            rows = self._day_rows(conn, simulation_id, first, last or _LAST_DAY, "data")
+        if rows is None:
+            return None
+        return [transcript_codec.decode(row["data"]) for row in rows]
+
+    def load_fondness(self, simulation_id: str) -> Optional[List[Dict]]:
+        """
+        Per-day fondness series, [{"day": 1, "fondness": {name: [levels...]}}, ...],
+        without decoding transcripts (except once for days stored before the series existed)
+        """
+        with self._connect() as conn:
+            rows = self._day_rows(conn, simulation_id, 1, _LAST_DAY, "fondness")
+            if rows is None:
+                return None
+
+            trajectory, backfill = [], []
+            for row in rows:
+                series = row["fondness"]
+                if series is None:
+                    data = conn.execute(
+                        "SELECT data FROM simulation_days WHERE simulation_id = ? AND day = ?",
+                        (row["simulation_id"], row["day"])
+                    ).fetchone()["data"]
+                    series = json.dumps(day_fondness(transcript_codec.decode(data)))
+                    backfill.append((series, row["simulation_id"], row["day"]))
+                trajectory.append({"day": row["day"], "fondness": json.loads(series)})
+
+            if backfill:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "UPDATE simulation_days SET fondness = ? WHERE simulation_id = ? AND day = ?",
+                    backfill
+                )
+                conn.execute("COMMIT")
+        return trajectory
+
+    def page(
+        self,
+        statuses: Optional[List[str]] = None,
+        profile_id: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        sort: str = "created_at",
+        descending: bool = True,
+        after: Optional[Tuple] = None,
+        limit: int = 20
+    ) -> List[Dict]:
+        """
+        One page of simulations, from the job queue plus results it doesn't know about
+        (e.g. CLI runs), when both live in this database
+        Keyset pagination: `after` is the (sort_value, simulation_id) of the previous
+        page's last row. Each source reads at most `limit` rows off its own index.
+        Rows are in the job queue's status shape, plus "sort_value".
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        direction = "DESC" if descending else "ASC"
+
+        with self._connect() as conn:
+            has_jobs = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'simulation_jobs'"
+            ).fetchone() is not None
+
+            sources = [("simulations", _SAVED_COLUMNS)]
+            if has_jobs:
+                sources.insert(0, ("simulation_jobs", _JOB_COLUMNS))
+
+            selects, params = [], []
+            for table, columns in sources:
+                sort_value = SORT_KEYS[sort].format(**columns)
+                clauses = []
+                if statuses:
+                    clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+                    params.extend(statuses)
+                if profile_id:
+                    clauses.append("(profile1_id = ? OR profile2_id = ?)")
+                    params.extend([profile_id, profile_id])
+                if min_score is not None:
+                    clauses.append("compatibility_score >= ?")
+                    params.append(min_score)
+                if max_score is not None:
+                    clauses.append("compatibility_score <= ?")
+                    params.append(max_score)
+                if created_after:
+                    clauses.append(f"{columns['created_at']} >= ?")
+                    params.append(created_after)
+                if created_before:
+                    clauses.append(f"{columns['created_at']} < ?")
+                    params.append(created_before)
+                if after is not None:
+                    clauses.append(f"({sort_value}, simulation_id) {'<' if descending else '>'} (?, ?)")
+                    params.extend(after)
+                if table == "simulations" and has_jobs:
+                    clauses.append("simulation_id NOT IN (SELECT simulation_id FROM simulation_jobs)")
+
+                select_list = ", ".join(
+                    f"{columns.get(column, column)} AS {column}" for column in PAGE_COLUMNS
+                )
+                where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+                selects.append(
+                    f"SELECT * FROM (SELECT {select_list}, {sort_value} AS sort_value FROM {table} {where} "
+                    f"ORDER BY sort_value {direction}, simulation_id {direction} LIMIT ?)"
+                )
+                params.append(limit)
+
+            query = (
+                " UNION ALL ".join(selects)
+                + f" ORDER BY sort_value {direction}, simulation_id {direction} LIMIT ?"
+            )
+            rows = conn.execute(query, params + [limit]).fetchall()
+
+        page = []
+        for row in rows:
+            item = dict(row)
+            item["priority"] = next(
+                (name for name, value in PRIORITIES.items() if value == item["priority"]),
+                "interactive"
+            )
+            if item["progress"]:
+                item["progress"] = json.loads(item["progress"])
+            page.append(item)
+        return page
+
+    def completed_after(self, after: Optional[int] = None, limit: int = -1) -> List[Tuple[int, str]]:
+        """
+        (export_seq, simulation_id) of completed simulations saved after export_seq `after`, oldest first
+        A completed result is never rewritten, and sequence numbers are handed out in
+        commit order, so no save can land behind a watermark already read
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT export_seq, simulation_id FROM simulations "
+                "WHERE export_seq > ? AND status = 'completed' ORDER BY export_seq LIMIT ?",
+                (after or 0, limit)
+            ).fetchall()
+        return [(row["export_seq"], row["simulation_id"]) for row in rows]
+
+    def export_seq(self, simulation_id: str) -> Optional[int]:
+        """A simulation's current export_seq (to carry over watermarks kept by simulation ID)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT export_seq FROM simulations WHERE simulation_id = ?", (simulation_id,)
+            ).fetchone()
+        return row["export_seq"] if row else None
+
+    def delete(self, simulation_id: str) -> bool:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM simulation_days WHERE simulation_id = ?", (simulation_id,))
+            cursor = conn.execute("DELETE FROM simulations WHERE simulation_id = ?", (simulation_id,))
+            conn.execute("COMMIT")
+            return cursor.rowcount == 1
+
+    def recompress(self, compression: Optional[str] = None, batch_size: int = 200) -> Dict:
+        """
+        Re-encode every stored transcript day with `compression` (default: the configured one)
+        Returns row count, total bytes before/after and time spent decoding/encoding
+        """
+        stats = {"rows": 0, "bytes_before": 0, "bytes_after": 0, "decode_seconds": 0.0, "encode_seconds": 0.0}
+        last_key = ("", 0)
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT simulation_id, day, data FROM simulation_days "
+                    "WHERE (simulation_id, day) > (?, ?) ORDER BY simulation_id, day LIMIT ?",
+                    (*last_key, batch_size)
+                ).fetchall()
+                if not rows:
+                    return stats
+
+                updates = []
+                for row in rows:
+                    started = time.perf_counter()
+                    day = transcript_codec.decode(row["data"])
+                    decoded = time.perf_counter()
+                    data = transcript_codec.encode(day, compression)
+                    stats["decode_seconds"] += decoded - started
+                    stats["encode_seconds"] += time.perf_counter() - decoded
+
+                    stats["rows"] += 1
+                    stats["bytes_before"] += _size(row["data"])
+                    stats["bytes_after"] += _size(data)
+                    updates.append((data, row["simulation_id"], row["day"]))
+
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "UPDATE simulation_days SET data = ? WHERE simulation_id = ? AND day = ?",
+                    updates
+                )
+                conn.execute("COMMIT")
+                last_key = (rows[-1]["simulation_id"], rows[-1]["day"])
+
+    def sample_days(self, limit: int = 500) -> List[Dict]:
+        """Decoded transcript days from the most recent simulations (for benchmarks)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT d.data FROM simulation_days d JOIN simulations s USING (simulation_id) "
+                "ORDER BY s.start_time DESC, d.day LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [transcript_codec.decode(row["data"]) for row in rows]
+
+    def vacuum(self):
+        """Give space freed by smaller rows back to the filesystem"""
+        with self._connect() as conn:
+            conn.execute("VACUUM")
+
+    def import_directory(self, directory: str) -> int:
+        """
+        One-time migration of results saved as <directory>/<id>.json
+        Results already in the store are left alone; returns how many were imported
+        """
+        if not os.path.isdir(directory):
+            return 0
+
+        with self._connect() as conn:
+            known = {row["simulation_id"] for row in conn.execute("SELECT simulation_id FROM simulations")}
+
+        # Parents first, so a fork's stitched load works as soon as it's imported
+        pending = []
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json") or filename[:-5] in known:
+                continue
+            try:
+                with open(os.path.join(directory, filename), 'r') as f:
+                    result = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Skipping {filename}: {e}")
+                continue
+            result.setdefault("simulation_id", filename[:-5])
+            pending.append(result)
+        pending.sort(key=lambda result: bool(result.get("parent_simulation_id")))
+
+        for result in pending:
+            self.save(result)
+        if pending:
+            print(f"📦 Imported {len(pending)} saved simulation(s) from {directory}/ into {self.db_path}")
+        return len(pending)
@@ -1,21 +1,68 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Callable
 from profile import UserProfile
 from twin import DigitalTwin
 from llm_client import LLMClient
 from activities import ActivityScenario
 from config import Config
+from cancellation import CancellationToken, SimulationCancelled
+from checkpoints import CheckpointStore
+from simulation_store import SimulationStore
+from token_budget import TokenBudget
+from records import (
+    ExchangeRecord, InteractionRecord, FondnessBreakdown,
+    SessionRecord, ActivityRecord, DayRecord, result_to_dict
+)
 from datetime import datetime
+import hashlib
 import json
-import os
+import random
 
 class DatingSimulation:
     """Simulates a dating experience between two digital twins"""
 
-    def __init__(self, profile1: UserProfile, profile2: UserProfile):
+    def __init__(
+        self,
+        profile1: UserProfile,
+        profile2: UserProfile,
+        seed: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        simulation_id: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        overrides: Optional[Dict] = None,
+        token_budget: Optional[TokenBudget] = None
+    ):
         self.profile1 = profile1
         self.profile2 = profile2
 
-        self.llm = LLMClient()
+        # Per-run changes to the global settings (used by forks):
+        # "activities" {day: activity name}, "enable_activities" bool, "model" str
+        self.overrides = overrides or {}
+        self.enable_activities = self.overrides.get("enable_activities", Config.ENABLE_ACTIVITIES)
+        self.activity_overrides = {
+            int(day): name for day, name in self.overrides.get("activities", {}).items()
+        }
+        for name in self.activity_overrides.values():
+            if ActivityScenario.get_activity_by_name(name) is None:
+                raise ValueError(f"Unknown activity: {name}")
+
+        # Called with a small progress event after every message and every day
+        self.progress_callback = progress_callback
+        self.completed_days = 0
+
+        # Per-simulation RNG so concurrent runs don't share the global random state
+        self.seed = seed if seed is not None else self.new_seed()
+        self.rng = random.Random(self.seed)
+
+        # Checked between exchanges; cancelling also aborts the LLM request in flight.
+        # Without one the LLM client stays on the plain sync API.
+        self.cancel_token = cancel_token
+
+        self.llm = LLMClient(
+            seed=self.seed,
+            cancel_token=self.cancel_token,
+            model=self.overrides.get("model"),
+            token_budget=token_budget
+        )
 
         self.twin1 = DigitalTwin(profile1, self.llm)
         self.twin2 = DigitalTwin(profile2, self.llm)
@@ -23,15 +70,100 @@ class DatingSimulation:
         self.twin1.set_partner(profile2.name, profile2)
         self.twin2.set_partner(profile1.name, profile1)
 
-        self.simulation_log: List[Dict] = []
-        self.simulation_id = f"{profile1.name}_{profile2.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.simulation_log: List[DayRecord] = []
+        self.result: Optional[Dict] = None  # Compact result (days kept as DayRecords)
+        self.simulation_id = simulation_id or f"{profile1.name}_{profile2.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        # End-of-day checkpoints; a fork starts from its parent's checkpoint instead of day 1
+        self.checkpoints = CheckpointStore()
+        self.store = SimulationStore(Config.DATABASE_PATH)
+        self.parent_simulation_id: Optional[str] = None
+        self.fork_day = 0
+
+    @classmethod
+    def fork(
+        cls,
+        parent_simulation_id: str,
+        fork_day: int,
+        profile1: UserProfile,
+        profile2: UserProfile,
+        seed: int,
+        overrides: Optional[Dict] = None,
+        **kwargs
+    ) -> 'DatingSimulation':
+        """
+        Continue an existing simulation from the end of fork_day with different settings
+        Only days after fork_day are simulated and stored; earlier days stay with the parent
+        """
+        if not 1 <= fork_day < Config.SIMULATION_DAYS:
+            raise ValueError(f"fork_day must be between 1 and {Config.SIMULATION_DAYS - 1}")
+
+        simulation = cls(profile1, profile2, seed=seed, overrides=overrides, **kwargs)
+        lineage = simulation.checkpoints.lineage(parent_simulation_id, fork_day)
+
+        # Checkpoints written before twins were keyed by position are keyed by name
+        simulation.twin1.restore_checkpoints([
+            checkpoint["twins"].get("twin1") or checkpoint["twins"][profile1.name] for checkpoint in lineage
+        ])
+        simulation.twin2.restore_checkpoints([
+            checkpoint["twins"].get("twin2") or checkpoint["twins"][profile2.name] for checkpoint in lineage
+        ])
+
+        version, state, gauss_next = lineage[-1]["rng_state"]
+        simulation.rng.setstate((version, tuple(state), gauss_next))
+
+        simulation.parent_simulation_id = parent_simulation_id
+        simulation.fork_day = fork_day
+        simulation.completed_days = fork_day
+        return simulation
+
+    def cancel(self, reason: str = "Cancelled"):
+        """Stop the simulation at the next exchange (safe to call from another thread)"""
+        if self.cancel_token is None:
+            raise RuntimeError("Simulation was created without a cancel_token")
+        self.cancel_token.cancel(reason)
+
+    @staticmethod
+    def dedup_key(
+        profile1: UserProfile,
+        profile2: UserProfile,
+        profile1_id: str,
+        profile2_id: str,
+        seed: Optional[int] = None,
+        variant: Optional[Dict] = None
+    ) -> str:
+        """
+        Fingerprint of everything that determines a simulation's outcome:
+        both profiles' IDs and content, the simulation settings, the seed if one
+        was pinned and, for forks, the parent/fork day/overrides (`variant`).
+        The IDs keep two profiles with identical content from sharing a run
+        that is filed under the other one's ID
+        """
+        def content_hash(profile: UserProfile) -> str:
+            content = json.dumps(profile.model_dump(mode="json"), sort_keys=True)
+            return hashlib.sha256(content.encode()).hexdigest()
+
+        fingerprint = {
+            "profile_ids": [profile1_id, profile2_id],
+            "profile1": content_hash(profile1),
+            "profile2": content_hash(profile2),
+            "settings": Config.simulation_settings(),
+            "seed": seed,
+            "variant": variant
+        }
+        return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def new_seed() -> int:
+        """Pick a fresh seed for a simulation that wasn't given one"""
+        return random.SystemRandom().randrange(2**31)
 
     def simulate_texting_exchange(
         self,
         day: int,
         time_of_day: str,
         num_exchanges: int = 4
-    ) -> List[Dict]:
+    ) -> List[ExchangeRecord]:
         """Simulate a texting conversation between the twins"""
 
         context = ActivityScenario.get_texting_context(day, time_of_day)
@@ -49,51 +181,56 @@ class DatingSimulation:
 
         # Initial message
         init_response = initiator.initiate_conversation(context=f"texting - {context}", day=day)
-        exchanges.append({
-            "sender": initiator.profile.name,
-            "message": init_response["message"],
-            "emotion": init_response["emotion"],
-            "internal_thought": init_response["internal_thought"],
-            "fondness_level": initiator.emotional_state.fondness_level,
-            "fondness_breakdown": init_response.get("fondness_breakdown")
-        })
+        exchanges.append(self._exchange_record(initiator, init_response))
+        self._report_progress("exchange", day, time_of_day, len(exchanges) - 1)
 
         # Back and forth exchanges
         for i in range(num_exchanges):
             # Responder replies
             resp_response = responder.respond_to_message(
-                partner_message=exchanges[-1]["message"],
+                partner_message=exchanges[-1].message,
                 context=f"texting - {context}",
                 day=day
             )
-            exchanges.append({
-                "sender": responder.profile.name,
-                "message": resp_response["message"],
-                "emotion": resp_response["emotion"],
-                "internal_thought": resp_response["internal_thought"],
-                "fondness_level": responder.emotional_state.fondness_level,
-                "fondness_breakdown": resp_response.get("fondness_breakdown")
-            })
+            exchanges.append(self._exchange_record(responder, resp_response))
+            self._report_progress("exchange", day, time_of_day, len(exchanges) - 1)
 
             # Initiator replies (except on last exchange)
             if i < num_exchanges - 1:
                 init_response = initiator.respond_to_message(
-                    partner_message=exchanges[-1]["message"],
+                    partner_message=exchanges[-1].message,
                     context=f"texting - {context}",
                     day=day
                 )
-                exchanges.append({
-                    "sender": initiator.profile.name,
-                    "message": init_response["message"],
-                    "emotion": init_response["emotion"],
-                    "internal_thought": init_response["internal_thought"],
-                    "fondness_level": initiator.emotional_state.fondness_level,
-                    "fondness_breakdown": init_response.get("fondness_breakdown")
-                })
+                exchanges.append(self._exchange_record(initiator, init_response))
+                self._report_progress("exchange", day, time_of_day, len(exchanges) - 1)
 
         return exchanges
 
-    def simulate_activity(self, day: int, activity: Dict) -> List[Dict]:
+    @staticmethod
+    def _exchange_record(twin: DigitalTwin, response: Dict) -> ExchangeRecord:
+        """Build the record for one text message"""
+        return ExchangeRecord(
+            sender=twin.profile.name,
+            message=response["message"],
+            emotion=response["emotion"],
+            internal_thought=response["internal_thought"],
+            fondness_level=twin.emotional_state.fondness_level,
+            fondness_breakdown=FondnessBreakdown.from_dict(response.get("fondness_breakdown"))
+        )
+
+    @staticmethod
+    def _interaction_record(twin: DigitalTwin, response: Dict) -> InteractionRecord:
+        """Build the record for one message during an activity"""
+        return InteractionRecord(
+            sender=twin.profile.name,
+            message=response["message"],
+            emotion=response["emotion"],
+            internal_thought=response["internal_thought"],
+            fondness_level=twin.emotional_state.fondness_level
+        )
+
+    def simulate_activity(self, day: int, activity: Dict) -> List[InteractionRecord]:
         """Simulate a physical activity/date"""
 
         print(f"  🎯 {activity['name']}...")
@@ -108,62 +245,58 @@ class DatingSimulation:
                     context=f"{activity['name']} - {activity['description']}",
                     day=day
                 )
-                interactions.append({
-                    "sender": self.twin1.profile.name,
-                    "message": response1["message"],
-                    "emotion": response1["emotion"],
-                    "internal_thought": response1["internal_thought"],
-                    "fondness_level": self.twin1.emotional_state.fondness_level
-                })
+                interactions.append(self._interaction_record(self.twin1, response1))
+                self._report_progress("exchange", day, activity["name"], len(interactions) - 1)
             else:
                 # Person 2 responds
                 response2 = self.twin2.respond_to_message(
-                    partner_message=interactions[-1]["message"],
+                    partner_message=interactions[-1].message,
                     context=f"{activity['name']} - {activity['description']}",
                     day=day
                 )
-                interactions.append({
-                    "sender": self.twin2.profile.name,
-                    "message": response2["message"],
-                    "emotion": response2["emotion"],
-                    "internal_thought": response2["internal_thought"],
-                    "fondness_level": self.twin2.emotional_state.fondness_level
-                })
+                interactions.append(self._interaction_record(self.twin2, response2))
+                self._report_progress("exchange", day, activity["name"], len(interactions) - 1)
 
                 # Person 1 responds
                 if round_num < 3:
                     response1 = self.twin1.respond_to_message(
-                        partner_message=interactions[-1]["message"],
+                        partner_message=interactions[-1].message,
                         context=f"{activity['name']} - {activity['description']}",
                         day=day
                     )
-                    interactions.append({
-                        "sender": self.twin1.profile.name,
-                        "message": response1["message"],
-                        "emotion": response1["emotion"],
-                        "internal_thought": response1["internal_thought"],
-                        "fondness_level": self.twin1.emotional_state.fondness_level
-                    })
+                    interactions.append(self._interaction_record(self.twin1, response1))
+                    self._report_progress("exchange", day, activity["name"], len(interactions) - 1)
 
         return interactions
 
+    def _inherited_days(self) -> List[Dict]:
+        """A fork's days 1..fork_day as stored with its parent (empty if not a fork or they're gone)"""
+        if not self.parent_simulation_id:
+            return []
+        try:
+            return self.store.load_days(self.parent_simulation_id, 1, self.fork_day) or []
+        except ValueError as e:
+            print(f"⚠️  Parent days unavailable for date suggestions: {e}")
+            return []
+
     def generate_date_suggestions(self) -> List[str]:
         """Generate specific conversation starters for the actual date based on simulation"""
 
-        # Build conversation summary
+        # Build conversation summary (a fork's days up to fork_day are in its parent)
+        days = self._inherited_days() + [day_log.to_dict() for day_log in self.simulation_log]
         conversation_summary = []
-        for day_log in self.simulation_log:
-            for session in day_log.get("texting_sessions", []):
-                for exchange in session.get("exchanges", []):
+        for day in days:
+            for session in day["texting_sessions"]:
+                for exchange in session["exchanges"]:
                     # Handle fondness_breakdown being None
-                    breakdown = exchange.get("fondness_breakdown") or {}
+                    breakdown = exchange.get("fondness_breakdown")
                     conversation_summary.append({
                         "sender": exchange["sender"],
                         "message": exchange["message"],
-                        "fondness_change": breakdown.get("total", 0)
+                        "fondness_change": breakdown["total"] if breakdown else 0
                     })
-            for activity in day_log.get("activities", []):
-                for interaction in activity.get("interactions", []):
+            for activity in day.get("activities", []):
+                for interaction in activity["interactions"]:
                     conversation_summary.append({
                         "sender": interaction["sender"],
                         "message": interaction["message"],
@@ -243,54 +376,61 @@ Examples of BAD suggestions (too generic):
                 "Share a story from your week and see what they've been up to"
             ]
 
-    def simulate_day(self, day: int) -> Dict:
+    def simulate_day(self, day: int) -> DayRecord:
         """Simulate one complete day"""
 
         print(f"\n📅 DAY {day}")
-        day_log = {
-            "day": day,
-            "texting_sessions": [],
-            "activities": []
-        }
+        day_log = DayRecord(day=day)
 
         # Morning texting
         morning_texts = self.simulate_texting_exchange(day, "morning", num_exchanges=3)
-        day_log["texting_sessions"].append({
-            "time": "morning",
-            "exchanges": morning_texts
-        })
+        day_log.texting_sessions.append(SessionRecord(time="morning", exchanges=morning_texts))
 
-        # Physical activity every 2-3 days (if enabled)
-        if Config.ENABLE_ACTIVITIES and day in [2, 4, 6]:
+        # Physical activity every 2-3 days (if enabled), or whatever a fork asked for
+        if day in self.activity_overrides:
+            activity = ActivityScenario.get_activity_by_name(self.activity_overrides[day])
+        elif self.enable_activities and day in [2, 4, 6]:
             avg_fondness = (
                 self.twin1.emotional_state.fondness_level +
                 self.twin2.emotional_state.fondness_level
             ) // 2
 
-            activity = ActivityScenario.get_activity_for_day(day, avg_fondness)
+            activity = ActivityScenario.get_activity_for_day(day, avg_fondness, self.rng)
+        else:
+            activity = None
+
+        if activity:
             activity_log = self.simulate_activity(day, activity)
-            day_log["activities"].append({
-                "activity": activity,
-                "interactions": activity_log
-            })
+            day_log.activities.append(ActivityRecord(activity=activity, interactions=activity_log))
 
         # Evening texting
         evening_texts = self.simulate_texting_exchange(day, "evening", num_exchanges=3)
-        day_log["texting_sessions"].append({
-            "time": "evening",
-            "exchanges": evening_texts
-        })
+        day_log.texting_sessions.append(SessionRecord(time="evening", exchanges=evening_texts))
+
+        # Condense the day into each twin's long-term memory
+        if Config.ENABLE_DAY_SUMMARIES:
+            self.twin1.summarize_day(day)
+            self.twin2.summarize_day(day)
+
+        prompt_tokens = [
+            twin.get_prompt_token_stats().get(day, 0) for twin in (self.twin1, self.twin2)
+        ]
+        print(f"  🧠 Avg prompt tokens: {self.profile1.name} {prompt_tokens[0]}, {self.profile2.name} {prompt_tokens[1]}")
 
         return day_log
 
     def run_simulation(self) -> Dict:
-        """Run the complete simulation"""
+        """
+        Run the complete simulation
+        Returns the result in its JSON shape; the compact form stays on self.result
+        """
 
         print(f"\n{'='*60}")
         print(f"🎭 AURALIE SIMULATION ({Config.SIMULATION_DAYS} DAYS)")
         print(f"{'='*60}")
         print(f"👤 {self.profile1.name} ({self.profile1.mbti.value})")
         print(f"💕 {self.profile2.name} ({self.profile2.mbti.value})")
+        print(f"🎲 Seed: {self.seed}")
         print(f"{'='*60}\n")
 
         simulation_result = {
@@ -299,25 +439,47 @@ Examples of BAD suggestions (too generic):
                 "person1": self.profile1.name,
                 "person2": self.profile2.name
             },
+            "seed": self.seed,
             "start_time": datetime.now().isoformat(),
-            "days": [],
+            "days": self.simulation_log,
             "status": "in_progress"
         }
+        if self.parent_simulation_id:
+            # Days up to fork_day live in the parent's result (see load_result)
+            simulation_result["parent_simulation_id"] = self.parent_simulation_id
+            simulation_result["fork_day"] = self.fork_day
+            simulation_result["overrides"] = self.overrides
+            print(f"🌿 Forked from {self.parent_simulation_id} after day {self.fork_day}")
+        self.result = simulation_result
+
+        self.checkpoints.start(self.simulation_id, self.parent_simulation_id, self.fork_day, self.overrides)
 
         # Simulate each day with error handling
-        completed_days = 0
+        completed_days = self.fork_day
         try:
-            for day in range(1, Config.SIMULATION_DAYS + 1):
+            for day in range(self.fork_day + 1, Config.SIMULATION_DAYS + 1):
                 print(f"\n📅 DAY {day}")
+                history_start = [len(twin.conversation_history) for twin in (self.twin1, self.twin2)]
+                emotion_start = [len(twin.emotional_state.history) for twin in (self.twin1, self.twin2)]
+
                 day_log = self.simulate_day(day)
-                simulation_result["days"].append(day_log)
                 self.simulation_log.append(day_log)
+                self.save_checkpoint(day, history_start, emotion_start)
                 completed_days = day
+                self.completed_days = day
+                self._report_progress("day_completed", day)
 
                 # Save progress after each day
                 if day % 2 == 0:  # Save every 2 days
                     self.save_simulation(simulation_result)
 
+        except SimulationCancelled:
+            # Nothing more to save; whoever cancelled doesn't want the output
+            simulation_result["status"] = "cancelled"
+            simulation_result["completed_days"] = completed_days
+            print(f"\n🛑 Simulation cancelled at day {completed_days + 1}")
+            raise
+
         except Exception as e:
             simulation_result["status"] = "failed"
             simulation_result["error"] = str(e)
@@ -332,6 +494,7 @@ Examples of BAD suggestions (too generic):
         print(f"\n{'='*60}")
         print(f"📊 FINAL ASSESSMENT")
         print(f"{'='*60}\n")
+        self._report_progress("assessing", Config.SIMULATION_DAYS)
 
         assessment1 = self.twin1.get_final_assessment()
         assessment2 = self.twin2.get_final_assessment()
@@ -376,6 +539,10 @@ Examples of BAD suggestions (too generic):
         except Exception as e:
             print(f"⚠️  Failed to generate date suggestions: {e}")
             simulation_result["date_suggestions"] = []
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
+
+        simulation_result["memory_stats"] = self.get_memory_stats()
 
         simulation_result["status"] = "completed"
         simulation_result["completed_days"] = Config.SIMULATION_DAYS
@@ -384,20 +551,85 @@ Examples of BAD suggestions (too generic):
         # Save simulation
         self.save_simulation(simulation_result)
 
-        return simulation_result
+        return result_to_dict(simulation_result)
+
+    def save_checkpoint(self, day: int, history_start: List[int], emotion_start: List[int]):
+        """Store what the day changed, so forks can resume from the end of it"""
+        self.checkpoints.save_day(self.simulation_id, day, {
+            "day": day,
+            "rng_state": self.rng.getstate(),
+            # By position, not name: two profiles may share a name
+            "twins": {
+                f"twin{i + 1}": twin.checkpoint_delta(day, history_start[i], emotion_start[i])
+                for i, twin in enumerate((self.twin1, self.twin2))
+            }
+        })
 
-    def save_simulation(self, result: Dict):
-        """Save simulation results to file"""
-        os.makedirs("simulations", exist_ok=True)
-        filepath = f"simulations/{self.simulation_id}.json"
+    @staticmethod
+    def load_result(simulation_id: str) -> Optional[Dict]:
+        """
+        Load a saved result; for forks, the parent's days up to fork_day are
+        stitched in front of the fork's own days
+        """
+        return SimulationStore(Config.DATABASE_PATH).load(simulation_id)
+
+    def _report_progress(
+        self,
+        event: str,
+        day: int,
+        session: Optional[str] = None,
+        exchange_index: Optional[int] = None
+    ):
+        """
+        Send a progress event to the callback, if one was given
+        Every progress point is also a cancellation point
+        """
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
+        if not self.progress_callback:
+            return
+
+        self.progress_callback({
+            "event": event,
+            "day": day,
+            "session": session,
+            "exchange_index": exchange_index,
+            "completed_days": self.completed_days,
+            "fondness": {
+                self.profile1.name: self.twin1.emotional_state.fondness_level,
+                self.profile2.name: self.twin2.emotional_state.fondness_level
+            },
+            "tokens_used": self.llm.total_tokens
+        })
+
+    def get_memory_stats(self) -> Dict:
+        """Per-day prompt size and the summaries each twin is carrying"""
+        return {
+            twin.profile.name: {
+                # Keys are strings so the stats survive a JSON round-trip unchanged
+                "avg_prompt_tokens_per_day": {
+                    str(day): tokens for day, tokens in twin.get_prompt_token_stats().items()
+                },
+                "memory": twin.memory.format()
+            }
+            for twin in (self.twin1, self.twin2)
+        }
 
-        with open(filepath, 'w') as f:
-            json.dump(result, f, indent=2)
+    def save_simulation(self, result: Dict, force: bool = False):
+        """
+        Save simulation results to the simulation store
+        Once the run is cancelled nothing is saved, since whoever cancelled it doesn't
+        want its output: this raises SimulationCancelled instead, unless `force`
+        (batch runs keep finished days to resume from)
+        """
+        if self.cancel_token and not force:
+            self.cancel_token.raise_if_cancelled()
+        self.store.save(result)
 
         status = result.get("status", "unknown")
         days = result.get("completed_days", len(result.get("days", [])))
 
         if status == "completed":
-            print(f"\n💾 Simulation saved to: {filepath}")
+            print(f"\n💾 Simulation saved: {self.simulation_id} ({self.store.db_path})")
         else:
-            print(f"\n💾 Partial simulation ({days} days) saved to: {filepath}")
+            print(f"\n💾 Partial simulation ({days} days) saved: {self.simulation_id}")
@@ -0,0 +1,69 @@
+"""
+Shared tokens-per-minute budget
+Every LLM call reserves its estimated size before it is sent and settles the
+difference once the provider reports actual usage; calls that would push the
+last 60 seconds over the limit wait until older calls age out of the window.
+"""
+
+from collections import deque
+from typing import Deque, List, Optional
+import threading
+import time
+
+from cancellation import CancellationToken
+
+WINDOW_SECONDS = 60.0
+
+
+class TokenBudget:
+    """Sliding-window token limiter, safe to share between threads"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self._condition = threading.Condition()
+        self._entries: Deque[List] = deque()  # [timestamp, tokens], oldest first
+        self._paused_until = 0.0
+
+    def _used(self, now: float) -> int:
+        while self._entries and self._entries[0][0] <= now - WINDOW_SECONDS:
+            self._entries.popleft()
+        return sum(tokens for _, tokens in self._entries)
+
+    def acquire(self, tokens: int, cancel_token: Optional[CancellationToken] = None) -> List:
+        """
+        Block until `tokens` fit in the budget, then reserve them (gives up if cancelled)
+        Returns the reservation to pass to settle()
+        """
+        with self._condition:
+            while True:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+
+                now = time.time()
+                if now < self._paused_until:
+                    self._condition.wait(min(1.0, self._paused_until - now))
+                    continue
+
+                used = self._used(now)
+                # A single call larger than the whole budget still goes through on an idle window
+                if used + tokens <= self.tokens_per_minute or not self._entries:
+                    reservation = [now, tokens]
+                    self._entries.append(reservation)
+                    return reservation
+
+                self._condition.wait(min(1.0, max(0.05, self._entries[0][0] + WINDOW_SECONDS - now)))
+
+    def settle(self, reservation: List, actual: int):
+        """Replace a reservation's estimate with the provider's real count"""
+        with self._condition:
+            reservation[1] = actual
+            self._condition.notify_all()
+
+    def pause(self, seconds: float):
+        """Hold all new calls for a while (after the provider rate-limited us)"""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.time() + seconds)
+
+    def tokens_last_minute(self) -> int:
+        with self._condition:
+            return max(0, self._used(time.time()))
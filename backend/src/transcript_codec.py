@@ -0,0 +1,121 @@
+"""
+Transcript encoding
+Compact JSON (orjson when it is installed, the standard library otherwise),
+optionally compressed with gzip or zstd (zstd needs the `zstandard` package).
+decode() recognises every format by its leading bytes, so data written with any
+TRANSCRIPT_COMPRESSION setting stays readable after the setting changes.
+"""
+
+from typing import Any, Optional, Union
+import gzip
+import json
+import os
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+# File name suffix for each compression
+SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_warned_no_zstd = False
+
+
+def resolve_compression(compression: Optional[str] = None) -> str:
+    """The compression to actually use (zstd falls back to gzip when zstandard is missing)"""
+    global _warned_no_zstd
+    compression = (compression or Config.TRANSCRIPT_COMPRESSION).lower()
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown transcript compression {compression!r}; use one of {', '.join(COMPRESSIONS)}")
+    if compression == "zstd" and zstandard is None:
+        if not _warned_no_zstd:
+            print("⚠️  zstandard is not installed; compressing transcripts with gzip instead")
+            _warned_no_zstd = True
+        return "gzip"
+    return compression
+
+
+def dumps(data: Any) -> bytes:
+    """Compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode(data: Any, compression: Optional[str] = None) -> Union[bytes, str]:
+    """
+    Serialize for storage
+    Uncompressed data is returned as text so it stays readable in the database
+    """
+    compression = resolve_compression(compression)
+    raw = dumps(data)
+    if compression == "gzip":
+        return gzip.compress(raw, compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw.decode()
+
+
+def decode(data: Union[bytes, str]) -> Any:
+    """Inverse of encode() for any compression"""
+    if isinstance(data, (bytes, memoryview)):
+        data = bytes(data)
+        if data.startswith(_GZIP_MAGIC):
+            data = gzip.decompress(data)
+        elif data.startswith(_ZSTD_MAGIC):
+            if zstandard is None:
+                raise RuntimeError("This transcript is zstd-compressed; install zstandard to read it")
+            data = zstandard.ZstdDecompressor().decompress(data)
+    return loads(data)
+
+
+def write_file(path: str, data: Any, compression: Optional[str] = None) -> str:
+    """
+    Write `data` to `path` plus the compression's suffix (e.g. result.json.gz)
+    Uncompressed files keep the repo's indented JSON; returns the path written
+    """
+    compression = resolve_compression(compression)
+    path += SUFFIXES[compression]
+    if compression == "none":
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+    else:
+        with open(path, 'wb') as f:
+            f.write(encode(data, compression))
+    return path
+
+
+def existing_path(path: str) -> Optional[str]:
+    """`path` or its compressed variant, whichever exists"""
+    for suffix in SUFFIXES.values():
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return None
+
+
+def read_file(path: str) -> Any:
+    """Read a file written by write_file(), given its uncompressed name"""
+    found = existing_path(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    with open(found, 'rb') as f:
+        return decode(f.read())
@@ -1,9 +1,19 @@
-from typing import List, Dict, Optional
+from typing import Awaitable, Callable, List, Dict, Optional
 from profile import UserProfile
 from llm_client import LLMClient
+from conversation_memory import ConversationMemory
+from retrieval import BM25Index
+from records import HistoryEntry, EmotionEntry
+from json_stream import StringFieldStream
+from cancellation import SimulationCancelled
 import json
 import re
 
+# Memory kept when a summary call fails: the day's last few exchanges, capped in length
+# so repeated failures can't grow the prompt
+_FALLBACK_EXCHANGES = 3
+_MAX_FALLBACK_MEMORY_CHARS = 1200
+
 class EmotionalState:
     """Track emotional state and fondness during interactions"""
 
@@ -12,18 +22,18 @@ class EmotionalState:
         self.name = name
         self.current_emotion = "curious"
         self.fondness_level = Config.STARTING_FONDNESS  # 0-100 scale (configurable)
-        self.history: List[Dict] = []
+        self.history: List[EmotionEntry] = []
 
     def update(self, emotion: str, fondness_change: int = 0, context: str = ""):
         """Update emotional state"""
         self.current_emotion = emotion
         self.fondness_level = max(0, min(100, self.fondness_level + fondness_change))
-        self.history.append({
-            "emotion": emotion,
-            "fondness_level": self.fondness_level,
-            "fondness_change": fondness_change,
-            "context": context
-        })
+        self.history.append(EmotionEntry(
+            emotion=emotion,
+            fondness_level=self.fondness_level,
+            fondness_change=fondness_change,
+            context=context
+        ))
 
     def get_fondness_description(self) -> str:
         """Get a description of current fondness level"""
@@ -43,12 +53,55 @@ class DigitalTwin:
     """Digital twin agent that embodies a user's personality"""
 
     def __init__(self, profile: UserProfile, llm_client: LLMClient):
+        from config import Config
         self.profile = profile
         self.llm = llm_client
         self.emotional_state = EmotionalState(profile.name)
-        self.conversation_history: List[Dict] = []
+        self.conversation_history: List[HistoryEntry] = []
         self.partner_name: Optional[str] = None
         self.partner_profile: Optional[UserProfile] = None
+        self.memory = ConversationMemory(Config.MEMORY_MAX_DAY_SUMMARIES)
+        self.prompt_tokens_by_day: Dict[int, List[int]] = {}
+
+        # Optional keyword index over older turns (used for long user chats)
+        self.retrieval_index: Optional[BM25Index] = None
+        self.retrieval_top_k = 0
+
+    def enable_retrieval(self, top_k: int = 3):
+        """Index past turns so each reply can recall relevant older messages"""
+        self.retrieval_index = BM25Index()
+        self.retrieval_top_k = top_k
+        for i, entry in enumerate(self.conversation_history):
+            self._index_entry(i, entry)
+
+    def checkpoint_delta(self, day: int, history_start: int, emotion_start: int) -> Dict:
+        """
+        What changed since the previous checkpoint: history/emotion entries from the
+        given offsets onwards, plus the end-of-day state that is cheap to copy whole
+        """
+        return {
+            "history": [entry.to_dict() for entry in self.conversation_history[history_start:]],
+            "emotions": [entry.to_dict() for entry in self.emotional_state.history[emotion_start:]],
+            "fondness_level": self.emotional_state.fondness_level,
+            "current_emotion": self.emotional_state.current_emotion,
+            "memory": self.memory.to_dict(),
+            "prompt_tokens": self.prompt_tokens_by_day.get(day, [])
+        }
+
+    def restore_checkpoints(self, deltas: List[Dict], first_day: int = 1):
+        """Rebuild this twin's state from consecutive checkpoint deltas (day first_day onwards)"""
+        for day, delta in enumerate(deltas, start=first_day):
+            for entry in delta["history"]:
+                self._add_history_entry(HistoryEntry.from_dict(entry))
+            self.emotional_state.history.extend(EmotionEntry.from_dict(entry) for entry in delta["emotions"])
+            if delta["prompt_tokens"]:
+                self.prompt_tokens_by_day[day] = list(delta["prompt_tokens"])
+
+        if deltas:
+            last = deltas[-1]
+            self.emotional_state.fondness_level = last["fondness_level"]
+            self.emotional_state.current_emotion = last["current_emotion"]
+            self.memory.load_dict(last["memory"])
 
     def set_partner(self, partner_name: str, partner_profile: Optional[UserProfile] = None):
         """Set the partner's name and profile for context"""
@@ -69,10 +122,45 @@ class DigitalTwin:
             'internal_thought': what they're thinking
         }
         """
+        request = self._response_request(partner_message, context, day)
+        response_text = self._generate_for_day(day, **request)
+        return self._apply_response(response_text, partner_message, context, day)
 
+    async def respond_to_message_async(
+        self,
+        partner_message: str,
+        context: str = "texting",
+        day: int = 1,
+        on_text: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Dict[str, str]:
+        """
+        respond_to_message() that awaits the LLM instead of blocking a thread
+        With on_text, the reply is streamed and on_text receives each new piece of
+        the message as it is generated; the returned dict is still the final word
+        """
+        request = self._response_request(partner_message, context, day)
+        if on_text is None:
+            response_text = await self.llm.agenerate(**request)
+        else:
+            message = StringFieldStream("message")
+            chunks = []
+            async for chunk in self.llm.astream(**request):
+                chunks.append(chunk)
+                text = message.feed(chunk)
+                if text:
+                    await on_text(text)
+            response_text = "".join(chunks)
+        self._record_prompt_tokens(day, request)
+        return self._apply_response(response_text, partner_message, context, day)
+
+    def _response_request(self, partner_message: str, context: str, day: int) -> Dict:
+        """LLM arguments for replying to a message, built from the current state"""
         # Build conversation context
         from config import Config
-        recent_history = self._get_recent_history(5)
+        recent_history = self._get_recent_history(Config.MEMORY_RECENT_TURNS)
+        memory_text = self._get_memory_context() + self._get_retrieved_context(
+            partner_message, Config.MEMORY_RECENT_TURNS
+        )
 
         # Build forced evaluation instruction if enabled
         forced_eval_text = ""
@@ -92,14 +180,14 @@ class DigitalTwin:
             # Add previous interaction context
             if self.conversation_history:
                 last_interaction = self.conversation_history[-1]
-                last_thought = last_interaction.get("internal_thought", "")
-                last_fondness_change = self.emotional_state.history[-1]["fondness_change"] if self.emotional_state.history else 0
+                last_thought = last_interaction.internal_thought
+                last_fondness_change = self.emotional_state.history[-1].fondness_change if self.emotional_state.history else 0
                 previous_context = EmotionalToneGuidelines.get_previous_context(last_thought, last_fondness_change)
 
         prompt = f"""Day {day}, {context}
 
 They said: "{partner_message}"
-
+{memory_text}
 Recent chat:
 {recent_history}
 
@@ -115,15 +203,17 @@ JSON format:
     "fondness_change": integer from -10 to +10 based on how you feel about their message
 }}"""
 
-        system_prompt = self.profile.to_personality_prompt()
-
-        response_text = self.llm.generate(
-            system_prompt=system_prompt,
+        return dict(
+            system_prompt=self.profile.to_personality_prompt(),
             user_message=prompt,
             temperature=0.9,  # Higher temperature for more varied, emotional responses
             max_tokens=500
         )
 
+    def _apply_response(self, response_text: str, partner_message: str, context: str, day: int) -> Dict:
+        """Parse the LLM's reply and update fondness, emotion and history with it"""
+        from config import Config
+
         # Parse JSON response
         try:
             response_data = self._extract_json(response_text)
@@ -162,15 +252,15 @@ JSON format:
 
             # Add to conversation history
             message = response_data["message"]
-            self.conversation_history.append({
-                "day": day,
-                "context": context,
-                "partner_message": partner_message,
-                "my_response": message,
-                "emotion": response_data["emotion"],
-                "internal_thought": response_data["internal_thought"],
-                "fondness_level": self.emotional_state.fondness_level
-            })
+            self._add_history_entry(HistoryEntry(
+                day=day,
+                context=context,
+                partner_message=partner_message,
+                my_response=message,
+                emotion=response_data["emotion"],
+                internal_thought=response_data["internal_thought"],
+                fondness_level=self.emotional_state.fondness_level
+            ))
 
             # Update response data with potentially modified message and breakdown
             response_data["message"] = message
@@ -214,12 +304,14 @@ JSON format:
             # Add previous interaction context
             if self.conversation_history:
                 last_interaction = self.conversation_history[-1]
-                last_thought = last_interaction.get("internal_thought", "")
-                last_fondness_change = self.emotional_state.history[-1]["fondness_change"] if self.emotional_state.history else 0
+                last_thought = last_interaction.internal_thought
+                last_fondness_change = self.emotional_state.history[-1].fondness_change if self.emotional_state.history else 0
                 previous_context = EmotionalToneGuidelines.get_previous_context(last_thought, last_fondness_change)
 
-        prompt = f"""Day {day}, {context}. You're starting the conversation with {self.partner_name}.
+        memory_text = self._get_memory_context()
 
+        prompt = f"""Day {day}, {context}. You're starting the conversation with {self.partner_name}.
+{memory_text}
 You're feeling: {self.emotional_state.current_emotion}, fondness {self.emotional_state.fondness_level}/100
 
 Send a text. Keep it natural and casual.
@@ -234,7 +326,8 @@ JSON format:
 
         system_prompt = self.profile.to_personality_prompt()
 
-        response_text = self.llm.generate(
+        response_text = self._generate_for_day(
+            day,
             system_prompt=system_prompt,
             user_message=prompt,
             temperature=0.9,  # Higher temperature for more varied, emotional responses
@@ -250,15 +343,15 @@ JSON format:
                 context=f"Initiated conversation: {context}"
             )
 
-            self.conversation_history.append({
-                "day": day,
-                "context": context,
-                "partner_message": None,
-                "my_response": response_data["message"],
-                "emotion": response_data["emotion"],
-                "internal_thought": response_data["internal_thought"],
-                "fondness_level": self.emotional_state.fondness_level
-            })
+            self._add_history_entry(HistoryEntry(
+                day=day,
+                context=context,
+                partner_message=None,
+                my_response=response_data["message"],
+                emotion=response_data["emotion"],
+                internal_thought=response_data["internal_thought"],
+                fondness_level=self.emotional_state.fondness_level
+            ))
 
             return response_data
 
@@ -280,11 +373,158 @@ JSON format:
         recent = self.conversation_history[-n:]
         lines = []
         for entry in recent:
-            if entry.get("partner_message"):
-                lines.append(f"{self.partner_name}: {entry['partner_message']}")
-            lines.append(f"You: {entry['my_response']}")
+            if entry.partner_message:
+                lines.append(f"{self.partner_name}: {entry.partner_message}")
+            lines.append(f"You: {entry.my_response}")
         return "\n".join(lines)
 
+    def _add_history_entry(self, entry: HistoryEntry):
+        """Append a turn to the conversation history and the keyword index"""
+        self.conversation_history.append(entry)
+        if self.retrieval_index is not None:
+            self._index_entry(len(self.conversation_history) - 1, entry)
+
+    def _index_entry(self, position: int, entry: HistoryEntry):
+        """Add one history entry to the keyword index"""
+        text = f"{entry.partner_message or ''} {entry.my_response}"
+        self.retrieval_index.add(position, text)
+
+    def _get_retrieved_context(self, query: str, recent_n: int) -> str:
+        """Older turns relevant to the query, skipping what's already in the recent window"""
+        if self.retrieval_index is None or not self.retrieval_top_k:
+            return ""
+
+        recent_start = len(self.conversation_history) - recent_n
+        if recent_start <= 0:
+            return ""
+
+        exclude = set(range(recent_start, len(self.conversation_history)))
+        hits = self.retrieval_index.search(query, self.retrieval_top_k, exclude)
+        if not hits:
+            return ""
+
+        lines = []
+        for position in sorted(doc_id for doc_id, _ in hits):
+            entry = self.conversation_history[position]
+            if entry.partner_message:
+                lines.append(f"{self.partner_name}: {entry.partner_message}")
+            lines.append(f"You: {entry.my_response}")
+        return "\nEarlier in your chat (may be relevant):\n" + "\n".join(lines) + "\n"
+
+    def _get_memory_context(self) -> str:
+        """Get the summaries of earlier days as a prompt section (empty if none yet)"""
+        remembered = self.memory.format()
+        if not remembered:
+            return ""
+        return f"\nWhat you remember from earlier days:\n{remembered}\n"
+
+    def _generate_for_day(self, day: int, **kwargs) -> str:
+        """Call the LLM and record the prompt size for the given day"""
+        response_text = self.llm.generate(**kwargs)
+        self._record_prompt_tokens(day, kwargs)
+        return response_text
+
+    def _record_prompt_tokens(self, day: int, request: Dict):
+        """Record the prompt size of the LLM call just made for `request`"""
+        usage = self.llm.last_usage
+        if usage:
+            prompt_tokens = usage["prompt_tokens"]
+        else:
+            # Rough estimate when the provider doesn't report usage
+            prompt_tokens = (len(request["system_prompt"]) + len(request["user_message"])) // 4
+        self.prompt_tokens_by_day.setdefault(day, []).append(prompt_tokens)
+
+    def get_prompt_token_stats(self) -> Dict[int, int]:
+        """Average prompt tokens per conversation turn, by day"""
+        return {
+            day: sum(counts) // len(counts)
+            for day, counts in sorted(self.prompt_tokens_by_day.items())
+            if counts
+        }
+
+    def summarize_day(self, day: int) -> str:
+        """
+        Summarize one finished day from this twin's point of view.
+        The summary is generated once and cached; older summaries are folded
+        together so the memory never grows past the configured number of days.
+        """
+        if self.memory.has_day(day):
+            return self.memory.day_summaries.get(day, self.memory.earlier_summary)
+
+        entries = [entry for entry in self.conversation_history if entry.day == day]
+        if not entries:
+            return ""
+
+        lines = []
+        for entry in entries:
+            if entry.partner_message:
+                lines.append(f"{self.partner_name}: {entry.partner_message}")
+            lines.append(f"You: {entry.my_response} (thinking: {entry.internal_thought})")
+
+        prompt = f"""Here is everything from day {day} with {self.partner_name}:
+
+{chr(10).join(lines)}
+
+Your fondness is now {self.emotional_state.fondness_level}/100.
+
+Write 2-3 sentences in first person about what you'll remember from today: topics, plans, anything that stood out (good or bad). No preamble."""
+
+        try:
+            summary = self.llm.generate(
+                system_prompt=self.profile.to_personality_prompt(),
+                user_message=prompt,
+                temperature=0.3,
+                max_tokens=150
+            )
+        except SimulationCancelled:
+            raise
+        except Exception as e:
+            # Remember the end of the day as it was said rather than lose the day
+            print(f"⚠️  Day {day} summary failed for {self.profile.name}, keeping the last messages: {str(e)}")
+            summary = self._fallback_day_summary(day, entries)
+        self.memory.add_day_summary(day, summary)
+
+        while self.memory.needs_folding():
+            self._fold_oldest_day()
+
+        return self.memory.day_summaries.get(day, summary.strip())
+
+    def _fold_oldest_day(self):
+        """Merge the oldest day summary into the rolling summary of earlier days"""
+        day, summary = self.memory.pop_oldest_day()
+
+        if not self.memory.earlier_summary:
+            self.memory.set_earlier_summary(summary, [day])
+            return
+
+        prompt = f"""Combine these memories of {self.partner_name} into 2-3 sentences in first person. Keep the most important details.
+
+Earlier: {self.memory.earlier_summary}
+Day {day}: {summary}"""
+
+        try:
+            merged = self.llm.generate(
+                system_prompt=self.profile.to_personality_prompt(),
+                user_message=prompt,
+                temperature=0.3,
+                max_tokens=150
+            )
+        except SimulationCancelled:
+            raise
+        except Exception as e:
+            print(f"⚠️  Memory folding failed for {self.profile.name}, appending day {day} as is: {str(e)}")
+            merged = f"{self.memory.earlier_summary}\nDay {day}: {summary}"[-_MAX_FALLBACK_MEMORY_CHARS:]
+        self.memory.set_earlier_summary(merged, [day])
+
+    def _fallback_day_summary(self, day: int, entries: List[HistoryEntry]) -> str:
+        """A day's last few exchanges verbatim, used when the summary call fails"""
+        lines = []
+        for entry in entries[-_FALLBACK_EXCHANGES:]:
+            if entry.partner_message:
+                lines.append(f"{self.partner_name}: {entry.partner_message}")
+            lines.append(f"You: {entry.my_response}")
+        return "(last messages) " + "\n".join(lines)[-_MAX_FALLBACK_MEMORY_CHARS:]
+
     def _extract_json(self, text: str) -> Dict:
         """Extract JSON from LLM response"""
         # Try to find JSON in the response
@@ -308,6 +548,7 @@ YOUR CURRENT STATE:
 - Final fondness level: {self.emotional_state.fondness_level}/100
 - Overall feeling: {self.emotional_state.get_fondness_description()}
 
+{self._get_memory_context()}
 CONVERSATION HIGHLIGHTS:
 {self._get_recent_history(10)}
 
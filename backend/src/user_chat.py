@@ -1,10 +1,14 @@
-from typing import List, Dict
+from typing import Awaitable, Callable, List, Dict, Optional
 from profile import UserProfile
 from twin import DigitalTwin
 from llm_client import LLMClient
+from records import EmotionEntry, HistoryEntry
+from config import Config
 from datetime import datetime
-import json
 import os
+import uuid
+
+import transcript_codec
 
 class UserTwinChat:
     """Manages a chat conversation between a user and a digital twin"""
@@ -15,7 +19,10 @@ class UserTwinChat:
         self.llm = LLMClient()
         self.twin = DigitalTwin(profile, self.llm)
         self.twin.set_partner(user_name)
-        self.chat_id = f"chat_{profile.name.lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.twin.enable_retrieval(Config.CHAT_RETRIEVAL_TOP_K)
+        # The suffix keeps chats with one profile started in the same second apart (their logs are durable)
+        self.chat_id = (f"chat_{profile.name.lower().replace(' ', '_')}_"
+                        f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}")
         self.conversation: List[Dict] = []
 
     def send_message(self, user_message: str, context: str = "texting") -> Dict:
@@ -40,7 +47,28 @@ class UserTwinChat:
             context=context,
             day=len(self.conversation) // 10 + 1  # Rough day estimation
         )
+        return self._record_exchange(user_message, response)
+
+    async def send_message_async(
+        self,
+        user_message: str,
+        context: str = "texting",
+        on_text: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Dict:
+        """
+        send_message() for the API: awaits the LLM on the shared async client
+        on_text, if given, receives the reply's message as it streams in
+        Callers must not send to the same chat concurrently (ChatSessionManager.use_async)
+        """
+        response = await self.twin.respond_to_message_async(
+            partner_message=user_message,
+            context=context,
+            day=len(self.conversation) // 10 + 1,
+            on_text=on_text
+        )
+        return self._record_exchange(user_message, response)
 
+    def _record_exchange(self, user_message: str, response: Dict) -> Dict:
         # Save the exchange
         exchange = {
             "timestamp": datetime.now().isoformat(),
@@ -57,6 +85,33 @@ class UserTwinChat:
         self.conversation.append(exchange)
         return exchange
 
+    def to_state(self) -> Dict:
+        """Everything needed to rebuild this chat in another process or after eviction"""
+        return {
+            "chat_id": self.chat_id,
+            "profile": self.profile.model_dump(mode="json"),
+            "user_name": self.user_name,
+            "conversation": self.conversation,
+            # The whole chat as one checkpoint delta, so restore_checkpoints() can rebuild it
+            "twin": self.twin.checkpoint_delta(1, 0, 0),
+            "prompt_tokens_by_day": self.twin.prompt_tokens_by_day
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'UserTwinChat':
+        """Rebuild a chat saved with to_state()"""
+        chat = cls(UserProfile(**state["profile"]), state["user_name"])
+        chat.chat_id = state["chat_id"]
+        chat.conversation = state["conversation"]
+        chat.twin.restore_checkpoints([state["twin"]])
+        chat.twin.prompt_tokens_by_day = {
+            int(day): tokens for day, tokens in state.get("prompt_tokens_by_day", {}).items()
+        }
+        return chat
+
+    def close(self):
+        self.llm.close()
+
     def get_conversation_history(self) -> List[Dict]:
         """Get the full conversation history"""
         return self.conversation
@@ -67,12 +122,12 @@ class UserTwinChat:
 
     def get_fondness_history(self) -> List[Dict]:
         """Get the history of fondness changes"""
-        return self.twin.emotional_state.history
+        return [entry.to_dict() for entry in self.twin.emotional_state.history]
 
     def save_chat(self, directory: str = "chats") -> str:
-        """Save the chat to a JSON file"""
+        """Save the finished chat (written with TRANSCRIPT_COMPRESSION, like simulation outputs)"""
         os.makedirs(directory, exist_ok=True)
-        filepath = os.path.join(directory, f"{self.chat_id}.json")
+        state = self.to_state()
 
         chat_data = {
             "chat_id": self.chat_id,
@@ -81,21 +136,25 @@ class UserTwinChat:
             "start_time": self.conversation[0]["timestamp"] if self.conversation else None,
             "conversation": self.conversation,
             "final_fondness": self.twin.emotional_state.fondness_level,
-            "message_count": len(self.conversation)
+            "message_count": len(self.conversation),
+            # Full twin state so load_chat() can continue the chat exactly
+            "profile": state["profile"],
+            "twin": state["twin"],
+            "prompt_tokens_by_day": state["prompt_tokens_by_day"]
         }
 
-        with open(filepath, 'w') as f:
-            json.dump(chat_data, f, indent=2)
-
-        return filepath
+        return transcript_codec.write_file(os.path.join(directory, f"{self.chat_id}.json"), chat_data)
 
     @classmethod
     def load_chat(cls, filepath: str) -> 'UserTwinChat':
         """Load a saved chat from file"""
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        with open(filepath, 'rb') as f:
+            data = transcript_codec.decode(f.read())
+
+        if "twin" in data:
+            return cls.from_state(data)
 
-        # Reconstruct the profile (you'd need to load it from profiles directory)
+        # Older saves only have the conversation: rebuild the twin's history from it
         profile_name = data["profile_name"]
         profile = UserProfile.load(f"profiles/{profile_name.lower().replace(' ', '_')}.json")
 
@@ -103,8 +162,28 @@ class UserTwinChat:
         chat.chat_id = data["chat_id"]
         chat.conversation = data["conversation"]
 
-        # Restore twin's fondness level
-        if data.get("final_fondness"):
-            chat.twin.emotional_state.fondness_level = data["final_fondness"]
+        twin = chat.twin
+        for i, exchange in enumerate(chat.conversation):
+            response = exchange["twin_response"]
+            twin.emotional_state.history.append(EmotionEntry(
+                emotion=response["emotion"],
+                fondness_level=response["fondness_level"],
+                fondness_change=response["fondness_change"],
+                context=f"Responded to: {exchange['user_message'][:50]}..."
+            ))
+            twin._add_history_entry(HistoryEntry(
+                day=i // 10 + 1,
+                context="texting",
+                partner_message=exchange["user_message"],
+                my_response=response["message"],
+                emotion=response["emotion"],
+                internal_thought=response["internal_thought"],
+                fondness_level=response["fondness_level"]
+            ))
+
+        if chat.conversation:
+            twin.emotional_state.current_emotion = chat.conversation[-1]["twin_response"]["emotion"]
+        if data.get("final_fondness") is not None:
+            twin.emotional_state.fondness_level = data["final_fondness"]
 
         return chat
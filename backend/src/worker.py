@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Auralie simulation worker
+Pulls DatingSimulation jobs from the durable job queue and runs them.
+
+Run from the backend directory:
+    python src/worker.py                 One worker process
+    python src/worker.py --processes 4   Four worker processes on this machine
+"""
+
+from typing import Callable, Dict, Optional
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+
+from config import Config
+from cancellation import CancellationToken, SimulationCancelled
+from job_queue import JobQueue
+from profile import UserProfile
+from simulator import DatingSimulation
+import transcript_codec
+
+
+class SimulationWorker:
+    """Leases simulation jobs, runs them and reports progress back to the queue"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        worker_id: Optional[str] = None,
+        on_change: Optional[Callable[[str], None]] = None
+    ):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = Config.JOB_LEASE_SECONDS
+        # Called with the simulation_id after every status change (used by the API to wake long-polls)
+        self.on_change = on_change or (lambda simulation_id: None)
+        # Tokens of the jobs running in this worker, for in-process cancellation
+        self.active: Dict[str, CancellationToken] = {}
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None):
+        """Keep leasing and running jobs until stop_event is set"""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                ran = self.run_once()
+            except Exception as e:
+                print(f"⚠️  Worker {self.worker_id} error: {e}")
+                ran = False
+            if not ran:
+                stop_event.wait(Config.WORKER_POLL_SECONDS)
+
+    def run_once(self) -> bool:
+        """Lease and run one job; False if the queue was empty"""
+        job = self.queue.lease(self.worker_id, self.lease_seconds)
+        if job is None:
+            return False
+
+        self.on_change(job["simulation_id"])
+        self.run_job(job)
+        return True
+
+    def cancel(self, simulation_id: str) -> bool:
+        """Cancel a job running in this worker right away; False if it isn't ours"""
+        token = self.active.get(simulation_id)
+        if token is None:
+            return False
+        token.cancel("Cancelled by user")
+        return True
+
+    def run_job(self, job: Dict):
+        """Run a leased job to completion, keeping the lease alive meanwhile"""
+        simulation_id = job["simulation_id"]
+        payload = job["payload"]
+
+        token = CancellationToken()
+        self.active[simulation_id] = token
+
+        stop_watch = threading.Event()
+        watch = threading.Thread(
+            target=self._watch_loop,
+            args=(simulation_id, token, stop_watch),
+            daemon=True
+        )
+        watch.start()
+
+        def on_progress(event: Dict):
+            if self.queue.update_progress(simulation_id, self.worker_id, event):
+                self.on_change(simulation_id)
+
+        simulation = None
+        try:
+            profile1 = UserProfile(**payload["profile1"])
+            profile2 = UserProfile(**payload["profile2"])
+
+            options = dict(
+                progress_callback=on_progress,
+                simulation_id=simulation_id,
+                cancel_token=token
+            )
+            fork = payload.get("fork")
+            if fork:
+                simulation = DatingSimulation.fork(
+                    fork["parent_simulation_id"],
+                    fork["fork_day"],
+                    profile1,
+                    profile2,
+                    seed=payload.get("seed"),
+                    overrides=fork.get("overrides"),
+                    **options
+                )
+            else:
+                simulation = DatingSimulation(profile1, profile2, seed=payload.get("seed"), **options)
+            result = simulation.run_simulation()
+            if Config.SAVE_OUTPUT_FILES:
+                self.save_outputs(simulation_id, result)
+
+            completed = self.queue.complete(
+                simulation_id,
+                self.worker_id,
+                result.get("compatibility", {}).get("score", None),
+                result.get("completed_days", 0)
+            )
+            if not completed and self.queue.get(simulation_id) is None:
+                # Deleted while we were finishing up; don't bring the result back
+                simulation.store.delete(simulation_id)
+                if Config.SAVE_OUTPUT_FILES:
+                    self.remove_outputs(simulation_id)
+
+        except SimulationCancelled:
+            self.queue.mark_cancelled(simulation_id, self.worker_id)
+            if simulation is not None:
+                # Partial days saved before the cancel (or a delete) was noticed
+                simulation.store.delete(simulation_id)
+
+        except Exception as e:
+            self.queue.fail(simulation_id, self.worker_id, str(e))
+
+        finally:
+            stop_watch.set()
+            if simulation:
+                simulation.llm.close()
+            self.active.pop(simulation_id, None)
+            self.on_change(simulation_id)
+
+    def _watch_loop(self, simulation_id: str, token: CancellationToken, stop_event: threading.Event):
+        """Renew the lease and pick up cancellations requested through the queue"""
+        heartbeat_interval = max(1.0, self.lease_seconds / 3)
+        next_heartbeat = time.monotonic() + heartbeat_interval
+
+        while not stop_event.wait(Config.CANCEL_POLL_SECONDS):
+            if self.queue.is_cancel_requested(simulation_id):
+                token.cancel("Cancelled by user")
+                return
+
+            if time.monotonic() >= next_heartbeat:
+                next_heartbeat += heartbeat_interval
+                if not self.queue.heartbeat(simulation_id, self.worker_id, self.lease_seconds):
+                    print(f"⚠️  Worker {self.worker_id} lost the lease on {simulation_id}")
+                    token.cancel("Lease lost")
+                    return
+
+    @staticmethod
+    def save_outputs(simulation_id: str, result: Dict):
+        """
+        Write the JSON result to src/output (only with SAVE_OUTPUT_FILES); the API
+        serves results from the simulation store and renders transcripts on request
+        """
+        output_dir = "src/output"
+        os.makedirs(output_dir, exist_ok=True)
+
+        transcript_codec.write_file(f"{output_dir}/{simulation_id}.json", result)
+
+    @staticmethod
+    def remove_outputs(simulation_id: str):
+        """Delete the files written by save_outputs or by older versions, if any"""
+        for ext in [".txt"] + [f".json{suffix}" for suffix in transcript_codec.SUFFIXES.values()]:
+            filepath = f"src/output/{simulation_id}{ext}"
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+
+def run_worker_process(worker_id: Optional[str] = None):
+    """Entry point for one worker process"""
+    queue = JobQueue(Config.DATABASE_PATH, Config.JOB_MAX_ATTEMPTS, Config.MAX_INFLIGHT_PER_TENANT)
+    worker = SimulationWorker(queue, worker_id)
+    print(f"👷 Worker {worker.worker_id} polling {Config.DATABASE_PATH}")
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Auralie simulation workers")
+    parser.add_argument("--processes", type=int, default=1, help="Number of worker processes")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker_process()
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker_process, daemon=False)
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping workers")
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
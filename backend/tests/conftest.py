@@ -0,0 +1,52 @@
+"""
+Shared test setup
+The backend's modules import each other flat from src/, as they do when run
+from there, so that directory goes on the path before any of them is imported.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "src"))
+
+# LLMClient checks for a key when it is built; tests never reach the provider
+os.environ.setdefault("OPENROUTER_API_KEY", "test-key")
+
+PROFILES_DIR = os.path.join(BACKEND_DIR, "profiles")
+
+
+@pytest.fixture
+def profile():
+    from profile import UserProfile
+    return UserProfile.load(os.path.join(PROFILES_DIR, "maya_patel.json"))
+
+
+@pytest.fixture
+def profiles():
+    """Two sample profiles, for simulations"""
+    from profile import UserProfile
+    return [UserProfile.load(os.path.join(PROFILES_DIR, f"{name}.json")) for name in ("alex_kim", "maya_patel")]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Answer every sync LLM call with a numbered twin reply; returns the list of prompts"""
+    from llm_client import LLMClient
+    prompts = []
+
+    def generate(self, system_prompt, user_message, temperature=0.7, max_tokens=1000):
+        prompts.append(user_message)
+        self.last_usage = None
+        return json.dumps({
+            "message": f"reply {len(prompts)}",
+            "emotion": "happy",
+            "internal_thought": "going well",
+            "fondness_change": 2
+        })
+
+    monkeypatch.setattr(LLMClient, "generate", generate)
+    return prompts
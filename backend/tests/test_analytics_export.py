@@ -0,0 +1,56 @@
+"""Incremental export watermarks"""
+
+import json
+
+import pytest
+
+import analytics_export
+from simulation_store import SimulationStore
+
+
+def result(simulation_id, status="completed"):
+    return {
+        "simulation_id": simulation_id,
+        "participants": {"person1": "Alex Kim", "person2": "Maya Patel"},
+        "compatibility": {"score": 50.0, "rating": "Compatible"},
+        "final_assessment": {},
+        "start_time": "2026-01-01T10:00:00",
+        "status": status,
+        "days": []
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SimulationStore(str(tmp_path / "auralie.db"))
+
+
+def test_watermark_follows_commit_order_not_ids_or_timestamps(store):
+    store.save(result("sim_b"))
+    store.save(result("sim_a", status="in_progress"))
+    watermark = store.completed_after()[-1][0]
+
+    # Finishes after the export read sim_b, though its ID sorts first
+    store.save(result("sim_a"))
+
+    assert [simulation_id for _, simulation_id in store.completed_after(watermark)] == ["sim_a"]
+
+
+def test_export_runs_pick_up_only_new_simulations(store, tmp_path):
+    output = str(tmp_path / "turns.ndjson")
+    store.save(result("sim_1"))
+
+    assert analytics_export.export(store, "ndjson", output)["simulations"] == 1
+    assert analytics_export.export(store, "ndjson", output)["simulations"] == 0
+    store.save(result("sim_0"))
+    assert analytics_export.export(store, "ndjson", output)["simulations"] == 1
+
+
+def test_timestamp_watermark_from_older_state_file_carries_over(store, tmp_path):
+    output = str(tmp_path / "turns.ndjson")
+    store.save(result("sim_1"))
+    store.save(result("sim_2"))
+    with open(output + ".export-state.json", 'w') as f:
+        json.dump({"after": ["2026-01-01T10:00:00", "sim_1"], "simulations": 1, "rows": 0, "parts": 0}, f)
+
+    assert analytics_export.export(store, "ndjson", output)["simulations"] == 1
@@ -0,0 +1,41 @@
+"""Chat channel replay and resume"""
+
+from chat_channels import ChatChannels
+
+
+def send_reply(channels, chat_id, tokens):
+    channels.publish(chat_id, {"type": "reply_start", "id": "m"})
+    for i in range(tokens):
+        channels.publish(chat_id, {"type": "token", "id": "m", "text": f"{i} "})
+    channels.publish(chat_id, {"type": "reply", "id": "m", "message": "whole text"})
+
+
+def test_rest_only_chat_gets_no_channel():
+    channels = ChatChannels()
+
+    assert channels.publish("chat_1", {"type": "reply_start", "id": "m"}) is None
+    assert channels.stats()["channels"] == 0
+
+
+def test_long_replies_do_not_push_earlier_ones_out_of_replay():
+    channels = ChatChannels(replay_frames=4)
+    _, hello, _ = channels.subscribe("chat_1")
+    send_reply(channels, "chat_1", tokens=100)
+    send_reply(channels, "chat_1", tokens=100)
+
+    _, resumed, replay = channels.subscribe("chat_1", hello["stream"], hello["seq"])
+
+    assert resumed["resumed"]
+    assert [frame["type"] for frame in replay] == ["reply_start", "reply", "reply_start", "reply"]
+
+
+def test_resume_past_dropped_frames_is_refused():
+    channels = ChatChannels(replay_frames=2)
+    _, hello, _ = channels.subscribe("chat_1")
+    send_reply(channels, "chat_1", tokens=1)
+    send_reply(channels, "chat_1", tokens=1)
+
+    _, resumed, replay = channels.subscribe("chat_1", hello["stream"], hello["seq"])
+
+    assert not resumed["resumed"]
+    assert replay == []
@@ -0,0 +1,148 @@
+"""Chat logs: replay after a restart, torn last lines and compaction"""
+
+import os
+
+import pytest
+
+from chat_sessions import ChatSessionManager, replay
+from user_chat import UserTwinChat
+import transcript_codec
+
+
+def start_chat(manager, profile, messages=0):
+    chat = UserTwinChat(profile)
+    manager.add(chat)
+    for i in range(messages):
+        send(manager, chat, f"message {i}")
+    return chat
+
+
+def send(manager, chat, text):
+    chat.send_message(text)
+    manager.append(chat)
+
+
+def log_lines(manager, chat_id):
+    with open(manager._path(chat_id), 'rb') as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "sessions")
+
+
+def test_restart_replays_every_logged_message(directory, profile, fake_llm):
+    manager = ChatSessionManager(directory, compact_every=50)
+    chat = start_chat(manager, profile, messages=3)
+    fondness = chat.get_current_fondness()
+
+    restarted = ChatSessionManager(directory, compact_every=50)
+
+    assert restarted.stats()["unloaded"] == 1
+    assert restarted.list()[0]["message_count"] == 3
+    recovered = restarted.get(chat.chat_id)
+    assert [exchange["user_message"] for exchange in recovered.conversation] == ["message 0", "message 1", "message 2"]
+    assert recovered.get_current_fondness() == fondness
+    assert len(recovered.twin.conversation_history) == 3
+    assert restarted.stats()["rehydrations"] == 1
+
+
+def test_recovered_chat_keeps_logging(directory, profile, fake_llm):
+    manager = ChatSessionManager(directory)
+    chat = start_chat(manager, profile, messages=2)
+
+    restarted = ChatSessionManager(directory)
+    send(restarted, restarted.get(chat.chat_id), "after restart")
+
+    again = ChatSessionManager(directory).get(chat.chat_id)
+    assert [exchange["user_message"] for exchange in again.conversation][-1] == "after restart"
+    assert len(again.conversation) == 3
+
+
+def test_torn_last_line_is_dropped_and_log_rewritten(directory, profile, fake_llm):
+    manager = ChatSessionManager(directory)
+    chat = start_chat(manager, profile, messages=2)
+    with open(manager._path(chat.chat_id), 'ab') as f:
+        f.write(b'{"exchanges": [{"user_message": "never fini')  # Crashed mid-write
+
+    restarted = ChatSessionManager(directory)
+
+    assert len(log_lines(restarted, chat.chat_id)) == 1
+    assert len(restarted.get(chat.chat_id).conversation) == 2
+
+
+def test_corrupt_line_before_the_end_is_an_error(directory, profile, fake_llm):
+    manager = ChatSessionManager(directory)
+    chat = start_chat(manager, profile, messages=2)
+    lines = log_lines(manager, chat.chat_id)
+
+    with pytest.raises(ValueError):
+        replay([lines[0], b'{"broken', lines[1]])
+
+
+def test_unreadable_log_is_skipped_on_recovery(directory, profile, fake_llm):
+    manager = ChatSessionManager(directory)
+    chat = start_chat(manager, profile, messages=1)
+    with open(os.path.join(directory, "chat_garbage.jsonl"), 'wb') as f:
+        f.write(b"not json\n")
+
+    restarted = ChatSessionManager(directory)
+
+    assert chat.chat_id in restarted
+    assert "chat_garbage" not in restarted
+
+
+def test_log_is_compacted_every_compact_every_messages(directory, profile, fake_llm):
+    manager = ChatSessionManager(directory, compact_every=3)
+    chat = start_chat(manager, profile)
+
+    for i in range(7):
+        send(manager, chat, f"message {i}")
+        assert len(log_lines(manager, chat.chat_id)) <= 3
+
+    # Snapshots at messages 3 and 6, then message 7 appended
+    assert manager.stats()["compactions"] == 2
+    state, appended, torn = replay(log_lines(manager, chat.chat_id))
+    assert len(state["conversation"]) == 7
+    assert appended == 1
+    assert not torn
+    assert len(ChatSessionManager(directory, compact_every=3).get(chat.chat_id).conversation) == 7
+
+
+def test_unloading_compacts_so_rehydration_reads_one_line(directory, profile, fake_llm):
+    manager = ChatSessionManager(directory, max_resident=1)
+    first = start_chat(manager, profile, messages=2)
+
+    start_chat(manager, profile)  # Pushes the first chat out of memory
+
+    stats = manager.stats()
+    assert (stats["resident"], stats["unloaded"], stats["unloads"]) == (1, 1, 1)
+    assert len(log_lines(manager, first.chat_id)) == 1
+    assert len(manager.get(first.chat_id).conversation) == 2
+
+
+def test_compaction_after_unload_skips_a_chat_reloaded_in_between(directory, profile, fake_llm):
+    manager = ChatSessionManager(directory)
+    chat = start_chat(manager, profile, messages=2)
+    with manager._lock:
+        unloaded = manager._unload(chat.chat_id)
+
+    send(manager, manager.get(chat.chat_id), "while the log was waiting")
+    manager._compact_unloaded([unloaded])  # Its state is now stale; writing it would lose the message
+
+    assert len(ChatSessionManager(directory).get(chat.chat_id).conversation) == 3
+
+
+def test_add_refuses_an_existing_chat_id(directory, profile, fake_llm):
+    manager = ChatSessionManager(directory)
+    chat = start_chat(manager, profile, messages=1)
+    duplicate = UserTwinChat(profile)
+    duplicate.chat_id = chat.chat_id
+
+    with pytest.raises(ValueError):
+        manager.add(duplicate)
+    with pytest.raises(ValueError):
+        ChatSessionManager(directory).add(duplicate)
+    assert len(transcript_codec.loads(log_lines(manager, chat.chat_id)[0])["state"]["conversation"]) == 0
+    assert len(ChatSessionManager(directory).get(chat.chat_id).conversation) == 1
@@ -0,0 +1,92 @@
+"""Leasing, heartbeats and lease expiry in the durable job queue"""
+
+import pytest
+
+from job_queue import JobQueue
+
+
+def payload(profile1_id="alex_kim", profile2_id="maya_patel"):
+    return {
+        "profile1_id": profile1_id,
+        "profile2_id": profile2_id,
+        "profile1": {"name": profile1_id.replace("_", " ").title()},
+        "profile2": {"name": profile2_id.replace("_", " ").title()},
+        "seed": 7
+    }
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), max_attempts=2, max_inflight_per_tenant=2)
+
+
+def test_lease_claims_pending_job(queue):
+    queue.enqueue("sim_1", payload())
+
+    job = queue.lease("worker_a", lease_seconds=60)
+
+    assert job["simulation_id"] == "sim_1"
+    assert job["status"] == "running"
+    assert job["worker_id"] == "worker_a"
+    assert job["attempts"] == 1
+    assert job["payload"]["seed"] == 7
+    assert queue.lease("worker_b", lease_seconds=60) is None
+
+
+def test_expired_lease_is_handed_to_next_worker(queue):
+    queue.enqueue("sim_1", payload())
+    queue.lease("worker_a", lease_seconds=-1)  # Expired as soon as it is taken
+
+    job = queue.lease("worker_b", lease_seconds=60)
+
+    assert job["simulation_id"] == "sim_1"
+    assert job["worker_id"] == "worker_b"
+    assert job["attempts"] == 2
+
+
+def test_heartbeat_from_previous_holder_is_refused(queue):
+    queue.enqueue("sim_1", payload())
+    queue.lease("worker_a", lease_seconds=-1)
+    queue.lease("worker_b", lease_seconds=60)
+
+    assert not queue.heartbeat("sim_1", "worker_a", lease_seconds=60)
+    assert queue.heartbeat("sim_1", "worker_b", lease_seconds=60)
+    assert queue.get("sim_1")["worker_id"] == "worker_b"
+
+
+def test_heartbeat_renews_expired_lease_before_anyone_takes_it(queue):
+    queue.enqueue("sim_1", payload())
+    queue.lease("worker_a", lease_seconds=-1)
+
+    assert queue.heartbeat("sim_1", "worker_a", lease_seconds=60)
+    assert queue.lease("worker_b", lease_seconds=60) is None
+
+
+def test_job_fails_after_losing_its_worker_max_attempts_times(queue):
+    queue.enqueue("sim_1", payload())
+    queue.lease("worker_a", lease_seconds=-1)
+    queue.lease("worker_b", lease_seconds=-1)
+
+    assert queue.lease("worker_c", lease_seconds=60) is None
+    job = queue.get("sim_1")
+    assert job["status"] == "failed"
+    assert job["worker_id"] is None
+
+
+def test_cancel_requested_while_lease_expired_is_not_leased_again(queue):
+    queue.enqueue("sim_1", payload())
+    queue.lease("worker_a", lease_seconds=-1)
+    assert queue.cancel("sim_1") == "running"
+
+    assert queue.lease("worker_b", lease_seconds=60) is None
+    assert queue.get("sim_1")["status"] == "cancelled"
+
+
+def test_complete_requires_current_lease_holder(queue):
+    queue.enqueue("sim_1", payload())
+    queue.lease("worker_a", lease_seconds=-1)
+    queue.lease("worker_b", lease_seconds=60)
+
+    assert not queue.complete("sim_1", "worker_a", 50.0, 3)
+    assert queue.complete("sim_1", "worker_b", 50.0, 3)
+    assert queue.get("sim_1")["status"] == "completed"
@@ -0,0 +1,73 @@
+"""Incremental decoding of one string field from streamed JSON"""
+
+import json
+
+import pytest
+
+from json_stream import StringFieldStream
+
+
+def feed_all(stream, text, size):
+    return "".join(stream.feed(text[i:i + size]) for i in range(0, len(text), size))
+
+
+REPLY = {
+    "message": 'Hi! "Quoted", a\\backslash, tab\there,\nnew line, café, emoji \U0001F600 done',
+    "emotion": "happy",
+    "internal_thought": "The message field is not first in every reply"
+}
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 64, 10000])
+def test_any_chunking_decodes_like_json(size):
+    text = json.dumps(REPLY)  # \u escapes, including a surrogate pair for the emoji
+
+    stream = StringFieldStream("message")
+
+    assert feed_all(stream, text, size) == REPLY["message"]
+    assert stream.done
+
+
+@pytest.mark.parametrize("size", [1, 7])
+def test_unescaped_unicode_and_later_field(size):
+    text = json.dumps({"emotion": "curious", "message": REPLY["message"]}, ensure_ascii=False)
+
+    assert feed_all(StringFieldStream("message"), text, size) == REPLY["message"]
+
+
+def test_escape_split_across_chunks_waits_for_the_rest():
+    stream = StringFieldStream("message")
+
+    assert stream.feed('{"message": "a\\') == "a"
+    assert stream.feed('u00') == ""
+    assert stream.feed('e9b\\') == "éb"
+    assert stream.feed('n"') == "\n"
+    assert stream.done
+
+
+def test_key_split_across_chunks_and_whitespace():
+    stream = StringFieldStream("message")
+
+    assert stream.feed('{"mess') == ""
+    assert stream.feed('age"  :\n ') == ""
+    assert stream.feed('"hello') == "hello"
+
+
+def test_nothing_after_the_closing_quote():
+    stream = StringFieldStream("message")
+
+    assert stream.feed('{"message": "done", "emotion": "x"') == "done"
+    assert stream.feed(', "message": "again"}') == ""
+
+
+def test_field_never_present():
+    stream = StringFieldStream("message")
+
+    assert stream.feed('{"emotion": "happy", "internal_thought": "message"}') == ""
+    assert not stream.done
+
+
+def test_malformed_escape_is_shown_as_written():
+    stream = StringFieldStream("message")
+
+    assert stream.feed('{"message": "bad \\uzzzz end"}') == "bad \\uzzzz end"
@@ -0,0 +1,29 @@
+"""Profile IDs that are safe to use as file names"""
+
+import os
+
+import pytest
+
+from profile_repository import ProfileRepository, valid_profile_id
+
+
+@pytest.mark.parametrize("profile_id", ["maya_patel", "ryan_o'brien", "josé_núñez", "a.b"])
+def test_plain_names_are_valid(profile_id):
+    assert valid_profile_id(profile_id)
+
+
+@pytest.mark.parametrize("profile_id", ["", ".", "..", ".hidden", "../evil", "a/b", "a\\b", "a\0b", "x" * 201])
+def test_names_that_leave_the_directory_are_invalid(profile_id):
+    assert not valid_profile_id(profile_id)
+
+
+def test_save_many_writes_nothing_if_any_id_is_unsafe(tmp_path, profile):
+    directory = tmp_path / "profiles"
+    repository = ProfileRepository(str(directory))
+    evil = profile.model_copy(update={"name": "../../evil"})
+
+    with pytest.raises(ValueError):
+        repository.save_many([profile, evil])
+
+    assert not os.path.exists(directory) or os.listdir(directory) == []
+    assert not os.path.exists(tmp_path / "evil.json")
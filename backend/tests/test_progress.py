@@ -0,0 +1,29 @@
+"""Progress versions across evicted and forgotten keys"""
+
+import asyncio
+
+from progress import ProgressBroker
+
+
+def test_a_forgotten_key_comes_back_newer_than_before():
+    broker = ProgressBroker()
+    seen = [broker.publish("sim_1") for _ in range(3)][-1]
+
+    broker.forget("sim_1")
+
+    assert broker.publish("sim_1") > seen
+
+
+def test_waiter_wakes_after_its_key_was_evicted():
+    broker = ProgressBroker(max_keys=1)
+
+    async def scenario():
+        seen = broker.publish("sim_1")
+        broker.publish("sim_2")  # Evicts sim_1
+        waiter = asyncio.ensure_future(broker.wait("sim_1", seen, timeout=5))
+        await asyncio.sleep(0)
+        broker.publish("sim_1")
+        return seen, await waiter
+
+    seen, version = asyncio.run(scenario())
+    assert version > seen
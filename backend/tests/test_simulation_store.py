@@ -0,0 +1,86 @@
+"""Keyset pagination over saved simulations and queued jobs"""
+
+import pytest
+
+from job_queue import JobQueue
+from simulation_store import SimulationStore
+
+
+def result(simulation_id, start_time, score, person1="Alex Kim", person2="Maya Patel"):
+    return {
+        "simulation_id": simulation_id,
+        "participants": {"person1": person1, "person2": person2},
+        "compatibility": {"score": score, "rating": "Compatible"},
+        "start_time": start_time,
+        "status": "completed",
+        "days": []
+    }
+
+
+def walk(store, limit, **filters):
+    """Every row, fetched `limit` at a time by following each page's last row"""
+    rows, after = [], None
+    while True:
+        page = store.page(after=after, limit=limit, **filters)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = (page[-1]["sort_value"], page[-1]["simulation_id"])
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SimulationStore(str(tmp_path / "auralie.db"))
+    scores = [62.0, 48.5, 71.0, 48.5, 55.0, 80.0, 39.0]
+    for i, score in enumerate(scores):
+        # Pairs of simulations share a start time so the id tie-break is exercised
+        store.save(result(f"sim_{i}", f"2026-01-01T10:00:0{i // 2}", score))
+    return store
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 10])
+def test_created_at_pages_cover_every_row_once_in_order(store, limit):
+    rows = walk(store, limit)
+
+    ids = [row["simulation_id"] for row in rows]
+    assert ids == ["sim_6", "sim_5", "sim_4", "sim_3", "sim_2", "sim_1", "sim_0"]
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_score_pages_break_ties_by_id(store, descending):
+    rows = walk(store, 2, sort="compatibility_score", descending=descending)
+
+    keys = [(row["compatibility_score"], row["simulation_id"]) for row in rows]
+    assert keys == sorted(keys, reverse=descending)
+    assert len(keys) == 7
+
+
+def test_pages_respect_filters(store):
+    store.save(result("sim_other", "2026-01-01T10:00:09", 90.0, person1="Jordan Lee"))
+
+    rows = walk(store, 2, profile_id="jordan_lee")
+    assert [row["simulation_id"] for row in rows] == ["sim_other"]
+
+    rows = walk(store, 2, min_score=50, sort="compatibility_score", descending=False)
+    assert [row["compatibility_score"] for row in rows] == [55.0, 62.0, 71.0, 80.0, 90.0]
+
+
+def test_pages_merge_queued_jobs_without_duplicates(tmp_path):
+    db_path = str(tmp_path / "auralie.db")
+    queue = JobQueue(db_path)
+    store = SimulationStore(db_path)
+    store.save(result("sim_cli", "2026-01-01T09:00:00", 50.0))
+    for simulation_id in ["sim_a", "sim_b", "sim_cli"]:
+        # sim_cli is also in the queue (e.g. saved by its worker) and must be listed once
+        queue.enqueue(simulation_id, {
+            "profile1_id": "alex_kim", "profile2_id": "maya_patel",
+            "profile1": {"name": "Alex Kim"}, "profile2": {"name": "Maya Patel"}, "seed": 1
+        })
+    store.save(result("sim_saved_only", "2026-01-01T08:00:00", 60.0))
+
+    rows = walk(store, 1)
+
+    ids = [row["simulation_id"] for row in rows]
+    assert sorted(ids) == ["sim_a", "sim_b", "sim_cli", "sim_saved_only"]
+    assert ids[-1] == "sim_saved_only"
+    assert {row["status"] for row in rows if row["simulation_id"] != "sim_saved_only"} == {"pending"}
@@ -0,0 +1,79 @@
+"""DatingSimulation persistence: cancelled runs and forks"""
+
+import pytest
+
+from cancellation import CancellationToken, SimulationCancelled
+from config import Config
+from simulator import DatingSimulation
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Checkpoints and the store are written relative to the working directory"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "DATABASE_PATH", str(tmp_path / "auralie.db"))
+
+
+def partial_result(simulation):
+    return {
+        "simulation_id": simulation.simulation_id,
+        "participants": {"person1": "Alex Kim", "person2": "Maya Patel"},
+        "status": "in_progress",
+        "days": []
+    }
+
+
+def test_cancelled_run_saves_nothing(profiles):
+    token = CancellationToken()
+    simulation = DatingSimulation(*profiles, seed=1, cancel_token=token)
+    token.cancel("stop")
+
+    with pytest.raises(SimulationCancelled):
+        simulation.save_simulation(partial_result(simulation))
+    assert simulation.store.get_meta(simulation.simulation_id) is None
+
+
+def test_forced_save_keeps_a_cancelled_runs_days(profiles):
+    token = CancellationToken()
+    simulation = DatingSimulation(*profiles, seed=1, cancel_token=token)
+    token.cancel("stop")
+
+    simulation.save_simulation(partial_result(simulation), force=True)
+
+    assert simulation.store.get_meta(simulation.simulation_id)["status"] == "in_progress"
+
+
+def test_run_without_token_saves(profiles):
+    simulation = DatingSimulation(*profiles, seed=1)
+
+    simulation.save_simulation(partial_result(simulation))
+
+    assert simulation.store.get_meta(simulation.simulation_id) is not None
+
+
+def test_fork_restores_each_twin_even_when_names_match(profiles, fake_llm, monkeypatch):
+    monkeypatch.setattr(Config, "SIMULATION_DAYS", 3)
+    monkeypatch.setattr(Config, "ENABLE_ACTIVITIES", False)
+    twin_a = profiles[0]
+    twin_b = twin_a.model_copy(update={"age": twin_a.age + 5})  # Same name, different person
+    parent = DatingSimulation(twin_a, twin_b, seed=3)
+    parent.run_simulation()
+
+    fork = DatingSimulation.fork(parent.simulation_id, 1, twin_a, twin_b, seed=3)
+
+    for parent_twin, fork_twin in ((parent.twin1, fork.twin1), (parent.twin2, fork.twin2)):
+        restored = [entry.my_response for entry in fork_twin.conversation_history]
+        assert restored
+        assert restored == [entry.my_response for entry in parent_twin.conversation_history[:len(restored)]]
+    assert fork.twin1.conversation_history[0].my_response != fork.twin2.conversation_history[0].my_response
+
+
+def test_fork_date_suggestions_include_inherited_days(profiles, fake_llm, monkeypatch):
+    monkeypatch.setattr(Config, "SIMULATION_DAYS", 3)
+    monkeypatch.setattr(Config, "ENABLE_ACTIVITIES", False)
+    parent = DatingSimulation(*profiles, seed=3)
+    parent.run_simulation()
+
+    fork = DatingSimulation.fork(parent.simulation_id, 2, *profiles, seed=3)
+
+    assert [day["day"] for day in fork._inherited_days()] == [1, 2]
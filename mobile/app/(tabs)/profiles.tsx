@@ -5,24 +5,38 @@ import { useRouter } from 'expo-router';
 import { getProfiles } from '../../src/services/api';
 import { Profile } from '../../src/types';
 
+const PAGE_SIZE = 20;
+const LIST_FIELDS = 'id,name,age,mbti,bio,interests,values,spontaneity_level,emotional_expressiveness';
+
 export default function ProfilesScreen() {
   const router = useRouter();
   const [profiles, setProfiles] = useState<Profile[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [refreshing, setRefreshing] = useState(false);
 
-  const loadProfiles = async () => {
+  const loadProfiles = async (cursor?: string) => {
     try {
-      const response = await getProfiles();
-      setProfiles(response.data);
+      const response = await getProfiles({ limit: PAGE_SIZE, fields: LIST_FIELDS, cursor });
+      const page = response.data;
+      setProfiles((current) => (cursor ? [...current, ...page.items] : page.items));
+      setNextCursor(page.next_cursor ?? null);
     } catch (error) {
       console.error('Failed to load profiles:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
       setRefreshing(false);
     }
   };
 
+  const loadMore = () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    loadProfiles(nextCursor);
+  };
+
   useEffect(() => {
     loadProfiles();
   }, []);
@@ -121,6 +135,12 @@ export default function ProfilesScreen() {
             </Card>
           ))
         )}
+
+        {nextCursor && (
+          <Button mode="outlined" onPress={loadMore} loading={loadingMore} disabled={loadingMore}>
+            Load more
+          </Button>
+        )}
       </View>
     </ScrollView>
   );
@@ -1,28 +1,42 @@
 import { useState, useEffect } from 'react';
 import { View, Text, StyleSheet, ScrollView, RefreshControl, TouchableOpacity } from 'react-native';
-import { Card, ActivityIndicator, Chip } from 'react-native-paper';
+import { Card, ActivityIndicator, Chip, Button } from 'react-native-paper';
 import { useRouter } from 'expo-router';
 import { getSimulations } from '../../src/services/api';
 import { SimulationSummary } from '../../src/types';
 
+const PAGE_SIZE = 20;
+const LIST_FIELDS = 'simulation_id,profile1,profile2,compatibility_score,status,completed_days,created_at';
+
 export default function SimulationsScreen() {
   const [simulations, setSimulations] = useState<SimulationSummary[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [refreshing, setRefreshing] = useState(false);
   const router = useRouter();
 
-  const loadSimulations = async () => {
+  const loadSimulations = async (cursor?: string) => {
     try {
-      const response = await getSimulations();
-      setSimulations(response.data);
+      const response = await getSimulations({ limit: PAGE_SIZE, fields: LIST_FIELDS, cursor });
+      const page = response.data;
+      setSimulations((current) => (cursor ? [...current, ...page.items] : page.items));
+      setNextCursor(page.next_cursor ?? null);
     } catch (error) {
       console.error('Failed to load simulations:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
       setRefreshing(false);
     }
   };
 
+  const loadMore = () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    loadSimulations(nextCursor);
+  };
+
   useEffect(() => {
     loadSimulations();
   }, []);
@@ -145,6 +159,12 @@ export default function SimulationsScreen() {
             </TouchableOpacity>
           ))
         )}
+
+        {nextCursor && (
+          <Button mode="outlined" onPress={loadMore} loading={loadingMore} disabled={loadingMore}>
+            Load more
+          </Button>
+        )}
       </View>
     </ScrollView>
   );
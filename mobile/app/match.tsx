@@ -5,30 +5,44 @@ import { useRouter } from 'expo-router';
 import { getProfiles, runSimulation } from '../src/services/api';
 import { Profile } from '../src/types';
 
+const PAGE_SIZE = 20;
+const LIST_FIELDS = 'id,name,age,mbti,interests';
+
 export default function MatchScreen() {
   const [profiles, setProfiles] = useState<Profile[]>([]);
   const [loading, setLoading] = useState(true);
   const [running, setRunning] = useState(false);
   const [selected1, setSelected1] = useState<string>('');
   const [selected2, setSelected2] = useState<string>('');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const router = useRouter();
 
   useEffect(() => {
     loadProfiles();
   }, []);
 
-  const loadProfiles = async () => {
+  const loadProfiles = async (cursor?: string) => {
     try {
-      const response = await getProfiles();
-      setProfiles(response.data);
+      const response = await getProfiles({ limit: PAGE_SIZE, fields: LIST_FIELDS, cursor });
+      const page = response.data;
+      setProfiles((current) => (cursor ? [...current, ...page.items] : page.items));
+      setNextCursor(page.next_cursor ?? null);
     } catch (error) {
       console.error('Failed to load profiles:', error);
       Alert.alert('Error', 'Failed to load profiles. Make sure backend is running.');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
+  const loadMore = () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    loadProfiles(nextCursor);
+  };
+
   const handleRunSimulation = async () => {
     if (!selected1 || !selected2) {
       Alert.alert('Error', 'Please select two profiles');
@@ -166,6 +180,12 @@ export default function MatchScreen() {
           ))}
         </RadioButton.Group>
 
+        {nextCursor && (
+          <Button mode="outlined" onPress={loadMore} loading={loadingMore} disabled={loadingMore}>
+            Load more profiles
+          </Button>
+        )}
+
         <Button
           mode="contained"
           onPress={handleRunSimulation}
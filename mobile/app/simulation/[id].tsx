@@ -4,7 +4,7 @@ import { ActivityIndicator, Card, Chip } from 'react-native-paper';
 import { useLocalSearchParams } from 'expo-router';
 import { LineChart } from 'react-native-chart-kit';
 import { Dimensions } from 'react-native';
-import { getSimulation } from '../../src/services/api';
+import { cancelSimulation, getSimulation, waitForSimulationProgress } from '../../src/services/api';
 import { SimulationResult } from '../../src/types';
 
 const screenWidth = Dimensions.get('window').width;
@@ -23,15 +23,47 @@ export default function SimulationDetailScreen() {
 
   useEffect(() => {
     loadSimulation();
+  }, [id]);
 
-    // Poll for updates if simulation is still running
-    const pollInterval = setInterval(() => {
-      if (simulation?.status === 'running' || simulation?.status === 'pending') {
-        loadSimulation();
+  useEffect(() => {
+    if (simulation?.status !== 'running' && simulation?.status !== 'pending') {
+      return;
+    }
+
+    // Long-poll for progress; only re-fetch the full result once it finishes
+    let cancelled = false;
+    const waitForChanges = async () => {
+      let version = simulation.version ?? 0;
+      while (!cancelled) {
+        try {
+          const { data } = await waitForSimulationProgress(id, version);
+          if (cancelled) return;
+          version = data.version;
+          if (data.status === 'running' || data.status === 'pending') {
+            setSimulation((current) => current && {
+              ...current,
+              status: data.status,
+              version: data.version,
+              completed_days: data.completed_days,
+              progress: data.progress,
+              queue_position: data.queue_position,
+              estimated_start_at: data.estimated_start_at,
+            });
+          } else {
+            await loadSimulation();
+            return;
+          }
+        } catch (error) {
+          console.error('Failed to wait for simulation progress:', error);
+          await new Promise((resolve) => setTimeout(resolve, 5000));
+        }
       }
-    }, 5000); // Check every 5 seconds
+    };
+    waitForChanges();
 
-    return () => clearInterval(pollInterval);
+    return () => {
+      cancelled = true;
+    };
   }, [id, simulation?.status]);
 
   const loadSimulation = async () => {
@@ -45,6 +77,21 @@ export default function SimulationDetailScreen() {
     }
   };
 
+  const handleCancel = async () => {
+    try {
+      await cancelSimulation(id);
+      await loadSimulation();
+    } catch (error) {
+      console.error('Failed to cancel simulation:', error);
+    }
+  };
+
+  const formatStartEstimate = (estimatedStartAt?: string) => {
+    if (!estimatedStartAt) return '';
+    const minutes = Math.round((new Date(estimatedStartAt).getTime() - Date.now()) / 60000);
+    return minutes <= 0 ? ' · starting soon' : ` · starts in ~${minutes} min`;
+  };
+
   const getScoreColor = (score?: number) => {
     if (!score) return '#9ca3af';
     if (score >= 85) return '#10b981';
@@ -127,6 +174,14 @@ export default function SimulationDetailScreen() {
   // Backend uses "final_assessment" (singular), try both singular and plural
   const finalAssessments = simulation.result?.final_assessment || simulation.result?.final_assessments || simulation.final_assessment || simulation.final_assessments || {};
 
+  if (simulation.status === 'cancelled') {
+    return (
+      <View style={styles.centerContainer}>
+        <Text style={styles.statusText}>Simulation cancelled</Text>
+      </View>
+    );
+  }
+
   // Show loading/pending state if simulation is still running
   if (days.length === 0) {
     return (
@@ -140,8 +195,17 @@ export default function SimulationDetailScreen() {
             : 'Processing simulation...'}
         </Text>
         <Text style={styles.statusSubtext}>
-          This may take 2-5 minutes
+          {simulation.progress
+            ? `Day ${simulation.progress.day} · ${simulation.completed_days ?? 0} day(s) done`
+            : simulation.status === 'pending' && simulation.queue_position
+            ? `#${simulation.queue_position} in queue${formatStartEstimate(simulation.estimated_start_at)}`
+            : 'This may take 2-5 minutes'}
         </Text>
+        {(simulation.status === 'running' || simulation.status === 'pending') && (
+          <TouchableOpacity style={styles.cancelButton} onPress={handleCancel}>
+            <Text style={styles.cancelButtonText}>Cancel simulation</Text>
+          </TouchableOpacity>
+        )}
       </View>
     );
   }
@@ -593,6 +657,19 @@ const styles = StyleSheet.create({
     marginTop: 8,
     textAlign: 'center',
   },
+  cancelButton: {
+    marginTop: 24,
+    paddingVertical: 10,
+    paddingHorizontal: 20,
+    borderRadius: 8,
+    borderWidth: 1,
+    borderColor: '#ef4444',
+  },
+  cancelButtonText: {
+    fontSize: 14,
+    color: '#ef4444',
+    fontWeight: '600',
+  },
   scoreCard: {
     margin: 16,
     marginBottom: 8,
@@ -1,5 +1,16 @@
 import axios from 'axios';
-import { Profile, SimulationResult, SimulationSummary, CreateProfileRequest } from '../types';
+import {
+  ChatFrame,
+  Page,
+  Profile,
+  Day,
+  FondnessTrajectory,
+  SimulationAssessment,
+  SimulationResult,
+  SimulationSummary,
+  SimulationProgress,
+  CreateProfileRequest,
+} from '../types';
 
 // Get API URL from environment or use default
 const API_BASE_URL = process.env.EXPO_PUBLIC_API_URL || 'http://localhost:8000';
@@ -41,9 +52,35 @@ api.interceptors.response.use(
   }
 );
 
+// List endpoints return one page at a time; `fields` (comma-separated) trims each item
+export interface ListParams {
+  limit?: number;
+  cursor?: string;
+  fields?: string;
+  sort?: string;
+  order?: 'asc' | 'desc';
+}
+
+export interface ProfileListParams extends ListParams {
+  mbti?: string;
+  gender?: string;
+  min_age?: number;
+  max_age?: number;
+  q?: string;
+}
+
+export interface SimulationListParams extends ListParams {
+  status?: string;
+  profile_id?: string;
+  min_score?: number;
+  max_score?: number;
+  created_after?: string;
+  created_before?: string;
+}
+
 // Profile endpoints
-export const getProfiles = () =>
-  api.get<Profile[]>('/api/profiles');
+export const getProfiles = (params: ProfileListParams = {}) =>
+  api.get<Page<Profile>>('/api/profiles', { params });
 
 export const getProfile = (id: string) =>
   api.get<Profile>(`/api/profiles/${id}`);
@@ -52,20 +89,75 @@ export const createProfile = (data: CreateProfileRequest) =>
   api.post<Profile>('/api/profiles', data);
 
 // Simulation endpoints
-export const getSimulations = () =>
-  api.get<SimulationSummary[]>('/api/simulations');
+export const getSimulations = (params: SimulationListParams = {}) =>
+  api.get<Page<SimulationSummary>>('/api/simulations', { params });
+
+// Last response per simulation, revalidated with If-None-Match so unchanged results aren't re-downloaded
+const simulationCache = new Map<string, { etag: string; data: SimulationResult }>();
+
+export const getSimulation = async (id: string) => {
+  const cached = simulationCache.get(id);
+  const response = await api.get<SimulationResult>(`/api/simulations/${id}`, {
+    headers: cached ? { 'If-None-Match': cached.etag } : undefined,
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  });
+  if (response.status === 304 && cached) {
+    return { ...response, data: cached.data };
+  }
+  const etag = response.headers.etag;
+  if (etag) {
+    simulationCache.set(id, { etag, data: response.data });
+  }
+  return response;
+};
+
+// Parts of a result, without downloading the whole transcript
+export const getSimulationDay = (id: string, day: number) =>
+  api.get<Day>(`/api/simulations/${id}/days/${day}`);
+
+export const getSimulationDays = (id: string, start: number, end?: number) =>
+  api.get<{ simulation_id: string; days: Day[] }>(`/api/simulations/${id}/days`, {
+    params: { start, end },
+  });
+
+export const getFondnessTrajectory = (id: string) =>
+  api.get<FondnessTrajectory>(`/api/simulations/${id}/fondness`);
 
-export const getSimulation = (id: string) =>
-  api.get<SimulationResult>(`/api/simulations/${id}`);
+export const getSimulationAssessment = (id: string) =>
+  api.get<SimulationAssessment>(`/api/simulations/${id}/assessment`);
 
 export const runSimulation = (profile1_id: string, profile2_id: string) =>
-  api.post<{ simulation_id: string; status: string }>('/api/simulations', {
+  api.post<{ simulation_id: string; status: string; deduplicated: boolean }>('/api/simulations', {
     profile1_id,
     profile2_id,
   });
 
-export const deleteSimulation = (id: string) =>
-  api.delete(`/api/simulations/${id}`);
+// Long-poll: resolves when the simulation changes after `since` (or after `timeout` seconds)
+export const waitForSimulationProgress = (id: string, since: number, timeout: number = 25) =>
+  api.get<SimulationProgress>(`/api/simulations/${id}/progress`, {
+    params: { since, timeout },
+    timeout: (timeout + 5) * 1000,
+  });
+
+// What-if variant: keep days 1..fork_day, re-run the rest with overrides
+export const forkSimulation = (
+  id: string,
+  fork_day: number,
+  overrides: { activities?: Record<number, string>; enable_activities?: boolean; model?: string } = {}
+) =>
+  api.post<{ simulation_id: string; status: string; deduplicated: boolean }>(`/api/simulations/${id}/fork`, {
+    fork_day,
+    ...overrides,
+  });
+
+// Stops a queued or running simulation; it ends with status "cancelled"
+export const cancelSimulation = (id: string) =>
+  api.post<{ simulation_id: string; status: string; message: string }>(`/api/simulations/${id}/cancel`);
+
+export const deleteSimulation = (id: string) => {
+  simulationCache.delete(id);
+  return api.delete(`/api/simulations/${id}`);
+};
 
 // Chat endpoints
 export const startChat = (profile_id: string, user_name?: string) =>
@@ -88,4 +180,60 @@ export const getChatHistory = (chat_id: string) =>
 export const endChat = (chat_id: string) =>
   api.delete<{ message: string; saved_to: string; final_fondness: number }>(`/api/chats/${chat_id}`);
 
+// Live chat over a WebSocket: replies stream in token by token, fondness updates are pushed.
+// Reconnects on its own and resumes from the last frame seen; `onResync` means frames were
+// missed for good and the history should be reloaded with getChatHistory.
+export const openChatSocket = (
+  chat_id: string,
+  handlers: { onFrame: (frame: ChatFrame) => void; onResync?: () => void; onClose?: (code: number) => void }
+) => {
+  let socket: WebSocket | null = null;
+  let stream: string | null = null;
+  let lastSeq = 0;
+  let closed = false;
+  let retryDelay = 500;
+
+  const connect = () => {
+    const resume = stream ? `?stream=${stream}&last_seq=${lastSeq}` : '';
+    socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/api/chats/${chat_id}/ws${resume}`);
+    socket.onmessage = (event) => {
+      const frame: ChatFrame = JSON.parse(event.data);
+      if (frame.type === 'ping') {
+        socket?.send(JSON.stringify({ type: 'pong' }));
+        return;
+      }
+      if (frame.type === 'hello') {
+        if (stream && !frame.resumed) {
+          handlers.onResync?.();
+        }
+        stream = frame.stream;
+        lastSeq = frame.seq;
+        retryDelay = 500;
+      } else if (frame.seq !== undefined) {
+        lastSeq = frame.seq;
+      }
+      handlers.onFrame(frame);
+    };
+    socket.onclose = (event) => {
+      // 1000: chat ended, 4404: no such chat; anything else is worth reconnecting after
+      if (closed || event.code === 1000 || event.code === 4404) {
+        handlers.onClose?.(event.code);
+        return;
+      }
+      setTimeout(connect, retryDelay);
+      retryDelay = Math.min(retryDelay * 2, 10000);
+    };
+  };
+  connect();
+
+  return {
+    send: (message: string, id?: string, context: string = 'texting') =>
+      socket?.send(JSON.stringify({ type: 'message', message, context, id })),
+    close: () => {
+      closed = true;
+      socket?.close();
+    },
+  };
+};
+
 export default api;
@@ -31,6 +31,12 @@ export interface Day {
   person2_fondness: number;
 }
 
+// One page of a list endpoint; pass next_cursor back as `cursor` for the next page
+export interface Page<T> {
+  items: T[];
+  next_cursor?: string | null;
+}
+
 export interface SimulationSummary {
   simulation_id: string;
   profile1: string;
@@ -42,6 +48,26 @@ export interface SimulationSummary {
   completed_at?: string;
 }
 
+export interface SimulationProgress {
+  simulation_id: string;
+  status: string;
+  version: number;
+  completed_days: number;
+  compatibility_score?: number;
+  progress?: {
+    event: string;
+    day: number;
+    session?: string;
+    exchange_index?: number;
+    completed_days: number;
+    fondness: Record<string, number>;
+    tokens_used: number;
+  };
+  queue_position?: number;
+  estimated_start_at?: string;
+  error?: string;
+}
+
 export interface SimulationResult {
   simulation_id: string;
   status: string;
@@ -50,6 +76,10 @@ export interface SimulationResult {
   compatibility_score?: number;
   days?: Day[];
   completed_days?: number;
+  version?: number;
+  progress?: SimulationProgress['progress'];
+  queue_position?: number;
+  estimated_start_at?: string;
   error?: string;
   date_suggestions?: string[];
   result?: {
@@ -65,6 +95,41 @@ export interface SimulationResult {
   };
 }
 
+// Each participant's fondness after every message they sent, per day
+export interface FondnessTrajectory {
+  simulation_id: string;
+  days: { day: number; fondness: Record<string, number[]> }[];
+}
+
+export interface SimulationAssessment {
+  simulation_id: string;
+  status: string;
+  participants?: { person1: string; person2: string };
+  compatibility?: { rating: string; score: number };
+  final_assessment?: Record<string, { statement: string; final_fondness: number }>;
+  date_suggestions: string[];
+}
+
+// Frames pushed over /api/chats/{id}/ws; every frame except hello and ping has a `seq`
+export type ChatFrame =
+  | { type: 'hello'; stream: string; seq: number; resumed: boolean }
+  | { type: 'ping' }
+  | { seq: number; type: 'reply_start'; id: string | null; user_message: string }
+  | { seq: number; type: 'token'; id: string | null; text: string }
+  | {
+      seq: number;
+      type: 'reply';
+      id: string | null;
+      message: string;
+      emotion: string;
+      internal_thought: string;
+      fondness_change: number;
+      fondness_level: number;
+    }
+  | { seq: number; type: 'fondness'; fondness_level: number; fondness_change: number; emotion: string }
+  | { seq?: number; type: 'error'; id?: string | null; detail: string }
+  | { seq: number; type: 'ended'; final_fondness: number };
+
 export interface CreateProfileRequest {
   name: string;
   age: number;